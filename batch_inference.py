@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+PyroSense batched inference
+One blobFromImages + forward pass for the latest frame of several cameras, outputs split back per frame.
+Used by dashboard.py's detection worker.
+
+Throughput check (batched vs single-frame path) on a real model:
+    python batch_inference.py --bench --cfg model.cfg --weights model.weights --batch 1 2 4 8
+"""
+
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from yolo_decode import decode_yolo_outputs
+
+
+def split_batch_outputs(outs, batch_size):
+    """Split net.forward() results of an N-image blob into N per-image output lists.
+
+    OpenCV returns (N, rows, cols) per YOLO head for batched input; a flat (N * rows, cols) array is
+    reshaped the same way.
+    """
+    if isinstance(outs, np.ndarray):
+        outs = [outs]
+    per_frame = [[] for _ in range(batch_size)]
+    for out in outs:
+        arr = np.asarray(out)
+        if arr.ndim < 2:
+            continue
+        arr = arr.reshape(batch_size, -1, arr.shape[-1])
+        for i in range(batch_size):
+            per_frame[i].append(arr[i])
+    return per_frame
+
+
+def forward_batch(net, output_layers, frames, input_size, scale=0.00392, swap_rb=True):
+    """Run one forward pass over a list of BGR frames. Returns per-frame output lists (same order as frames)."""
+    blob = cv2.dnn.blobFromImages(frames, scale, tuple(input_size), (0, 0, 0), swap_rb, crop=False)
+    net.setInput(blob)
+    outs = net.forward(output_layers) if output_layers else net.forward()
+    return split_batch_outputs(outs, len(frames))
+
+
+def detect_batch(net, output_layers, frames, input_size, conf_threshold, nms_threshold=0.4):
+    """Batched forward + per-frame decode/NMS. Returns a list of (boxes, confidences, class_ids) arrays per frame."""
+    results = []
+    for frame, outs in zip(frames, forward_batch(net, output_layers, frames, input_size)):
+        height, width = frame.shape[:2]
+        results.append(decode_yolo_outputs(outs, width, height, conf_threshold, nms_threshold))
+    return results
+
+
+# --- Throughput benchmark ---
+
+def forward_single(net, output_layers, frame, input_size, scale=0.00392, swap_rb=True):
+    """The single-frame path (blobFromImage + forward), as the benchmark baseline."""
+    blob = cv2.dnn.blobFromImage(frame, scale, tuple(input_size), (0, 0, 0), swap_rb, crop=False)
+    net.setInput(blob)
+    return net.forward(output_layers) if output_layers else net.forward()
+
+
+def benchmark(net, output_layers, frames, input_size=(320, 320), batch_sizes=(1, 2, 4, 8), iterations=10):
+    """Frames/s of N single-frame passes vs one N-frame batch for each batch size. Returns a list of dicts."""
+    report = []
+    for batch_size in batch_sizes:
+        batch = [frames[i % len(frames)] for i in range(batch_size)]
+        # warm-up: first forward at a new input shape allocates the layer buffers
+        forward_batch(net, output_layers, batch, input_size)
+        forward_single(net, output_layers, batch[0], input_size)
+
+        t0 = time.perf_counter()
+        for _ in range(iterations):
+            for frame in batch:
+                forward_single(net, output_layers, frame, input_size)
+        single_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        for _ in range(iterations):
+            forward_batch(net, output_layers, batch, input_size)
+        batched_s = time.perf_counter() - t0
+
+        frames_done = batch_size * iterations
+        report.append({
+            'batch': batch_size,
+            'single_fps': frames_done / single_s,
+            'batched_fps': frames_done / batched_s,
+            'speedup': single_s / batched_s if batched_s > 0 else float('inf'),
+        })
+    return report
+
+
+def load_frames(video=None, count=8, size=(640, 480)):
+    """Benchmark frames from a video/camera source, or random noise when none is given or it can't be read."""
+    frames = []
+    if video is not None:
+        cap = cv2.VideoCapture(int(video) if str(video).isdigit() else video)
+        while len(frames) < count:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(frame)
+        cap.release()
+    if not frames:
+        rng = np.random.default_rng(0)
+        frames = [rng.integers(0, 255, (size[1], size[0], 3), dtype=np.uint8) for _ in range(count)]
+    return frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PyroSense batched inference benchmark")
+    parser.add_argument('--bench', action='store_true', help="compare batched vs single-frame throughput")
+    parser.add_argument('--cfg', help="darknet .cfg file")
+    parser.add_argument('--weights', help="darknet .weights file")
+    parser.add_argument('--video', help="video file or camera index for test frames (default: noise)")
+    parser.add_argument('--size', type=int, default=320, help="network input size")
+    parser.add_argument('--batch', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--iterations', type=int, default=10)
+    parser.add_argument('--threads', type=int, default=None, help="cv2.setNumThreads value")
+    args = parser.parse_args()
+
+    if not args.bench or not args.cfg or not args.weights:
+        parser.print_help()
+        return
+
+    if args.threads is not None:
+        cv2.setNumThreads(args.threads)
+    net = cv2.dnn.readNet(args.weights, args.cfg)
+    net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+    net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+    output_layers = net.getUnconnectedOutLayersNames()
+    frames = load_frames(args.video, count=max(args.batch))
+
+    print("🔬 Batched vs single-frame inference throughput")
+    print("=" * 60)
+    for r in benchmark(net, output_layers, frames, (args.size, args.size), args.batch, args.iterations):
+        print(f"batch {r['batch']:>2}: single {r['single_fps']:7.2f} fps | batched {r['batched_fps']:7.2f} fps | {r['speedup']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
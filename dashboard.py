@@ -9,14 +9,34 @@ from datetime import datetime
 import random
 import time
 import threading
+import multiprocessing
+import atexit
 import json
 import cv2  # ADDED: OpenCV for webcam streaming
 import numpy as np  # ADDED: NumPy for image processing
 import os  # ADDED: missing os import used by model file helpers
 import glob
 import pathlib
+from video_pipeline import CameraChannel, CameraManager, DetectionWorker, StreamRung
+from yolo_decode import decode_yolo_candidates, nms_per_class
+from batch_inference import split_batch_outputs
+from pipeline_metrics import PipelineMetrics
+from motion_gate import MotionGate
+from flame_filter import FlameColorFilter
+from model_watcher import ModelFileWatcher
+from inference_workers import InferenceThreadPool, default_instance_count
+from preprocessing import BlobPreprocessor, unletterbox_boxes
+from mjpeg_passthrough import request_mjpeg
+from fire_verifier import FireVerifier
+from inference_scheduler import AdaptiveInferenceScheduler
+from object_tracker import ObjectTracker
+from frame_sources import open_frame_source, replay_settings
+from inference_backends import available_backends, backend_candidates, select_fastest_backend
+from input_tuning import load_profile, profile_path_for
+from roi_inference import ROI_MODES, RoiConfig, RoiStore, crop, merge_region_detections
 
 app = Flask(__name__)
+DEBUG_MODE = True  # Flask debug + auto-reloader (see app.run at the bottom)
 # Add the same secret key as login.py for shared sessions
 app.secret_key = 'pyrosense_shared_secret_key'
 
@@ -43,35 +63,152 @@ dashboard_state = {
 }
 
 # Add global video and fire-model flags
-video_capture = None
-video_lock = threading.Lock()
+# One CameraChannel per device (capture worker + frame ring + stream hub); every consumer reads the rings
+camera_manager = None  # created by start_cameras()
+# Stage latency histograms + frame/drop counters for capture, inference and streaming (see /api/pipeline_metrics)
+pipeline_metrics = PipelineMetrics(window=int(os.environ.get('PYROSENSE_METRICS_WINDOW', '512')))
+# Camera list: JSON array of Devices rows (DeviceID, Name, Location, Type, Status) plus 'Source' (index or URL/path)
+CAMERAS_FILE = os.environ.get('PYROSENSE_CAMERAS_FILE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cameras.json'))
+# Per-camera detection zones / tiling (roi_inference.py); rows in CAMERAS_FILE may carry a default 'Roi' dict
+ROI_FILE = os.environ.get('PYROSENSE_ROI_FILE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'camera_zones.json'))
+camera_roi = None  # RoiStore, created by start_cameras()
+DEFAULT_CAMERA_DEVICES = [
+    {'DeviceID': 1, 'Name': 'Camera 1', 'Location': 'Main', 'Type': 'Camera', 'Status': 'Active', 'Source': 0},
+]
 fire_model_enabled = False  # Controlled from the web UI
 # Add the camera enabled flag
 camera_enabled = True  # when False, generator will serve "camera off" image and capture is released
 
 # --- ADDED: Fire model globals ---
-net_fire = None
+fire_backend = None  # inference_backends backend (OpenCV darknet / OpenCV ONNX / ONNX Runtime)
 fire_classes = []
-fire_output_layers = []
 fire_model_loaded = False
+# Backend choice: 'auto' times every backend the model files allow and keeps the fastest
+FIRE_BACKEND = os.environ.get('PYROSENSE_FIRE_BACKEND', 'auto')
+# Model variant: fp32, fp16 (OpenCV FP16 CPU target) or int8 (quantized ONNX from model_variants.py)
+FIRE_PRECISION = os.environ.get('PYROSENSE_FIRE_PRECISION', 'fp32').lower()
+FIRE_BACKEND_BENCH_RUNS = int(os.environ.get('PYROSENSE_FIRE_BACKEND_BENCH_RUNS', '5'))
+fire_backend_report = []
 fire_confidence_threshold = 0.25  # default; may be adjusted based on model class count
+# Second-stage verifier (fire_verifier.py): the CNN from cnn_model/ exported to ONNX re-checks every YOLO fire box.
+# PYROSENSE_VERIFIER is the .onnx path, 'auto' (first .onnx under cnn_model/) or 'off'. With a verifier loaded,
+# YOLO fire boxes are kept down to VERIFIER_YOLO_THRESHOLD (recall) and only alarm when the CNN agrees.
+VERIFIER_MODEL = os.environ.get('PYROSENSE_VERIFIER', 'auto')
+VERIFIER_THRESHOLD = float(os.environ.get('PYROSENSE_VERIFIER_THRESHOLD', '0.5'))
+VERIFIER_YOLO_THRESHOLD = float(os.environ.get('PYROSENSE_VERIFIER_YOLO_THRESHOLD', '0.1'))
+fire_verifier = None
 
 # NEW: inference tuning to reduce lag
-inference_interval = 3      # run DNN once every N frames (increase to lower CPU)
+inference_interval = 3      # starting cadence: run DNN once every N frames (the adaptive scheduler takes over from here)
 jpeg_quality = 80           # JPEG encode quality (reduce bandwidth / CPU)
+# Streams carry clean frames: boxes, tracks and the alert bar go to the page over /api/detections/<id>/stream (SSE)
+# and are drawn on a canvas over the <img>. PYROSENSE_STREAM_BURN_IN=1 burns them into the main stream again;
+# ?burn_in=1 on a video feed always serves the burned-in copy (recordings, players without the dashboard page).
+STREAM_BURN_IN = os.environ.get('PYROSENSE_STREAM_BURN_IN', '0') == '1'
+# Camera-native MJPEG passthrough (needs clean streams): local cameras are asked for FOURCC MJPG and their
+# compressed frames go to viewers untouched; only frames the detector samples are decoded. Mirroring then moves
+# to the page (CSS), since compressed bytes can't be flipped. Camera rows may set 'Passthrough' to override.
+MJPEG_PASSTHROUGH = os.environ.get('PYROSENSE_MJPEG_PASSTHROUGH', '0') == '1'
+# Adaptive streams: each viewer moves along this ladder from what its connection absorbs (send time, dropped
+# frames); viewers on the same rung share one encode. 'full' is the normal stream (jpeg_quality or passthrough),
+# ?quality=<rung name> pins a viewer to a rung, PYROSENSE_STREAM_ADAPTIVE=0 sends 'full' to everyone.
+STREAM_ADAPTIVE = os.environ.get('PYROSENSE_STREAM_ADAPTIVE', '1') != '0'
+STREAM_LADDER = (
+	StreamRung('full', 1.0, None, None),
+	StreamRung('medium', 0.75, 60, 15),
+	StreamRung('low', 0.5, 45, 8),
+	StreamRung('minimal', 0.33, 35, 3),
+)
+OVERLAY_KEEPALIVE_S = 1.0  # the overlay channel re-sends the state at least this often (alert changes, expiring tracks)
+DEFAULT_FIRE_INPUT_SIZE = (320, 320)
+# Reused resize/NCHW buffers for the detection thread (preprocessing.py); letterboxing keeps the aspect ratio
+# (darknet trains with a plain stretch, so only enable it for models trained letterboxed)
+fire_preprocessor = BlobPreprocessor()
+FIRE_LETTERBOX = os.environ.get('PYROSENSE_LETTERBOX', '0') == '1'
+fire_input_size = DEFAULT_FIRE_INPUT_SIZE  # DNN input size; load_fire_model() takes it from the model's tuning profile
+fire_input_profile = None
+# Batching across cameras: one blobFromImages/forward for up to N due frames, waiting at most this long for them
+inference_max_batch = int(os.environ.get('PYROSENSE_MAX_BATCH', '8'))
+inference_max_wait_ms = float(os.environ.get('PYROSENSE_BATCH_WAIT_MS', '15'))
+FIRE_ADAPT_INPUT_SIZE = os.environ.get('PYROSENSE_ADAPT_INPUT_SIZE', '0') == '1'  # configured; fixed-size models turn it off
+# Adaptive cadence: keep inference within a share of one core (and optionally a per-call latency budget by
+# shrinking the input size); detections and thermal alerts boost to every frame for BOOST_S seconds
+inference_scheduler = AdaptiveInferenceScheduler(
+    frame_counter=lambda: sum(ch.capture.frames_captured for ch in camera_channels()),
+    initial_interval=inference_interval,
+    max_interval=int(os.environ.get('PYROSENSE_INFERENCE_MAX_INTERVAL', '30')),
+    cpu_budget=float(os.environ.get('PYROSENSE_INFERENCE_CPU_BUDGET', '0.5')),
+    latency_budget_ms=float(os.environ.get('PYROSENSE_INFERENCE_LATENCY_BUDGET_MS', '0')) or None,
+    input_size=fire_input_size,
+    adapt_input_size=FIRE_ADAPT_INPUT_SIZE,
+    boost_s=float(os.environ.get('PYROSENSE_INFERENCE_BOOST_S', '10')),
+    enabled=os.environ.get('PYROSENSE_ADAPTIVE_INFERENCE', '1') != '0',
+)
+# Motion gate: skip the forward pass on unchanged scenes, but still infer at least every MAX_SKIP_S seconds per camera
+motion_gate = MotionGate(
+    enabled=os.environ.get('PYROSENSE_MOTION_GATE', '1') != '0',
+    min_changed_ratio=float(os.environ.get('PYROSENSE_MOTION_MIN_CHANGE', '0.003')),
+    max_skip_s=float(os.environ.get('PYROSENSE_MOTION_MAX_SKIP_S', '2.0')),
+)
+# Flame-colour cascade (opt-in: frames without flame-coloured pixels also skip person detection): infer only when
+# candidates exist or every SAFETY_S seconds; with FLAME_FILTER_CROPS only the candidate regions are inferred
+flame_filter = FlameColorFilter(
+    enabled=os.environ.get('PYROSENSE_FLAME_FILTER', '0') == '1',
+    min_pixel_ratio=float(os.environ.get('PYROSENSE_FLAME_MIN_PIXELS', '0.0005')),
+    safety_interval_s=float(os.environ.get('PYROSENSE_FLAME_SAFETY_S', '5.0')),
+)
+FLAME_FILTER_CROPS = os.environ.get('PYROSENSE_FLAME_FILTER_CROPS', '0') == '1'
+FLAME_FILTER_MAX_CROPS = 4  # more candidate blobs than this: infer the whole frame instead
+
+# Optional: run the fire model in separate worker processes (0 = in-process). Frames go over shared memory.
+inference_processes = int(os.environ.get('PYROSENSE_INFERENCE_PROCESSES', '0'))
+inference_process_threads = int(os.environ.get('PYROSENSE_INFERENCE_THREADS', '1'))  # cv2 threads per worker process
+# Or in-process (used when no processes are set): N independently loaded nets, each confined to one thread, with
+# the cores shared out between them ('auto' = one per core; INSTANCE_THREADS 0 = cores / instances)
+inference_instances = os.environ.get('PYROSENSE_INFERENCE_INSTANCES', '0')
+inference_instances = default_instance_count() if inference_instances == 'auto' else int(inference_instances)
+inference_instance_threads = int(os.environ.get('PYROSENSE_INFERENCE_INSTANCE_THREADS', '0')) or None
+inference_pool = None
+fire_model_files = {}
+
+# Hot reload (POST /api/reload_fire_model or PYROSENSE_MODEL_WATCH=1): the new model loads, warms up and passes a
+# sanity inference in the background, then replaces the live one under fire_model_lock (held by detection while
+# it uses the model, so in-flight frames finish on the old net). A swapped-in model that fails MAX_ERRORS of its
+# first PROBATION_FORWARDS forwards is rolled back.
+fire_model_lock = threading.RLock()
+fire_model_version = 0
+fire_model_reload = {'state': 'idle'}
+fire_model_reload_lock = threading.Lock()
+fire_model_reload_thread = None
+fire_model_probation = None
+FIRE_MODEL_PROBATION_FORWARDS = int(os.environ.get('PYROSENSE_MODEL_PROBATION_FORWARDS', '20'))
+FIRE_MODEL_MAX_ERRORS = int(os.environ.get('PYROSENSE_MODEL_MAX_ERRORS', '3'))
+FIRE_MODEL_WATCH = os.environ.get('PYROSENSE_MODEL_WATCH', '0') == '1'
+FIRE_MODEL_WATCH_S = float(os.environ.get('PYROSENSE_MODEL_WATCH_S', '5'))
+fire_model_watcher = None  # ModelFileWatcher, started with the cameras when FIRE_MODEL_WATCH is on
+# Startup: the model is discovered, loaded and warmed up once on a background thread (start_fire_model_loader);
+# state idle -> loading -> ready | failed | not_found, reported by /api/status and /api/fire_model_status
+FIRE_WARMUP_RUNS = int(os.environ.get('PYROSENSE_FIRE_WARMUP_RUNS', '2'))
+fire_model_startup = {'state': 'idle', 'started': None, 'ready_at': None, 'load_ms': None, 'warmup_ms': None, 'error': None}
+fire_model_ready_event = threading.Event()
+fire_model_loader_thread = None
+fire_model_discovered = {}  # files found by the last discovery (kept so the info API doesn't re-scan)
+
+# default search locations (include your YoloV4 path used by test_yolo_camera.py)
+def default_model_dirs():
+    return [
+        os.path.join(os.getcwd(), "YoloV4-Tiny_Model", "fire_extracted_files"),
+        os.path.join(os.getcwd(), "YoloV4-Tiny_Model"),
+        os.path.join(os.getcwd(), 'models', 'fire'),
+        os.path.join(os.getcwd(), 'models'),
+        os.path.join(os.getcwd(), 'model'),
+    ]
 
 # Helper: locate model files in common locations (returns dict with keys 'cfg','weights','names' or {} if none)
 def find_fire_model_files(model_dirs=None):
     try:
-        # default search locations (include your YoloV4 path used by test_yolo_camera.py)
         if model_dirs is None:
-            model_dirs = [
-                os.path.join(os.getcwd(), "YoloV4-Tiny_Model", "fire_extracted_files"),
-                os.path.join(os.getcwd(), "YoloV4-Tiny_Model"),
-                os.path.join(os.getcwd(), 'models', 'fire'),
-                os.path.join(os.getcwd(), 'models'),
-                os.path.join(os.getcwd(), 'model'),
-            ]
+            model_dirs = default_model_dirs()
 
         # scan each directory recursively for best candidates
         for d in model_dirs:
@@ -80,7 +217,9 @@ def find_fire_model_files(model_dirs=None):
                     continue
 
                 cfgs = glob.glob(os.path.join(d, "**", "*.cfg"), recursive=True)
-                weights = glob.glob(os.path.join(d, "**", "*.weights"), recursive=True) + glob.glob(os.path.join(d, "**", "*.pt"), recursive=True) + glob.glob(os.path.join(d, "**", "*.onnx"), recursive=True)
+                onnx_files = glob.glob(os.path.join(d, "**", "*.onnx"), recursive=True)
+                # ONNX exports sit next to the darknet weights they came from: keep the .weights as primary
+                weights = glob.glob(os.path.join(d, "**", "*.weights"), recursive=True) + glob.glob(os.path.join(d, "**", "*.pt"), recursive=True) or onnx_files
                 names = glob.glob(os.path.join(d, "**", "*.names"), recursive=True) + glob.glob(os.path.join(d, "**", "*.txt"), recursive=True)
 
                 # prefer yolov4-tiny-ish configs first
@@ -121,6 +260,15 @@ def find_fire_model_files(model_dirs=None):
                     files['weights'] = chosen_weights
                 if chosen_names:
                     files['names'] = chosen_names
+                if onnx_files and chosen_weights and not chosen_weights.lower().endswith('.onnx'):
+                    stem = os.path.splitext(chosen_weights)[0]
+                    exports = sorted(o for o in onnx_files if o.startswith(stem))
+                    fp32 = [o for o in exports if not o.lower().endswith('_int8.onnx')]
+                    int8 = [o for o in exports if o.lower().endswith('_int8.onnx')]
+                    if fp32:
+                        files['onnx'] = fp32[0]
+                    if int8:
+                        files['onnx_int8'] = int8[0]
 
                 if files:
                     # log selection for debugging in UI
@@ -185,38 +333,75 @@ def get_output_layers(net):
     except Exception:
         return []
 
-def get_video_capture():
-	"""Singleton video capture (lazy init). Attempts multiple backends to open camera for faster availability."""
-	global video_capture
-	with video_lock:
-		if not camera_enabled:
-			# If camera turned off, ensure capture released
-			if video_capture is not None:
-				try:
-					video_capture.release()
-				except:
-					pass
-				video_capture = None
-			return None
-
-		# If already created and opened return it
-		if video_capture is not None and getattr(video_capture, "isOpened", lambda: False)():
-			return video_capture
-
-		# Otherwise attempt to open using helper
-		video_capture = open_capture_with_backends(0)
-		# set helpful properties if opened
+def load_camera_devices(path=None):
+	"""Active camera rows from CAMERAS_FILE (same fields as the Devices table + 'Source'); falls back to camera index 0.
+	With PYROSENSE_REPLAY set every camera replays that file/folder instead (benchmarks, CI, incident review)."""
+	path = path or CAMERAS_FILE
+	devices = DEFAULT_CAMERA_DEVICES
+	if os.path.exists(path):
 		try:
-			if video_capture is not None and video_capture.isOpened():
-				video_capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)
-				video_capture.set(cv2.CAP_PROP_FPS, 30)
-				video_capture.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-				video_capture.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-		except:
-			pass
-		return video_capture
-
-# --- ADDED: dedicated opener used by get_video_capture and the toggle API ---
+			with open(path, 'r', encoding='utf-8') as f:
+				rows = json.load(f)
+			rows = [r for r in rows if r.get('Type', 'Camera') == 'Camera' and r.get('Status', 'Active') == 'Active']
+			if rows:
+				devices = rows
+		except Exception as e:
+			print(f"⚠️ Could not read camera list {path}: {e}")
+	devices = [dict(d, DeviceID=int(d['DeviceID'])) for d in devices]
+	replay = replay_settings()
+	if replay['path']:
+		for device in devices:
+			device.update(Source=replay['path'], Realtime=replay['realtime'], Loop=replay['loop'], FPS=replay['fps'])
+	return devices
+
+def open_device_capture(device):
+	"""Open one camera source (runs on its capture worker thread, which then owns the device).
+	Integer sources are local camera indexes; strings are stream URLs, video files or image folders
+	(files/folders replay at real-time speed unless the row sets Realtime=false, looping unless Loop=false)."""
+	source = device.get('Source', 0)
+	if isinstance(source, str) and source.isdigit():
+		source = int(source)
+	if not isinstance(source, int):
+		return open_frame_source(source, realtime=device.get('Realtime', True), loop=device.get('Loop', True), fps=device.get('FPS'))
+	cap = open_capture_with_backends(source)
+	# set helpful properties if opened
+	try:
+		if cap is not None and cap.isOpened():
+			if passthrough_enabled(device) and not request_mjpeg(cap):
+				print(f"⚠️ Camera {device.get('DeviceID')}: MJPG passthrough not supported, decoding frames")
+			cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+			cap.set(cv2.CAP_PROP_FPS, 30)
+			cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
+			cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+	except:
+		pass
+	return cap
+
+def passthrough_enabled(device):
+	"""Whether a camera row runs in MJPEG passthrough (local cameras only; never with burned-in streams)."""
+	source = device.get('Source', 0)
+	local = isinstance(source, int) or (isinstance(source, str) and source.isdigit())
+	return local and not STREAM_BURN_IN and bool(device.get('Passthrough', MJPEG_PASSTHROUGH))
+
+def stop_background_services():
+	"""Stop worker threads/processes and release the cameras (called at interpreter exit)."""
+	if camera_manager is not None:
+		camera_manager.stop()
+	if inference_pool is not None:
+		inference_pool.close()
+	if fire_model_watcher is not None:
+		fire_model_watcher.stop()
+
+def in_reloader_watcher():
+	"""True in the parent process of Flask's debug reloader, which never serves requests (don't grab the camera there)."""
+	return __name__ == '__main__' and DEBUG_MODE and os.environ.get('WERKZEUG_RUN_MAIN') != 'true'
+
+def background_services_allowed():
+	"""Only the serving process starts threads/devices/models: not the reloader watcher and not
+	multiprocessing children (spawn re-imports this module in every inference worker)."""
+	return not in_reloader_watcher() and multiprocessing.parent_process() is None
+
+# --- ADDED: dedicated opener used by the capture worker ---
 def open_capture_with_backends(index=0, warmup_reads=2):
 	"""Try multiple backends to open camera quickly and perform a small warm-up read sequence."""
 	backends = []
@@ -285,328 +470,1051 @@ def open_capture_with_backends(index=0, warmup_reads=2):
 	return None
 
 # --- UPDATED: more robust output-layer name getter used when loading model ---
-def load_fire_model():
-	"""Attempt to locate and load the fire model. Returns True on success."""
-	global net_fire, fire_classes, fire_output_layers, fire_model_loaded, fire_confidence_threshold, fire_model_enabled
-	fire_model_loaded = False
-	files = find_fire_model_files()
-	if not files:
-		add_log_entry("Fire model: model folder not found (no cfg/weights/names discovered)")
-		return False
+def build_fire_model(files):
+	"""Load, benchmark (doubles as warm-up) and describe a fire model without touching the live globals.
+	Returns the model dict that install_fire_model() swaps in; raises RuntimeError with a log-friendly reason."""
 	cfg = files.get('cfg')
 	weights = files.get('weights')
 	names = files.get('names')
 
-	if not (cfg and weights and names):
-		add_log_entry(f"Fire model: incomplete model files (cfg={bool(cfg)}, weights={bool(weights)}, names={bool(names)})")
-		return False
-
-	try:
-		# readNet supports (weights, cfg)
-		net = cv2.dnn.readNet(weights, cfg)
-		# Prefer CPU for compatibility
-		try:
-			net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
-			net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
-		except Exception:
-			pass
-
-		classes = load_fire_classes(names)
-		if not classes:
-			add_log_entry("Fire model: loaded but failed to read classes file")
-			return False
-
-		net_fire = net
-		fire_classes = classes
-
-		# Prefer the modern OpenCV convenience method if available
-		try:
-			if hasattr(net_fire, "getUnconnectedOutLayersNames"):
-				fire_output_layers = net_fire.getUnconnectedOutLayersNames() or []
-			else:
-				fire_output_layers = get_output_layers(net_fire) or []
-		except Exception:
-			fire_output_layers = get_output_layers(net_fire) or []
-
+	# an ONNX export carries its own graph; darknet weights need the cfg
+	needs_cfg = not (weights and weights.lower().endswith('.onnx'))
+	if not ((cfg or not needs_cfg) and weights and names):
+		raise RuntimeError(f"incomplete model files (cfg={bool(cfg)}, weights={bool(weights)}, names={bool(names)})")
+
+	# input size: PYROSENSE_FIRE_INPUT_SIZE, else the profile saved by input_tuning.py, else the default
+	input_profile = load_profile(weights)
+	if os.environ.get('PYROSENSE_FIRE_INPUT_SIZE'):
+		size = int(os.environ['PYROSENSE_FIRE_INPUT_SIZE'])
+		input_size = (size, size)
+	elif input_profile:
+		input_size = tuple(input_profile['input_size'])
+	else:
+		input_size = DEFAULT_FIRE_INPUT_SIZE
+
+	specs = backend_candidates(files, input_size, FIRE_PRECISION)
+	if not specs and FIRE_PRECISION != 'fp32':
+		add_log_entry(f"Fire model: no {FIRE_PRECISION} variant available, falling back to fp32")
+		specs = backend_candidates(files, input_size)
+	if FIRE_BACKEND != 'auto':
+		specs = [spec for spec in specs if spec['backend'] == FIRE_BACKEND]
+	if not specs:
+		raise RuntimeError(f"no inference backend can run {os.path.basename(weights)} (backend={FIRE_BACKEND})")
+	# short built-in benchmark (doubles as warm-up) picks the fastest backend on this machine
+	backend, spec, report = select_fastest_backend(specs, input_size, runs=FIRE_BACKEND_BENCH_RUNS)
+	if backend is None:
+		raise RuntimeError('; '.join(row['backend'] + ': ' + row.get('error', '') for row in report))
+
+	classes = load_fire_classes(names)
+	if not classes:
+		raise RuntimeError("loaded but failed to read classes file")
+
+	# adjust confidence threshold heuristically
+	if len(classes) == 44:
+		threshold = 0.15
+	elif len(classes) == 1:
+		threshold = 0.3
+	else:
+		threshold = 0.2
+	return {
+		'backend': backend,
+		'backend_report': report,
+		'classes': classes,
+		'files': dict(files, **spec),
+		'input_size': input_size,
+		'input_profile': input_profile,
+		'confidence_threshold': threshold,
+	}
+
+def sanity_check_fire_model(model):
+	"""Quick inference before a model goes live: the newest camera frame (or a grey frame) must produce finite
+	YOLO rows with 5 + len(classes) columns. Raises RuntimeError otherwise."""
+	channels = camera_manager.channels() if camera_manager is not None else []
+	packet = next((ch.ring.latest() for ch in channels if ch.ring.latest() is not None), None)
+	frame = packet.image if packet is not None else np.full((480, 640, 3), 127, np.uint8)
+	size = model['backend'].input_size or model['input_size']
+	outs = model['backend'].forward(cv2.dnn.blobFromImage(frame, 0.00392, tuple(size), (0,0,0), True, crop=False))
+	outs = [outs] if isinstance(outs, np.ndarray) else list(outs or [])
+	if not outs:
+		raise RuntimeError("sanity inference returned no outputs")
+	columns = 5 + len(model['classes'])
+	for out in outs:
+		out = np.asarray(out)
+		if out.shape[-1] != columns:
+			raise RuntimeError(f"sanity inference: output rows have {out.shape[-1]} values, expected {columns} for {len(model['classes'])} classes")
+		if not np.isfinite(out).all():
+			raise RuntimeError("sanity inference produced NaN/inf")
+	decode_yolo_candidates(outs, frame.shape[1], frame.shape[0], model['confidence_threshold'])
+
+def warm_up_fire_model(model, runs=FIRE_WARMUP_RUNS):
+	"""Forward passes on dummy blobs in every shape detection will use (single frame and full batch), so
+	OpenCV's lazy per-shape graph/allocation setup happens here and not on the first camera frame. Returns ms."""
+	size = tuple(model['backend'].input_size or model['input_size'])
+	t0 = time.perf_counter()
+	for batch in sorted({1, max(1, inference_max_batch)}):
+		blob = np.zeros((batch, 3, size[1], size[0]), np.float32)
+		for _ in range(runs):
+			model['backend'].forward(blob)
+	return round((time.perf_counter() - t0) * 1000.0, 1)
+
+def current_fire_model():
+	"""The live model in build_fire_model()'s shape (what a rollback restores)."""
+	return {
+		'backend': fire_backend,
+		'backend_report': fire_backend_report,
+		'classes': fire_classes,
+		'files': fire_model_files,
+		'input_size': fire_input_size,
+		'input_profile': fire_input_profile,
+		'confidence_threshold': fire_confidence_threshold,
+	}
+
+def install_fire_model(model, restart_pool=True):
+	"""Atomic swap: waits for the in-flight detection batch (which keeps the old net) and replaces every model global at once.
+	Unless restart_pool is False, the inference pool (if configured) for the new model is built first, outside the lock,
+	and swapped in together with the globals: the old workers serve frames, labelled as the old model, until then."""
+	global fire_backend, fire_backend_report, fire_input_size, fire_input_profile, fire_classes, fire_model_loaded, fire_confidence_threshold, fire_model_files, fire_model_version, inference_pool
+	# the workers load their own copies: rebuild them even when the paths are unchanged (new weights in place)
+	restart_pool = restart_pool and inference_pool_configured()
+	if restart_pool:
+		pool, message = build_inference_pool(model['files'], model['backend'].input_size or model['input_size'])
+	with fire_model_lock:
+		fire_backend = model['backend']
+		fire_backend_report = model['backend_report']
+		fire_classes = model['classes']
+		fire_model_files = model['files']
+		fire_input_size = model['input_size']
+		fire_input_profile = model['input_profile']
+		fire_confidence_threshold = model['confidence_threshold']
+		inference_scheduler.set_base_input_size(fire_input_size)
+		# ONNX exports have a fixed spatial size: run at that size and don't step it down (a later
+		# darknet model gets the configured adaptation back)
+		inference_scheduler.adapt_input_size = FIRE_ADAPT_INPUT_SIZE and not fire_backend.input_size
+		if fire_backend.input_size:
+			inference_scheduler.set_base_input_size(fire_backend.input_size)
 		fire_model_loaded = True
+		fire_model_version += 1
+		if restart_pool:
+			old_pool, inference_pool = inference_pool, pool
+	if restart_pool:
+		if old_pool is not None:
+			old_pool.close()
+		add_log_entry(message)
+
+def log_fire_model(model):
+	files, backend, report = model['files'], model['backend'], model['backend_report']
+	add_log_entry(f"Fire model loaded: {os.path.basename(files['weights'])} ({len(model['classes'])} classes) - names:{os.path.basename(files['names'])}")
+	add_log_entry(f"Fire model input size: {model['input_size'][0]}x{model['input_size'][1]} ("
+		+ (f"tuned {model['input_profile'].get('tuned_at')}" if model['input_profile'] else "no tuning profile") + ")")
+	add_log_entry(f"Fire model backend: {backend.name} {backend.precision} (" + ", ".join(
+		f"{row['backend']} {row['forward_ms']:.1f} ms" for row in report if 'forward_ms' in row) + ")")
 
-		# adjust confidence threshold heuristically
-		if len(classes) == 44:
-			fire_confidence_threshold = 0.15
-		elif len(classes) == 1:
-			fire_confidence_threshold = 0.3
-		else:
-			fire_confidence_threshold = 0.2
-
-		add_log_entry(f"Fire model loaded: {os.path.basename(weights)} ({len(classes)} classes) - names:{os.path.basename(names)}")
+def load_fire_model():
+	"""Attempt to locate and load the fire model. Returns True on success; the failure reason goes to
+	fire_model_startup['error'] (readiness)."""
+	global fire_model_loaded, fire_model_enabled, fire_model_discovered
+	fire_model_loaded = False
+	fire_model_startup['error'] = None
+	files = fire_model_discovered = find_fire_model_files()
+	if not files:
+		fire_model_startup['error'] = "model folder not found (no cfg/weights/names discovered)"
+		add_log_entry(f"Fire model: {fire_model_startup['error']}")
+		return False
+	try:
+		model = build_fire_model(files)
+		fire_model_startup['warmup_ms'] = warm_up_fire_model(model)
+		sanity_check_fire_model(model)
+		install_fire_model(model)
+		log_fire_model(model)
+		load_fire_verifier()
 		# Enable overlay automatically when the model successfully loads (so boxes appear without extra toggle)
 		fire_model_enabled = True
 		return True
 	except Exception as e:
 		add_log_entry(f"Fire model load failed: {e}")
+		fire_model_startup['error'] = str(e)
 		fire_model_loaded = False
 		return False
 
-# Attempt to load at startup (non-blocking attempt) and enable overlay if successful
-try:
-	_ok = load_fire_model()
-	# load_fire_model sets fire_model_enabled True on success; ensure it's set here as well for clarity
-	if _ok:
+def reload_fire_model(model_dirs=None):
+	"""Hot reload: discover, load, warm up and sanity-check the new model off the detection path, then swap it in.
+	Streams and detection keep running on the old model throughout; any failure leaves the old model live.
+	After the swap the previous model is kept for FIRE_MODEL_PROBATION_FORWARDS forwards and restored if the new
+	one fails FIRE_MODEL_MAX_ERRORS of them."""
+	global fire_model_probation, fire_model_enabled
+	fire_model_reload.update(state='loading', started=time.time(), finished=None, error=None, weights=None)
+	try:
+		files = find_fire_model_files(model_dirs)
+		if not files:
+			raise RuntimeError("model folder not found (no cfg/weights/names discovered)")
+		model = build_fire_model(files)
+		warm_up_fire_model(model)
+		sanity_check_fire_model(model)
+		previous = current_fire_model() if fire_backend is not None else None
+		install_fire_model(model)
+		fire_model_probation = {'previous': previous, 'forwards': 0, 'errors': 0} if previous else None
 		fire_model_enabled = True
-except Exception:
-	pass
-
-def generate_mjpeg():
-	"""Generator that yields MJPEG frames. Shows placeholder if camera disabled, and re-checks when enabled."""
-	frame_idx = 0
-	# store last detections to re-draw while skipping inference
-	last_boxes = []
-	last_class_ids = []
-	last_confidences = []
-	last_labels = []
-	last_colors = []
-	
-	while True:
-		cap = get_video_capture()
-		# If camera disabled or not available, yield placeholder but keep re-checking
-		if cap is None or not getattr(cap, "isOpened", lambda: False)():
-			placeholder = np.zeros((360,640,3), dtype=np.uint8)
-			cv2.putText(placeholder, "Camera is OFF", (40, 190), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (255,255,255), 3)
-			cv2.putText(placeholder, "Click 'Camera' to enable feed", (40, 230), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (200,200,200), 2)
-			ret, jpeg = cv2.imencode('.jpg', placeholder)
-			frame = jpeg.tobytes()
-			# yield placeholder and re-check camera state on next loop iteration
-			yield (b'--frame\r\n'
-				   b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
-			time.sleep(0.25)
-			continue
+		log_fire_model(model)
+		add_log_entry(f"Fire model hot-swapped to version {fire_model_version}")
+		fire_model_reload.update(state='swapped', weights=files.get('weights'), version=fire_model_version)
+		return True
+	except Exception as e:
+		add_log_entry(f"Fire model reload failed, keeping the current model: {e}")
+		fire_model_reload.update(state='failed', error=str(e))
+		return False
+	finally:
+		fire_model_reload['finished'] = time.time()
+		if fire_model_watcher is not None:
+			fire_model_watcher.rebase()
+
+def start_fire_model_reload(model_dirs=None):
+	"""Run reload_fire_model() on a background thread (one at a time). Returns False if a reload is already running."""
+	global fire_model_reload_thread
+	with fire_model_reload_lock:
+		if fire_model_reload_thread is not None and fire_model_reload_thread.is_alive():
+			return False
+		fire_model_reload['state'] = 'queued'
+		fire_model_reload_thread = threading.Thread(target=reload_fire_model, args=(model_dirs,), name='fire-model-reload', daemon=True)
+		fire_model_reload_thread.start()
+	return True
+
+def rollback_fire_model(reason):
+	"""Restore the model that was live before the last hot swap. Runs on the detection thread, so only the globals
+	swap under the lock: the failing pool is detached at once (detection falls back to the restored in-process net)
+	and closed and rebuilt for the restored model on a background thread."""
+	global fire_model_probation, inference_pool
+	with fire_model_lock:
+		probation, fire_model_probation = fire_model_probation, None
+		if not probation or not probation['previous']:
+			return False
+		install_fire_model(probation['previous'], restart_pool=False)
+		failed_pool, inference_pool = inference_pool, None
+	add_log_entry(f"Fire model rolled back to the previous version ({reason})")
+	fire_model_reload.update(state='rolled_back', error=reason, version=fire_model_version)
+	if failed_pool is not None or inference_pool_configured():
+		threading.Thread(target=rebuild_inference_pool, args=(failed_pool,), name='fire-pool-rebuild', daemon=True).start()
+	return True
+
+def rebuild_inference_pool(failed_pool=None):
+	if failed_pool is not None:
+		failed_pool.close()
+	if inference_pool_configured():
+		start_inference_pool()
+
+def record_probation(error=None):
+	"""Count one inference (in-process forward or pool task) of a freshly swapped model: roll back after
+	FIRE_MODEL_MAX_ERRORS failures, release the old model after FIRE_MODEL_PROBATION_FORWARDS successes."""
+	global fire_model_probation
+	probation = fire_model_probation
+	if probation is None:
+		return
+	if error is not None:
+		probation['errors'] += 1
+		if probation['errors'] >= FIRE_MODEL_MAX_ERRORS:
+			rollback_fire_model(f"{probation['errors']} failed inferences: {error}")
+		return
+	probation['forwards'] += 1
+	if probation['forwards'] >= FIRE_MODEL_PROBATION_FORWARDS:
+		fire_model_probation = None  # passed: release the old net
+
+def fire_forward(blob):
+	"""fire_backend.forward(blob), counting the outcome while a freshly swapped model is on probation."""
+	try:
+		outs = fire_backend.forward(blob)
+	except Exception as e:
+		record_probation(e)
+		raise
+	record_probation()
+	return outs
+
+def start_model_watcher():
+	"""Hot-reload the fire model whenever its files change on disk (PYROSENSE_MODEL_WATCH=1)."""
+	global fire_model_watcher
+	if fire_model_watcher is None:
+		fire_model_watcher = ModelFileWatcher(fire_model_watch_dirs, start_fire_model_reload, interval_s=FIRE_MODEL_WATCH_S)
+	fire_model_watcher.start()
+	add_log_entry(f"Model watcher: polling model folders every {FIRE_MODEL_WATCH_S:g}s for new versions")
+	return fire_model_watcher
+
+def fire_model_watch_dirs():
+	dirs = default_model_dirs()
+	weights = fire_model_files.get('weights')
+	if weights and os.path.dirname(os.path.abspath(weights)) != os.getcwd():
+		dirs.append(os.path.dirname(os.path.abspath(weights)))
+	return dirs
+
+def load_fire_verifier():
+	"""Load the optional CNN verifier (PYROSENSE_VERIFIER). Returns the FireVerifier or None."""
+	global fire_verifier
+	fire_verifier = None
+	path = VERIFIER_MODEL
+	if path.lower() in ('', '0', 'off', 'none'):
+		return None
+	if path == 'auto':
+		found = sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cnn_model', '**', '*.onnx'), recursive=True))
+		if not found:
+			return None
+		path = found[0]
+	try:
+		fire_verifier = FireVerifier(path, threshold=VERIFIER_THRESHOLD)
+		add_log_entry(f"Fire verifier loaded: {os.path.basename(path)} ({fire_verifier.backend.name}, "
+			f"YOLO fire threshold {detection_threshold():.2f}, CNN threshold {VERIFIER_THRESHOLD:.2f})")
+	except Exception as e:
+		fire_verifier = None
+		add_log_entry(f"Fire verifier load failed: {e}")
+	return fire_verifier
+
+def detection_threshold():
+	"""YOLO confidence floor: lowered to VERIFIER_YOLO_THRESHOLD while the verifier re-checks fire boxes."""
+	if fire_verifier is not None:
+		return min(fire_confidence_threshold, VERIFIER_YOLO_THRESHOLD)
+	return fire_confidence_threshold
+
+def inference_pool_configured():
+	return (inference_processes > 0 or inference_instances > 0) and background_services_allowed()
+
+def build_inference_pool(files, input_size):
+	"""Start inference workers (processes, else thread-confined instances) for `files` without installing them.
+	Returns (pool or None, log message)."""
+	try:
+		if inference_processes > 0:
+			from inference_workers import InferenceProcessPool
+			pool = InferenceProcessPool(files, input_size=input_size,
+				processes=inference_processes, num_threads=inference_process_threads, letterbox=FIRE_LETTERBOX)
+			message = f"Inference workers started: {inference_processes} process(es), {inference_process_threads} thread(s) each"
+		else:
+			pool = InferenceThreadPool(files, input_size=input_size,
+				instances=inference_instances, num_threads=inference_instance_threads, letterbox=FIRE_LETTERBOX)
+			message = f"Inference instances started: {pool.instances} net(s), {pool.num_threads} thread(s) each"
+	except Exception as e:
+		pool, message = None, f"Inference workers unavailable, using in-process model: {e}"
+	return pool, message
+
+def start_inference_pool():
+	"""(Re)start the inference workers for the currently loaded model files.
+	The new workers load first; detection keeps using the old ones until the swap."""
+	global inference_pool
+	pool, message = build_inference_pool(fire_model_files, inference_scheduler.input_size())
+	with fire_model_lock:
+		old, inference_pool = inference_pool, pool
+	if old is not None:
+		old.close()
+	add_log_entry(message)
+	return inference_pool
+
+def start_fire_model_loader():
+	"""Discover, load and warm up the fire model once, on a background thread, so the server starts serving
+	immediately (readiness: fire_model_startup / /api/status). Returns False if the loader already ran or is running."""
+	global fire_model_loader_thread
+	with fire_model_reload_lock:
+		if fire_model_loader_thread is not None:
+			return False
+		fire_model_startup.update(state='loading', started=time.time())
+		fire_model_loader_thread = threading.Thread(target=_load_fire_model_at_startup, name='fire-model-loader', daemon=True)
+		fire_model_loader_thread.start()
+	return True
 
-		# Camera is available — stream frames
-		ret, frame = cap.read()
-		if not ret or frame is None:
-			# If read failed, give the device a moment and re-check
-			time.sleep(0.05)
+def _load_fire_model_at_startup():
+	t0 = time.time()
+	try:
+		ok = load_fire_model()
+	except Exception as e:
+		ok = False
+		fire_model_startup['error'] = str(e)
+	fire_model_startup['load_ms'] = round((time.time() - t0) * 1000.0, 1)
+	fire_model_startup['state'] = 'ready' if ok else ('not_found' if not fire_model_discovered else 'failed')
+	fire_model_startup['ready_at'] = time.time() if ok else None
+	fire_model_ready_event.set()
+
+def fire_model_readiness():
+	return dict(fire_model_startup, ready=fire_model_loaded and fire_backend is not None, version=fire_model_version)
+
+def wait_fire_model_loaded(timeout=None):
+	"""Block until the startup loader has finished (either way). Returns whether a model is loaded."""
+	fire_model_ready_event.wait(timeout)
+	return fire_model_loaded
+
+# Detection results live in each CameraChannel's store: written by the shared detection worker,
+# read by overlay / status API / alerting
+# A result stays current until the next one is due: on an idle camera the motion gate (and, when enabled, the
+# flame-colour filter) only lets a frame through every max_skip_s / safety_interval_s seconds
+DETECTION_MAX_AGE_MARGIN = 1.0
+
+def detection_max_age():
+	"""Seconds a detection result counts as current; older results are not drawn or treated as an active fire."""
+	gated = [motion_gate.max_skip_s if motion_gate.enabled else 0.0,
+		flame_filter.safety_interval_s if flame_filter.enabled else 0.0]
+	return max(2.0, *gated) + DETECTION_MAX_AGE_MARGIN
+
+# Per-camera trackers: carry boxes between inference frames and confirm fire after K matched inferences
+FIRE_CONFIRM_HITS = int(os.environ.get('PYROSENSE_FIRE_CONFIRM_K', '2'))
+TRACKER_KALMAN = os.environ.get('PYROSENSE_TRACKER_KALMAN', '1') != '0'
+TRACK_MAX_AGE = 3.0  # seconds without a matching detection before a track is no longer drawn
+camera_trackers = {}
+
+def tracker_for(device_id):
+	tracker = camera_trackers.get(device_id)
+	if tracker is None:
+		tracker = camera_trackers[device_id] = ObjectTracker(confirm_hits=FIRE_CONFIRM_HITS, use_kalman=TRACKER_KALMAN)
+	return tracker
+
+_camera_off_jpeg = None
+
+def render_camera_off_jpeg(channel):
+	"""Placeholder JPEG served while a camera is disabled/unavailable (encoded once, then cached)."""
+	global _camera_off_jpeg
+	if camera_enabled and channel.capture.is_open():
+		# camera open but momentarily slow: keep waiting instead of flashing the placeholder
+		return None
+	if _camera_off_jpeg is None:
+		placeholder = np.zeros((360,640,3), dtype=np.uint8)
+		cv2.putText(placeholder, "Camera is OFF", (40, 190), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (255,255,255), 3)
+		cv2.putText(placeholder, "Click 'Camera' to enable feed", (40, 230), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (200,200,200), 2)
+		ret, jpeg = cv2.imencode('.jpg', placeholder)
+		_camera_off_jpeg = jpeg.tobytes()
+	return _camera_off_jpeg
+
+def run_fire_inference(frame):
+	"""Run the fire model on one frame and return NMS-filtered detections as dicts (box is [x, y, w, h] in frame pixels).
+	Forward errors propagate (as on the batch and pool paths) so the detection worker records them."""
+	if inference_pool is not None and inference_pool.alive:
+		return pool_fire_result(inference_pool.submit(frame, detection_threshold(), 0.4, input_size=inference_scheduler.input_size()))
+
+	# resize + normalize into the reused blob buffers (same values as blobFromImage, no per-frame allocations)
+	with pipeline_metrics.timer('blob'):
+		blob, transform = fire_preprocessor.blob(frame, inference_scheduler.input_size(), letterbox=FIRE_LETTERBOX)
+	with pipeline_metrics.timer('forward'):
+		outs = fire_forward(blob)
+
+	if isinstance(outs, np.ndarray):
+		outs = [outs]
+	elif not isinstance(outs, (list, tuple)):
+		outs = []
+	return decode_fire_outputs(outs, frame, transform)
+
+def decode_fire_outputs(outs, frame, transform=None):
+	"""Vectorized decode + class-aware NMS of one frame's outputs into detection dicts (timed as separate stages).
+	With a letterbox transform, boxes are decoded in network pixels and mapped back to the frame."""
+	height, width = frame.shape[:2]
+	if transform is not None:
+		width, height = inference_scheduler.input_size()
+	with pipeline_metrics.timer('decode'):
+		boxes, confidences, class_ids = decode_yolo_candidates(outs, width, height, detection_threshold())
+		boxes = unletterbox_boxes(boxes, transform)
+	with pipeline_metrics.timer('nms'):
+		keep = nms_per_class(boxes, confidences, class_ids, detection_threshold(), 0.4)
+	return make_detections(boxes[keep].tolist(), confidences[keep].tolist(), class_ids[keep].tolist())
+
+def pool_fire_result(future):
+	"""Wait for a worker-process result (blob + forward + decode run there; the frame crossed over shared memory)."""
+	try:
+		boxes, confidences, class_ids, worker_ms = future.result(5.0)
+	except Exception as e:
+		record_probation(e)
+		raise
+	record_probation()
+	pipeline_metrics.observe('worker_infer', worker_ms)
+	return make_detections(boxes, confidences, class_ids)
+
+def make_detections(boxes, confidences, class_ids):
+	"""Turn decoded box/confidence/class lists into labelled detection dicts."""
+	detections = []
+	for box, conf, class_id in zip(boxes, confidences, class_ids):
+		label = fire_classes[class_id] if class_id < len(fire_classes) else f"ID:{class_id}"
+		detections.append({'box': box, 'class_id': class_id, 'confidence': conf, 'label': label})
+	return detections
+
+def run_fire_inference_batch(frames):
+	"""Run the fire model on several frames at once; returns one detection list per frame (same order)."""
+	if inference_pool is not None and inference_pool.alive:
+		# worker processes: queue every frame first so the workers run them in parallel
+		futures = [inference_pool.submit(frame, detection_threshold(), 0.4, input_size=inference_scheduler.input_size()) for frame in frames]
+		return [pool_fire_result(future) for future in futures]
+	if len(frames) == 1:
+		return [run_fire_inference(frames[0])]
+
+	# one blobFromImages + forward for the whole batch, outputs split back per frame
+	with pipeline_metrics.timer('blob_batch'):
+		blob, transforms = fire_preprocessor.batch(frames, inference_scheduler.input_size(), letterbox=FIRE_LETTERBOX)
+	with pipeline_metrics.timer('forward_batch'):
+		outs = fire_forward(blob)
+	return [decode_fire_outputs(frame_outs, frame, transform)
+		for frame, frame_outs, transform in zip(frames, split_batch_outputs(outs, len(frames)), transforms)]
+
+def camera_roi_config(device_id):
+	return camera_roi.get(device_id) if camera_roi is not None else RoiConfig()
+
+def run_camera_inference(entries):
+	"""entries: [(device_id, frame, roi_config or None)] -> one detection list per entry. Cameras with an ROI mode
+	contribute their zone crops / tiles instead of the whole frame; the crops of all cameras share batched forwards
+	(max_batch at a time) and each camera's crop detections are merged back with one global NMS."""
+	plans, crops, owners = [], [], []
+	for index, (device_id, frame, config) in enumerate(entries):
+		config = config or camera_roi_config(device_id)
+		height, width = frame.shape[:2]
+		regions = config.regions(width, height)
+		plans.append((config, width, height))
+		for region in regions:
+			crops.append(crop(frame, region))
+			owners.append((index, region))
+		if config.active:
+			pipeline_metrics.incr('roi_crops', device_id, len(regions))
+
+	outputs = []
+	step = max(1, inference_max_batch)
+	for start in range(0, len(crops), step):
+		outputs.extend(run_fire_inference_batch(crops[start:start + step]))
+
+	grouped = [[] for _ in entries]
+	for (index, region), detections in zip(owners, outputs):
+		grouped[index].append((region, detections))
+	results = []
+	for (config, width, height), region_results in zip(plans, grouped):
+		if not config.active:
+			results.append(region_results[0][1])
 			continue
-
-		# Optional: mirror to match UI expectation
-		frame = cv2.flip(frame, 1)
-
-		# If dashboard_state says FIRE DETECTED, show top alert bar on stream
-		if dashboard_state.get('fire_status') and 'FIRE' in dashboard_state.get('fire_status'):
-			cv2.rectangle(frame, (0,0), (frame.shape[1], 40), (0,0,255), -1)
-			cv2.putText(frame, "ALERT: FIRE DETECTED", (10,28), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255,255,255), 2)
-
-		# --- ADDED: Run lightweight YOLO fire-model inference and overlay boxes when enabled ---
+		with pipeline_metrics.timer('roi_merge'):
+			zones = config.zone_rects(width, height) if config.mode == 'zones' else None
+			results.append(merge_region_detections(region_results, 0.4, zones))
+	return results
+
+def verify_fire_detections(device_ids, frames, detection_lists):
+	"""Second stage: every YOLO fire box of these frames goes through the CNN verifier in one batched call.
+	Returns (kept, rejected) detection lists per frame; other classes keep the normal YOLO threshold."""
+	if fire_verifier is None:
+		return detection_lists, [[] for _ in detection_lists]
+	kept, rejected, items = [], [], []
+	for frame, detections in zip(frames, detection_lists):
+		fire = [d for d in detections if 'fire' in d['label'].lower()]
+		kept.append([d for d in detections if 'fire' not in d['label'].lower() and d['confidence'] >= fire_confidence_threshold])
+		items.extend((frame, d) for d in fire)
+	if not items:
+		return kept, [[] for _ in detection_lists]
+	with pipeline_metrics.timer('verifier'):
+		fire_verifier.verify(items)
+	for device_id, frame_kept, detections in zip(device_ids, kept, detection_lists):
+		checked = [d for d in detections if 'verifier' in d]
+		confirmed = [d for d in checked if d['verifier']['verified']]
+		frame_kept.extend(confirmed)
+		frame_kept.sort(key=lambda d: -d['confidence'])
+		rejected.append([d for d in checked if not d['verifier']['verified']])
+		pipeline_metrics.incr('verifier_confirmed', device_id, len(confirmed))
+		pipeline_metrics.incr('verifier_rejected', device_id, len(checked) - len(confirmed))
+	return kept, rejected
+
+def fire_model_ready():
+	return fire_model_enabled and fire_model_loaded and fire_backend is not None
+
+def build_detection_result(device_id, packet, detections, inference_ms, batch_size=1, rejected=None):
+	"""Result dict for one camera frame. Detections are fed to the camera's tracker first: 'fire' means a fire
+	track matched in this inference and confirmed over FIRE_CONFIRM_HITS inferences; 'fire_candidate' is the raw model call
+	(after the verifier, whose rejected fire boxes are reported separately and never reach the tracker)."""
+	height, width = packet.image.shape[:2]
+	tracks = tracker_for(device_id).update(detections, packet.timestamp)
+	result = {
+		'device_id': device_id,
+		'seq': packet.seq,
+		'timestamp': packet.timestamp,
+		'frame_size': [width, height],
+		'detections': detections,
+		'tracks': tracks,
+		'fire_candidate': any('fire' in d['label'].lower() for d in detections),
+		'fire': any(t['confirmed'] and t['misses'] == 0 and 'fire' in t['label'].lower() for t in tracks),
+		'inference_ms': round(inference_ms, 1),
+		'batch_size': batch_size,
+	}
+	if fire_verifier is not None:
+		result['rejected'] = rejected or []
+	return result
+
+def gates_forced(device_id):
+	"""Gates never skip while the camera's last result shows a fire candidate or an alert boost is on."""
+	channel = camera_manager.get(device_id) if camera_manager is not None else None
+	last = channel.detections.latest(max_age=detection_max_age()) if channel is not None else None
+	return bool(last and last.get('fire_candidate')) or inference_scheduler.boosted
+
+def motion_gate_allows(device_id, packet, force=False):
+	"""Run the cheap motion gate for one camera frame."""
+	with pipeline_metrics.timer('motion_gate', device_id):
+		run, reason = motion_gate.check(device_id, packet.image, force=force)
+	if not run:
+		pipeline_metrics.incr('motion_skipped', device_id)
+	return run
+
+def inference_plan(device_id, packet):
+	"""Cascade in front of the model: motion gate, then the flame-colour filter. Returns None to skip the frame,
+	else the RoiConfig to infer with (the camera's own, or crops around the flame-colour candidates)."""
+	force = gates_forced(device_id)
+	if not motion_gate_allows(device_id, packet, force):
+		return None
+	config = camera_roi_config(device_id)
+	if flame_filter.enabled:
+		with pipeline_metrics.timer('flame_filter', device_id):
+			run, reason, regions = flame_filter.check(device_id, packet.image, force=force)
+		if not run:
+			pipeline_metrics.incr('flame_skipped', device_id)
+			return None
+		if FLAME_FILTER_CROPS and reason == 'flame_colour' and not config.active and len(regions) <= FLAME_FILTER_MAX_CROPS:
+			height, width = packet.image.shape[:2]
+			zones = [[x / width, y / height, w / width, h / height] for x, y, w, h in regions]
+			pipeline_metrics.incr('flame_crop_runs', device_id)
+			config = RoiConfig('zones', zones=zones, tile_size=config.tile_size, overlap=config.overlap)
+	# only now is the frame inferred: the gates' references and minimum-rate clocks move to it
+	motion_gate.commit(device_id)
+	flame_filter.commit(device_id)
+	return config
+
+def detect_fire_packet(device_id, packet):
+	"""Detection worker callback: infer on one camera's ring frame and build its result
+	(None while the model is off or the motion gate / flame-colour filter skips the frame)."""
+	if not fire_model_ready():
+		return None
+	plan = inference_plan(device_id, packet)
+	if plan is None:
+		return None
+	t0 = time.time()
+	with fire_model_lock:  # a hot swap waits for this frame
+		detections = run_camera_inference([(device_id, packet.image, plan)])
+		kept, rejected = verify_fire_detections([device_id], [packet.image], detections)
+	inference_ms = (time.time() - t0) * 1000.0
+	inference_scheduler.record_inference(inference_ms)
+	return build_detection_result(device_id, packet, kept[0], inference_ms, rejected=rejected[0])
+
+def detect_fire_batch(items):
+	"""Batched detection worker callback: items are (device_id, packet); one result (or None) per item.
+	inference_ms is the whole batch's time, i.e. the latency each camera saw."""
+	if not fire_model_ready():
+		return [None] * len(items)
+	# only cameras that pass the gates (scene changed / flame-coloured, or due for a minimum-rate check) join the batch
+	plans = [inference_plan(device_id, packet) for device_id, packet in items]
+	run = [i for i, plan in enumerate(plans) if plan is not None]
+	results = [None] * len(items)
+	if not run:
+		return results
+	t0 = time.time()
+	with fire_model_lock:  # a hot swap waits for this batch
+		batch = run_camera_inference([(items[i][0], items[i][1].image, plans[i]) for i in run])
+		# one verifier call for the fire boxes of every camera in the batch
+		kept, rejected = verify_fire_detections([items[i][0] for i in run], [items[i][1].image for i in run], batch)
+	inference_ms = (time.time() - t0) * 1000.0
+	inference_scheduler.record_inference(inference_ms, len(run))
+	for i, detections, frame_rejected in zip(run, kept, rejected):
+		device_id, packet = items[i]
+		results[i] = build_detection_result(device_id, packet, detections, inference_ms, len(run), frame_rejected)
+	return results
+
+def on_detection_result(channel, result):
+	"""Alerting: raise the fire status once a camera's fire track is confirmed (log only on the rising edge).
+	An unconfirmed candidate boosts the inference cadence so confirmation takes K quick inferences, not K intervals."""
+	if result.get('fire_candidate'):
+		inference_scheduler.boost('detection')
+	if not result.get('fire'):
+		return
+	if 'FIRE' not in (dashboard_state.get('fire_status') or ''):
+		add_log_entry(f"🚨 FIRE ALERT: Fire detected by camera model! ({channel.name})")
+	dashboard_state['fire_status'] = 'FIRE DETECTED!'
+
+def camera_channels():
+	return camera_manager.channels() if camera_manager is not None else []
+
+def model_fire_active():
+	"""True while the latest (recent) model result of any camera contains a fire detection."""
+	if not fire_model_enabled:
+		return False
+	for channel in camera_channels():
+		result = channel.detections.latest(max_age=detection_max_age())
+		if result and result.get('fire'):
+			return True
+	return False
+
+def detection_summary(channel=None):
+	"""Compact view of one camera's latest detection result (default camera if none given) for the status API."""
+	channel = channel or (camera_manager.default if camera_manager is not None else None)
+	result = channel.detections.latest(max_age=detection_max_age()) if channel is not None else None
+	if not result:
+		return {'active': False, 'fire': False, 'count': 0}
+	return {
+		'active': True,
+		'device_id': result['device_id'],
+		'fire': result['fire'],
+		'fire_candidate': result['fire_candidate'],
+		'count': len(result['detections']),
+		'tracks': [{'id': t['track_id'], 'label': t['label'], 'hits': t['hits'], 'confirmed': t['confirmed']} for t in result['tracks']],
+		'seq': result['seq'],
+		'labels': [d['label'] for d in result['detections']],
+		'inference_ms': result['inference_ms'],
+		'age_s': round(time.time() - result['timestamp'], 2),
+	}
+
+def detection_color(label):
+	"""BGR overlay color for a detection label."""
+	if 'person' in label.lower():
+		return (0,255,0)   # green for person
+	elif 'fire' in label.lower():
+		return (0,0,255)   # red for fire
+	return (0,140,255)     # orange for others
+
+def draw_stream_overlay(channel, packet, frame):
+	"""Burn the alert bar, detection zones and tracks into `frame` (a private copy of the ring frame)."""
+	draw_start = time.perf_counter()
+	# If dashboard_state says FIRE DETECTED, show top alert bar on stream
+	if stream_alert_active():
+		cv2.rectangle(frame, (0,0), (frame.shape[1], 40), (0,0,255), -1)
+		cv2.putText(frame, "ALERT: FIRE DETECTED", (10,28), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255,255,255), 2)
+
+	# Detection zones (thin outline) so operators see where the model is looking
+	roi = camera_roi_config(channel.device_id)
+	if roi.active and roi.mode == 'zones':
+		for zx, zy, zw, zh in roi.zone_rects(frame.shape[1], frame.shape[0]):
+			cv2.rectangle(frame, (zx, zy), (zx + zw, zy + zh), (200, 200, 200), 1)
+
+	# Draw the camera's tracks, extrapolated to this frame's capture time (inference never runs here)
+	tracks = tracker_for(channel.device_id).predict(packet.timestamp, max_age_s=TRACK_MAX_AGE) if fire_model_enabled else []
+	for track in tracks:
 		try:
-			frame_idx += 1
-			# Only run inference every N frames to reduce CPU usage
-			do_infer = (fire_model_enabled and fire_model_loaded and net_fire is not None and (frame_idx % inference_interval == 0))
-			if do_infer:
-				# run on smaller input to save CPU (blobFromImage will resize)
-				blob = cv2.dnn.blobFromImage(frame, 0.00392, (320, 320), (0,0,0), True, crop=False)
-				net_fire.setInput(blob)
-				try:
-					if fire_output_layers:
-						outs = net_fire.forward(fire_output_layers)
-					else:
-						outs = net_fire.forward()
-				except Exception:
-					try:
-						outs = net_fire.forward()
-					except Exception:
-						outs = []
-
-				if isinstance(outs, np.ndarray):
-					outs = [outs]
-				elif not isinstance(outs, (list, tuple)):
-					outs = []
-
-				height, width = frame.shape[:2]
-				boxes = []
-				confidences = []
-				class_ids = []
-				labels = []
-				colors = []
-
-				for out in outs:
-					for detection in out:
-						if detection.shape[0] <= 5:
-							continue
-						scores = detection[5:]
-						if scores.size == 0:
-							continue
-						class_id = int(np.argmax(scores))
-						class_score = float(scores[class_id])
-						try:
-							obj_conf = float(detection[4])
-						except Exception:
-							obj_conf = 1.0
-						combined = obj_conf * class_score
-						confidence = max(class_score, combined)
-						if confidence > fire_confidence_threshold:
-							cx = int(detection[0] * width)
-							cy = int(detection[1] * height)
-							w_box = int(detection[2] * width)
-							h_box = int(detection[3] * height)
-							x = int(cx - w_box / 2)
-							y = int(cy - h_box / 2)
-							boxes.append([x, y, w_box, h_box])
-							confidences.append(confidence)
-							class_ids.append(class_id)
-							# label and color mapping
-							label = fire_classes[class_id] if class_id < len(fire_classes) else f"ID:{class_id}"
-							labels.append(label)
-							if 'person' in label.lower():
-								colors.append((0,255,0))   # green for person
-							elif 'fire' in label.lower():
-								colors.append((0,0,255))   # red for fire
-								dashboard_state['fire_status'] = 'FIRE DETECTED!'
-							else:
-								colors.append((0,140,255)) # orange for others
-
-				# NMS and store final detections to redraw on skipped frames
-				last_boxes = []
-				last_class_ids = []
-				last_confidences = []
-				last_labels = []
-				last_colors = []
-				if boxes:
-					try:
-						idxs = cv2.dnn.NMSBoxes(boxes, confidences, fire_confidence_threshold, 0.4)
-					except Exception:
-						idxs = []
-					idx_list = idxs.flatten().tolist() if hasattr(idxs, 'flatten') and len(idxs) > 0 else (list(idxs) if isinstance(idxs, (list,tuple)) else [])
-					for i in idx_list:
-						try:
-							ii = int(i)
-							last_boxes.append(boxes[ii])
-							last_class_ids.append(class_ids[ii])
-							last_confidences.append(confidences[ii])
-							last_labels.append(labels[ii])
-							last_colors.append(colors[ii])
-						except Exception:
-							continue
-
-			# Re-draw last detections (fresh or from previous inference)
-			for i in range(len(last_boxes)):
-				try:
-					x, y, w_box, h_box = last_boxes[i]
-					label = last_labels[i] if i < len(last_labels) else (fire_classes[last_class_ids[i]] if last_class_ids and last_class_ids[i] < len(fire_classes) else f"ID:{last_class_ids[i] if last_class_ids else '?'}")
-					conf = last_confidences[i] if i < len(last_confidences) else 0.0
-					color = last_colors[i] if i < len(last_colors) else (0,140,255)
-					thickness = 4 if (('fire' in label.lower()) or ('person' not in label.lower() and 'fire' in label.lower())) else 2
-					cv2.rectangle(frame, (x, y), (x + w_box, y + h_box), color, thickness)
-					cv2.putText(frame, f"{label} {conf:.2f}", (x, max(10, y-6)), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
-				except Exception:
-					continue
+			x, y, w_box, h_box = track['box']
+			label = track['label']
+			color = detection_color(label)
+			# confirmed fire gets the heavy box; candidates waiting for confirmation stay thin
+			thickness = 4 if track['confirmed'] and 'fire' in label.lower() else 2
+			cv2.rectangle(frame, (x, y), (x + w_box, y + h_box), color, thickness)
+			cv2.putText(frame, f"#{track['track_id']} {label} {track['confidence']:.2f}", (x, max(10, y-6)), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
 		except Exception:
-			# Don't break streaming on any model error; log and continue
-			pass
+			continue
 
-		# Encode as JPEG (slightly lower quality for less bandwidth/latency)
-		encode_params = [int(cv2.IMWRITE_JPEG_QUALITY), jpeg_quality]
+	pipeline_metrics.observe('draw', (time.perf_counter() - draw_start) * 1000.0, channel.device_id)
+
+def encode_stream_jpeg(channel, frame, quality=None):
+	"""JPEG bytes of one stream frame, or None if encoding failed."""
+	# Encode as JPEG (slightly lower quality for less bandwidth/latency)
+	encode_params = [int(cv2.IMWRITE_JPEG_QUALITY), quality or jpeg_quality]
+	with pipeline_metrics.timer('imencode', channel.device_id):
 		ret2, jpeg = cv2.imencode('.jpg', frame, encode_params)
-		if not ret2:
-			# skip this frame if JPEG encoding failed
-			continue
-		frame_bytes = jpeg.tobytes()
-		yield (b'--frame\r\n'
-			   b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
-		# small sleep to avoid pegging CPU while allowing ~30fps
-		time.sleep(0.02)
+	if not ret2:
+		# skip this frame if JPEG encoding failed
+		return None
+	return jpeg.tobytes()
+
+def render_annotated_frame(channel, packet):
+	"""Ring frame with detections burned in, JPEG-encoded (the ?burn_in=1 hub, or every stream with STREAM_BURN_IN)."""
+	# ring frames are shared with other consumers (already mirrored by the worker): draw on a private copy
+	frame = packet.image.copy()
+	draw_stream_overlay(channel, packet, frame)
+	return encode_stream_jpeg(channel, frame)
+
+def render_stream_frame(channel, packet):
+	"""JPEG-encode one ring frame for the main stream. Called once per frame by the broadcast hub, shared by all
+	viewers. Frames go out clean (no copy, no drawing): the page draws the overlay from the detections channel."""
+	if STREAM_BURN_IN:
+		return render_annotated_frame(channel, packet)
+	if packet.jpeg is not None:
+		# MJPEG passthrough: the camera's own bytes, never decoded or re-encoded for the stream
+		pipeline_metrics.incr('jpeg_passthrough', channel.device_id)
+		return packet.jpeg
+	return encode_stream_jpeg(channel, packet.image)
+
+def render_stream_variant(channel, packet, rung, annotated=False):
+	"""A lower ladder rung of one frame: scaled down and re-encoded at the rung's JPEG quality, once per frame for
+	all viewers on that rung."""
+	frame = packet.image
+	if annotated or STREAM_BURN_IN:
+		frame = frame.copy()
+		draw_stream_overlay(channel, packet, frame)
+	size = (max(1, int(frame.shape[1] * rung.scale)), max(1, int(frame.shape[0] * rung.scale)))
+	with pipeline_metrics.timer('variant_resize', channel.device_id):
+		small = cv2.resize(frame, size, interpolation=cv2.INTER_AREA) if rung.scale != 1.0 else frame
+		if packet.jpeg is not None and channel.capture.mirror and not annotated:
+			# the full rung forwards the camera's unmirrored bytes (the page mirrors them): match its orientation
+			small = cv2.flip(small, 1)
+	return encode_stream_jpeg(channel, small, rung.quality)
+
+def stream_alert_active():
+	return 'FIRE' in (dashboard_state.get('fire_status') or '')
+
+def stream_overlay_state(channel):
+	"""Everything the page needs to draw one camera's overlay: the latest detection result's frame seq and boxes,
+	the tracks extrapolated to now (plus velocity in px/s so the page can keep them moving), zones and the alert."""
+	now = time.time()
+	result = channel.detections.latest(max_age=detection_max_age()) if fire_model_enabled else None
+	latest = channel.ring.latest()
+	frame_size = result['frame_size'] if result else (list(latest.size) if latest and latest.size else None)
+	tracks = tracker_for(channel.device_id).predict(now, max_age_s=TRACK_MAX_AGE) if fire_model_enabled else []
+	roi = camera_roi_config(channel.device_id)
+	return {
+		'device_id': channel.device_id,
+		'seq': result['seq'] if result else None,
+		'timestamp': result['timestamp'] if result else None,
+		'time': now,
+		'frame_size': frame_size,
+		'alert': stream_alert_active(),
+		'detections': [{'box': [int(v) for v in d['box']], 'class_id': d['class_id'], 'label': d['label'],
+						'confidence': round(float(d['confidence']), 3)} for d in (result['detections'] if result else [])],
+		'tracks': [{'track_id': t['track_id'], 'box': t['box'], 'label': t['label'],
+					'confidence': round(float(t['confidence']), 3), 'confirmed': t['confirmed'],
+					'velocity': [round(v, 1) for v in t['velocity']]} for t in tracks],
+		'zones': roi.zones if roi.active and roi.mode == 'zones' else [],
+		'max_predict_s': tracker_for(channel.device_id).max_predict_s,
+		'burned_in': STREAM_BURN_IN,
+		# passthrough streams carry the camera's unmirrored bytes: the page mirrors the <img> instead
+		'stream_mirrored': bool(latest is not None and latest.jpeg is not None and channel.capture.mirror),
+	}
+
+def generate_overlay_events(channel):
+	"""Server-sent events for one viewer: the overlay state after every new detection result, and at least every
+	OVERLAY_KEEPALIVE_S so alert changes and expiring tracks reach the page without a new result."""
+	version = -1
+	while True:
+		version = channel.detections.wait_newer(version, timeout=OVERLAY_KEEPALIVE_S)
+		yield f"data: {json.dumps(stream_overlay_state(channel))}\n\n"
+
+def start_cameras():
+	"""Build one CameraChannel per configured device plus a single shared detection worker, and start them (idempotent).
+	The worker serves the cameras round-robin, so one model instance handles every device."""
+	global camera_manager, camera_roi
+	if camera_manager is None:
+		devices = load_camera_devices()
+		defaults = {d['DeviceID']: d['Roi'] for d in devices if d.get('Roi')}
+		try:
+			camera_roi = RoiStore(ROI_FILE, defaults)
+		except Exception as e:
+			print(f"⚠️ Could not read detection zones {ROI_FILE}: {e}")
+			camera_roi = RoiStore(None, defaults)
+		detector = DetectionWorker(detect_fire_packet, interval=inference_scheduler.interval, name='fire',
+			detect_batch=detect_fire_batch, max_batch=inference_max_batch, max_wait=inference_max_wait_ms / 1000.0,
+			metrics=pipeline_metrics, on_error=add_log_entry)
+		manager = CameraManager(detector)
+		for device in devices:
+			source = device.get('Source', 0)
+			channel = CameraChannel(
+				device['DeviceID'],
+				lambda device=device: open_device_capture(device),
+				render_stream_frame,
+				idle_render=render_camera_off_jpeg,
+				annotated_render=render_annotated_frame,
+				info=device,
+				# mirror local webcams once here so every consumer sees the orientation the UI expects
+				mirror=device.get('Mirror', isinstance(source, int)),
+				metrics=pipeline_metrics,
+				passthrough=passthrough_enabled(device),
+				ladder=STREAM_LADDER if STREAM_ADAPTIVE else None,
+				render_variant=render_stream_variant,
+				on_error=add_log_entry,
+			)
+			channel.detections.add_listener(lambda result, channel=channel: on_detection_result(channel, result))
+			manager.add(channel)
+		camera_manager = manager
+	camera_manager.set_enabled(camera_enabled)
+	camera_manager.start()
+	return camera_manager
+
+def generate_mjpeg(channel, burn_in=False, quality=None):
+	"""Generator that yields MJPEG frames for one client. Frames are pre-encoded by the camera's broadcast hub
+	(the clean one, or the burned-in one for burn_in requests); `quality` pins a ladder rung by name."""
+	hub = channel.annotated if burn_in and not STREAM_BURN_IN and channel.annotated is not None else channel.broadcaster
+	yield from hub.stream(hub.subscribe(hub.rung_index(quality) if quality else None))
+
+def wants_burn_in():
+	return request.args.get('burn_in', '0') == '1'
+
+def requested_quality():
+	"""Rung name from ?quality= ('auto' or unknown names adapt)."""
+	quality = request.args.get('quality', 'auto')
+	return quality if quality != 'auto' else None
 
 # New route: MJPEG stream of webcam (session-protected)
 @app.route('/video_feed')
 def video_feed():
     if not session.get('user'):
         return jsonify({'error':'Authentication required'}), 401
-    return Response(stream_with_context(generate_mjpeg()), mimetype='multipart/x-mixed-replace; boundary=frame')
+    channel = camera_manager.default if camera_manager is not None else None
+    if channel is None:
+        return jsonify({'error':'No camera configured'}), 404
+    return Response(stream_with_context(generate_mjpeg(channel, wants_burn_in(), requested_quality())), mimetype='multipart/x-mixed-replace; boundary=frame')
+
+# MJPEG stream of one camera by Devices.DeviceID
+@app.route('/video_feed/<int:device_id>')
+def video_feed_device(device_id):
+    if not session.get('user'):
+        return jsonify({'error':'Authentication required'}), 401
+    channel = camera_manager.get(device_id) if camera_manager is not None else None
+    if channel is None:
+        return jsonify({'error':f'Unknown camera {device_id}'}), 404
+    return Response(stream_with_context(generate_mjpeg(channel, wants_burn_in(), requested_quality())), mimetype='multipart/x-mixed-replace; boundary=frame')
+
+def overlay_channel(device_id):
+	"""Camera for the overlay routes (the default camera, like /video_feed, when no id is given)."""
+	if camera_manager is None:
+		return None
+	return camera_manager.default if device_id is None else camera_manager.get(device_id)
+
+# Detections side-channel for the client-side overlay: latest state as JSON, or a server-sent event stream
+@app.route('/api/detections')
+@app.route('/api/detections/<int:device_id>')
+def api_detections(device_id=None):
+    if not session.get('user'):
+        return jsonify({'error':'Authentication required'}), 401
+    channel = overlay_channel(device_id)
+    if channel is None:
+        return jsonify({'error':f'Unknown camera {device_id}'}), 404
+    return jsonify(stream_overlay_state(channel))
+
+@app.route('/api/detections/stream')
+@app.route('/api/detections/<int:device_id>/stream')
+def api_detections_stream(device_id=None):
+    if not session.get('user'):
+        return jsonify({'error':'Authentication required'}), 401
+    channel = overlay_channel(device_id)
+    if channel is None:
+        return jsonify({'error':f'Unknown camera {device_id}'}), 404
+    return Response(stream_with_context(generate_overlay_events(channel)), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+# API to list cameras with capture/stream/detection state
+@app.route('/api/cameras')
+def api_cameras():
+    if not session.get('user'):
+        return jsonify({'error':'Authentication required'}), 401
+    detector_stats = camera_manager.detector.source_stats() if camera_manager is not None else {}
+    cameras = []
+    for channel in camera_channels():
+        info = channel.status()
+        info['stream_url'] = f"/video_feed/{channel.device_id}"
+        info['burned_in_stream_url'] = f"/video_feed/{channel.device_id}?burn_in=1"
+        info['detections_url'] = f"/api/detections/{channel.device_id}/stream"
+        info['stream'] = channel.broadcaster.stats()
+        info['detections'] = detection_summary(channel)
+        info['inference'] = detector_stats.get(channel.device_id, {})
+        info['motion_gate'] = motion_gate.stats(channel.device_id)
+        info['flame_filter'] = flame_filter.stats(channel.device_id, inference_scheduler.status()['per_frame_ms'])
+        info['roi'] = camera_roi_config(channel.device_id).to_dict()
+        cameras.append(info)
+    detector = camera_manager.detector.stats() if camera_manager is not None else {}
+    default = camera_manager.default if camera_manager is not None else None
+    return jsonify({'cameras': cameras, 'camera_enabled': camera_enabled, 'detector': detector,
+                    'default_device_id': default.device_id if default is not None else None})
+
+# API: one camera's detection zones / tiling (POST merges the given fields: mode, zones, tile_size, overlap, full_frame)
+@app.route('/api/cameras/<int:device_id>/roi', methods=['GET', 'POST'])
+def api_camera_roi(device_id):
+    if not session.get('user'):
+        return jsonify({'error':'Authentication required'}), 401
+    if camera_manager is None or camera_manager.get(device_id) is None:
+        return jsonify({'error':f'Unknown camera {device_id}'}), 404
+    config = camera_roi_config(device_id)
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        try:
+            config = camera_roi.set(device_id, RoiConfig.from_dict(dict(config.to_dict(), **data)))
+        except (TypeError, ValueError) as e:
+            return jsonify({'error': str(e)}), 400
+        add_log_entry(f"Camera {device_id}: ROI mode {config.mode} ({len(config.zones)} zone(s))")
+    return jsonify({'success': True, 'device_id': device_id, 'roi': config.to_dict(), 'modes': list(ROI_MODES)})
+
+# API: per-stage latency percentiles and per-camera frame/drop counters (POST resets the window)
+@app.route('/api/pipeline_metrics', methods=['GET', 'POST'])
+def api_pipeline_metrics():
+    if not session.get('user'):
+        return jsonify({'error':'Authentication required'}), 401
+    if request.method == 'POST':
+        pipeline_metrics.reset()
+        motion_gate.reset()
+        flame_filter.reset()
+    data = pipeline_metrics.snapshot()
+    data['config'] = {
+        'inference_interval': inference_scheduler.interval(),
+        'jpeg_quality': jpeg_quality,
+        'fire_input_size': list(inference_scheduler.input_size()),
+        'max_batch': inference_max_batch,
+        'batch_wait_ms': inference_max_wait_ms,
+        'inference_processes': inference_processes,
+        'inference_instances': inference_instances,
+        'stream_ladder': [rung._asdict() for rung in STREAM_LADDER] if STREAM_ADAPTIVE else None,
+    }
+    data['detector'] = camera_manager.detector.stats() if camera_manager is not None else {}
+    data['motion_gate'] = motion_gate.stats()
+    data['flame_filter'] = flame_filter.stats(per_frame_ms=inference_scheduler.status()['per_frame_ms'])
+    data['verifier'] = fire_verifier.stats() if fire_verifier is not None else None
+    data['inference_pool'] = inference_pool.stats() if isinstance(inference_pool, InferenceThreadPool) else None
+    data['viewers'] = {str(ch.device_id): ch.broadcaster.subscriber_count for ch in camera_channels()}
+    data['streams'] = {str(ch.device_id): ch.broadcaster.stats() for ch in camera_channels()}
+    return jsonify(data)
 
 # API to toggle fire overlay on the video feed
 @app.route('/api/toggle_fire_model', methods=['POST'])
 def api_toggle_fire_model():
     if not session.get('user'):
         return jsonify({'error':'Authentication required'}), 401
-    global fire_model_enabled, fire_model_loaded
+    global fire_model_enabled
     fire_model_enabled = not fire_model_enabled
     message = ''
     if fire_model_enabled:
-        # Try to load model if not already loaded
+        # Load in the background if the startup load hasn't produced a model (never block the request)
         if not fire_model_loaded:
-            ok = load_fire_model()
-            if ok:
-                message = 'Fire overlay enabled (model loaded)'
+            if fire_model_startup['state'] == 'loading':
+                message = 'Fire overlay enabled (model still loading)'
+            elif start_fire_model_loader() or start_fire_model_reload():
+                message = 'Fire overlay enabled (model loading in background)'
             else:
-                message = 'Fire overlay requested but model failed to load'
-                # Keep flag true to allow retry later, but mark not loaded
-                fire_model_loaded = False
+                message = 'Fire overlay requested but model is not loaded yet'
         else:
             message = 'Fire overlay enabled'
     else:
         message = 'Fire overlay disabled'
+        # stale tracks must not come back (or count towards confirmation) when the model is re-enabled
+        for tracker in camera_trackers.values():
+            tracker.clear()
     add_log_entry(f"UI: {message}")
     return jsonify({'success': True, 'fire_model_enabled': fire_model_enabled, 'message': message, 'model_loaded': fire_model_loaded})
 
+# API: hot-reload the fire model (POST starts a background load + swap, GET reports the last reload)
+@app.route('/api/reload_fire_model', methods=['GET', 'POST'])
+def api_reload_fire_model():
+    if not session.get('user'):
+        return jsonify({'error':'Authentication required'}), 401
+    status = {'version': fire_model_version, 'reload': dict(fire_model_reload),
+              'probation': {k: v for k, v in fire_model_probation.items() if k != 'previous'} if fire_model_probation else None,
+              'watcher': fire_model_watcher.status() if fire_model_watcher is not None else None}
+    if request.method == 'GET':
+        return jsonify(status)
+    data = request.get_json(silent=True) or {}
+    model_dir = data.get('model_dir')
+    if model_dir and not os.path.isdir(model_dir):
+        return jsonify({'success': False, 'error': f"not a directory: {model_dir}"}), 400
+    started = start_fire_model_reload([model_dir] if model_dir else None)
+    if started:
+        add_log_entry("UI: fire model reload requested")
+    status['reload'] = dict(fire_model_reload)
+    return jsonify(dict(status, success=started, message='reload started' if started else 'a reload is already running')), 202 if started else 409
+
 # API to get current fire-model status
 @app.route('/api/fire_model_status')
 def api_fire_model_status():
     if not session.get('user'):
         return jsonify({'error':'Authentication required'}), 401
-    return jsonify({'fire_model_enabled': fire_model_enabled})
+    return jsonify({
+        'fire_model_enabled': fire_model_enabled,
+        'readiness': fire_model_readiness(),
+        'inference_interval': inference_scheduler.interval(),
+        'scheduler': inference_scheduler.status(),
+    })
 
 # API to toggle camera feed on/off
 @app.route('/api/toggle_camera_feed', methods=['POST'])
 def api_toggle_camera_feed():
-	"""Toggle camera feed on/off. When enabling, open capture immediately for fast availability."""
+	"""Toggle all camera feeds on/off. Capture workers open/release the devices; we only wait for the default camera's first frame."""
 	if not session.get('user'):
 		return jsonify({'error':'Authentication required'}), 401
-	global camera_enabled, video_capture
+	global camera_enabled
 	camera_enabled = not camera_enabled
 
 	stream_ready = False
-	if camera_enabled:
-		# Attempt to initialize/open the capture immediately so stream becomes available
-		with video_lock:
-			try:
-				# Release any stale capture first
-				if video_capture is not None:
-					try:
-						video_capture.release()
-					except:
-						pass
-					video_capture = None
-
-				# Use the robust opener that tries multiple backends and warms up the camera
-				video_capture = open_capture_with_backends(0, warmup_reads=3)
-				# if capture opened, ensure properties
-				if video_capture is not None and video_capture.isOpened():
-					try:
-						video_capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)
-						video_capture.set(cv2.CAP_PROP_FPS, 30)
-						video_capture.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-						video_capture.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-					except:
-						pass
-					# quick prime read
-					try:
-						ret, _ = video_capture.read()
-						if ret:
-							stream_ready = True
-					except:
-						stream_ready = bool(video_capture.isOpened())
-				else:
-					stream_ready = False
-			except Exception:
-				stream_ready = False
+	start_cameras()
+	if camera_enabled and camera_manager.default is not None:
+		# capture workers reopen the devices on their own threads; wait briefly for the first frame
+		ring = camera_manager.default.ring
+		stream_ready = ring.wait_newer(ring.last_seq, timeout=3.0) is not None
 	else:
-		# disable: release capture immediately
-		with video_lock:
-			try:
-				if video_capture is not None:
-					video_capture.release()
-			except:
-				pass
-			video_capture = None
+		# disable: worker releases the device on its next loop iteration
 		stream_ready = False
 
 	message = 'Camera feed enabled' if camera_enabled else 'Camera feed disabled'
@@ -875,6 +1783,41 @@ HTML_TEMPLATE = """
       box-shadow: 0 6px 18px rgba(255,0,0,0.25);
       background: linear-gradient(90deg,#ff6b6b,#ff8a00);
     }
+    .overlay-canvas {
+      position: absolute;
+      top: 0;
+      left: 0;
+      width: 100%;
+      height: 100%;
+      z-index: 10;
+      pointer-events: none;
+    }
+    .zone-canvas {
+      position: absolute;
+      top: 0;
+      left: 0;
+      width: 100%;
+      height: 100%;
+      z-index: 15;
+      cursor: crosshair;
+      display: none;
+    }
+    .zone-toolbar {
+      position: absolute;
+      left: 12px;
+      bottom: 12px;
+      z-index: 20;
+      display: none;
+      gap: 8px;
+      align-items: center;
+    }
+    .zone-toolbar select {
+      background: rgba(0,0,0,0.6);
+      color: #fff;
+      border: 1px solid rgba(255,255,255,0.2);
+      border-radius: 12px;
+      padding: 6px 8px;
+    }
     .video-topbar {
       position: absolute;
       left: 12px;
@@ -1064,6 +2007,30 @@ HTML_TEMPLATE = """
       display: block;
     }
     
+    .metrics-table {
+      width: 100%;
+      border-collapse: collapse;
+      font-family: 'Consolas', 'Monaco', monospace;
+      font-size: 0.85rem;
+      margin-bottom: 15px;
+    }
+    
+    .metrics-table th, .metrics-table td {
+      padding: 6px 10px;
+      text-align: right;
+      border-bottom: 1px solid rgba(0,0,0,0.05);
+    }
+    
+    .metrics-table th:first-child, .metrics-table td:first-child {
+      text-align: left;
+    }
+    
+    .metrics-counters {
+      font-family: 'Consolas', 'Monaco', monospace;
+      font-size: 0.85rem;
+      color: #4a5568;
+    }
+    
     .device-status-list {
       list-style: none;
       padding: 0;
@@ -1217,8 +2184,22 @@ HTML_TEMPLATE = """
               <div class="video-badge" id="streamStatus">Scanning for fire...</div>
             </div>
             <img id="cameraStream" class="stream" src="/video_feed" alt="Live camera stream">
+            <!-- Detections drawn client-side from /api/detections/stream (the stream itself is clean) -->
+            <canvas id="overlayCanvas" class="overlay-canvas"></canvas>
+            <!-- Detection zone editor: drag on the stream to add a zone -->
+            <canvas id="zoneCanvas" class="zone-canvas"></canvas>
+            <div class="zone-toolbar" id="zoneToolbar">
+              <select id="zoneMode">
+                <option value="off">ROI off</option>
+                <option value="zones">Zones only</option>
+                <option value="tiles">Tile frame</option>
+              </select>
+              <button class="video-control-btn" onclick="clearZones()">Clear</button>
+              <button class="video-control-btn" onclick="saveZones()">Save</button>
+            </div>
             <div class="video-controls">
               <!-- Removed Toggle Fire button and Minimize button per request -->
+              <button class="video-control-btn" id="zonesBtn" onclick="toggleZoneEditor()">Zones</button>
               <button class="video-control-btn" id="fullscreenBtn" onclick="toggleFullscreen()">Fullscreen</button>
             </div>
           </div>
@@ -1359,6 +2340,30 @@ HTML_TEMPLATE = """
           </div>
         </div>
       </div>
+      
+      <!-- Pipeline Metrics -->
+      <div class="card" style="grid-column: span 2;">
+        <div class="card-header">
+          <div class="card-icon">⏱️</div>
+          <h2 class="card-title">Pipeline Metrics</h2>
+        </div>
+        <div class="card-content">
+          <table class="metrics-table">
+            <thead>
+              <tr><th>Stage</th><th>p50 ms</th><th>p95 ms</th><th>p99 ms</th><th>count</th></tr>
+            </thead>
+            <tbody id="metricsStages">
+              <tr><td colspan="5">Waiting for data...</td></tr>
+            </tbody>
+          </table>
+          <div class="metrics-counters" id="metricsCounters"></div>
+          <div class="button-group" style="margin-top: 15px;">
+            <button class="action-button" onclick="resetPipelineMetrics()">
+              <span>Reset Metrics</span>
+            </button>
+          </div>
+        </div>
+      </div>
     </main>
     
     <footer>
@@ -1404,7 +2409,12 @@ HTML_TEMPLATE = """
           if (data) {
             document.getElementById('currentTemp').textContent = data.temperature + '°C';
             document.getElementById('fireStatus').textContent = data.fire_status;
-            
+            if (data.fire_model) {
+              const labels = { loading: 'Loading model...', failed: 'Model failed', not_found: 'No model' };
+              document.getElementById('edgeStatus').textContent =
+                data.fire_model.ready ? data.system_status.edge : (labels[data.fire_model.state] || data.system_status.edge);
+            }
+
             // Update temperature color
             const tempElement = document.getElementById('currentTemp');
             if (data.temperature > data.threshold) {
@@ -1421,6 +2431,42 @@ HTML_TEMPLATE = """
         });
     }
 
+    // Pipeline metrics panel
+    function renderPipelineMetrics(data) {
+      if (!data || !data.stages) return;
+      const rows = Object.entries(data.stages).map(([stage, s]) =>
+        '<tr><td>' + stage + '</td><td>' + (s.p50_ms ?? '-') + '</td><td>' + (s.p95_ms ?? '-') +
+        '</td><td>' + (s.p99_ms ?? '-') + '</td><td>' + s.count + '</td></tr>');
+      document.getElementById('metricsStages').innerHTML = rows.join('') || '<tr><td colspan="5">No samples yet</td></tr>';
+      const counters = Object.entries(data.counters).map(([name, value]) => name + ': ' + value);
+      const rates = Object.entries(data.rates || {}).map(([name, value]) => name + ': ' + value);
+      let config = 'interval=' + data.config.inference_interval + ', jpeg_quality=' + data.config.jpeg_quality;
+      if (data.motion_gate && data.motion_gate.enabled) {
+        config += ', motion skip ratio=' + data.motion_gate.skip_ratio;
+      }
+      if (data.flame_filter && data.flame_filter.enabled) {
+        config += ', flame filter skip ratio=' + data.flame_filter.skip_ratio;
+        if (data.flame_filter.saved_ms !== undefined) config += ' (~' + Math.round(data.flame_filter.saved_ms / 1000) + ' s inference saved)';
+      }
+      if (data.verifier) {
+        config += ', verifier confirmed/rejected=' + data.verifier.confirmed + '/' + data.verifier.rejected;
+      }
+      Object.entries(data.streams || {}).forEach(([device, stream]) => {
+        if (!stream.rungs) return;
+        const used = stream.rungs.filter(r => r.viewers).map(r => r.name + ' x' + r.viewers + (r.kbps ? ' @' + r.kbps + ' kbps' : ''));
+        if (used.length) config += ', cam ' + device + ' stream: ' + used.join(' / ');
+      });
+      document.getElementById('metricsCounters').textContent = [config].concat(rates, counters).join(' | ');
+    }
+
+    function updatePipelineMetrics() {
+      makeRequest('/api/pipeline_metrics').then(renderPipelineMetrics);
+    }
+
+    function resetPipelineMetrics() {
+      makeRequest('/api/pipeline_metrics', 'POST').then(renderPipelineMetrics);
+    }
+
     // Interactive functions
     function toggleRecording() {
       makeRequest('/api/toggle_recording', 'POST')
@@ -1654,6 +2700,192 @@ HTML_TEMPLATE = """
       }
     }
 
+    // Detection zone editor (zones are stored normalised to the camera frame: [x, y, w, h] in 0..1)
+    let zoneEditor = null;
+
+    function streamGeometry() {
+      // the stream uses object-fit: cover, so map through the displayed (cropped) image rectangle
+      const img = document.getElementById('cameraStream');
+      const box = img.getBoundingClientRect();
+      const nw = img.naturalWidth || box.width, nh = img.naturalHeight || box.height;
+      const scale = Math.max(box.width / nw, box.height / nh);
+      return { box, nw, nh, scale, ox: (box.width - nw * scale) / 2, oy: (box.height - nh * scale) / 2 };
+    }
+
+    function toFrame(evt) {
+      const g = streamGeometry();
+      const x = (evt.clientX - g.box.left - g.ox) / (g.nw * g.scale);
+      const y = (evt.clientY - g.box.top - g.oy) / (g.nh * g.scale);
+      return { x: Math.min(1, Math.max(0, x)), y: Math.min(1, Math.max(0, y)) };
+    }
+
+    function drawZones() {
+      const canvas = document.getElementById('zoneCanvas');
+      const g = streamGeometry();
+      canvas.width = g.box.width;
+      canvas.height = g.box.height;
+      const ctx = canvas.getContext('2d');
+      ctx.clearRect(0, 0, canvas.width, canvas.height);
+      const zones = zoneEditor.zones.concat(zoneEditor.drag ? [zoneEditor.drag] : []);
+      zones.forEach(z => {
+        const px = g.ox + z[0] * g.nw * g.scale, py = g.oy + z[1] * g.nh * g.scale;
+        const pw = z[2] * g.nw * g.scale, ph = z[3] * g.nh * g.scale;
+        ctx.fillStyle = 'rgba(108,124,255,0.18)';
+        ctx.fillRect(px, py, pw, ph);
+        ctx.strokeStyle = '#8fafff';
+        ctx.lineWidth = 2;
+        ctx.strokeRect(px, py, pw, ph);
+      });
+    }
+
+    async function toggleZoneEditor() {
+      const canvas = document.getElementById('zoneCanvas');
+      const toolbar = document.getElementById('zoneToolbar');
+      const btn = document.getElementById('zonesBtn');
+      if (zoneEditor) {
+        zoneEditor = null;
+        canvas.style.display = 'none';
+        toolbar.style.display = 'none';
+        btn.classList.remove('active');
+        return;
+      }
+      try {
+        const cams = await (await fetch('/api/cameras')).json();
+        const deviceId = cams.default_device_id;
+        if (deviceId === null || deviceId === undefined) return;
+        const data = await (await fetch(`/api/cameras/${deviceId}/roi`)).json();
+        zoneEditor = { deviceId, zones: data.roi.zones || [], drag: null, start: null };
+        document.getElementById('zoneMode').value = data.roi.mode;
+        canvas.style.display = 'block';
+        toolbar.style.display = 'flex';
+        btn.classList.add('active');
+        drawZones();
+      } catch (err) {
+        console.error('Zone editor failed:', err);
+      }
+    }
+
+    function clearZones() {
+      if (!zoneEditor) return;
+      zoneEditor.zones = [];
+      drawZones();
+    }
+
+    async function saveZones() {
+      if (!zoneEditor) return;
+      let mode = document.getElementById('zoneMode').value;
+      if (mode === 'off' && zoneEditor.zones.length) mode = 'zones';
+      try {
+        const res = await fetch(`/api/cameras/${zoneEditor.deviceId}/roi`, {
+          method: 'POST',
+          headers: { 'Content-Type': 'application/json' },
+          body: JSON.stringify({ mode, zones: zoneEditor.zones })
+        });
+        const data = await res.json();
+        if (!res.ok) { alert(data.error || 'Saving zones failed'); return; }
+        toggleZoneEditor();
+      } catch (err) {
+        console.error('Saving zones failed:', err);
+      }
+    }
+
+    window.addEventListener('load', () => {
+      const canvas = document.getElementById('zoneCanvas');
+      canvas.addEventListener('mousedown', evt => {
+        if (zoneEditor) zoneEditor.start = toFrame(evt);
+      });
+      canvas.addEventListener('mousemove', evt => {
+        if (!zoneEditor || !zoneEditor.start) return;
+        const p = toFrame(evt), s = zoneEditor.start;
+        zoneEditor.drag = [Math.min(s.x, p.x), Math.min(s.y, p.y), Math.abs(p.x - s.x), Math.abs(p.y - s.y)];
+        drawZones();
+      });
+      canvas.addEventListener('mouseup', () => {
+        if (!zoneEditor) return;
+        const z = zoneEditor.drag;
+        if (z && z[2] > 0.01 && z[3] > 0.01) zoneEditor.zones.push(z.map(v => Math.round(v * 10000) / 10000));
+        zoneEditor.drag = null;
+        zoneEditor.start = null;
+        drawZones();
+      });
+    });
+
+    // Detection overlay: boxes, tracks and the alert bar arrive over server-sent events and are drawn on a
+    // canvas over the clean stream; tracks keep moving with their velocity until the next update
+    const overlay = { state: null, received: 0, source: null, frame: null };
+
+    function overlayColor(label) {
+      const l = (label || '').toLowerCase();
+      if (l.includes('person')) return '#00ff00';
+      if (l.includes('fire')) return '#ff0000';
+      return '#ff8c00';
+    }
+
+    function drawOverlay() {
+      overlay.frame = null;
+      const canvas = document.getElementById('overlayCanvas');
+      const g = streamGeometry();
+      canvas.width = g.box.width;
+      canvas.height = g.box.height;
+      const ctx = canvas.getContext('2d');
+      ctx.clearRect(0, 0, canvas.width, canvas.height);
+      const s = overlay.state;
+      if (!s || s.burned_in) return;
+      if (s.alert) {
+        ctx.fillStyle = '#ff0000';
+        ctx.fillRect(0, 0, canvas.width, 40);
+        ctx.fillStyle = '#ffffff';
+        ctx.font = 'bold 18px sans-serif';
+        ctx.fillText('ALERT: FIRE DETECTED', 10, 27);
+      }
+      if (!s.frame_size) return;
+      const fx = g.nw * g.scale / s.frame_size[0], fy = g.nh * g.scale / s.frame_size[1];
+      ctx.strokeStyle = '#c8c8c8';
+      ctx.lineWidth = 1;
+      s.zones.forEach(z => {
+        ctx.strokeRect(g.ox + z[0] * g.nw * g.scale, g.oy + z[1] * g.nh * g.scale, z[2] * g.nw * g.scale, z[3] * g.nh * g.scale);
+      });
+      const dt = Math.min(s.max_predict_s, (performance.now() - overlay.received) / 1000);
+      let moving = false;
+      ctx.font = 'bold 14px sans-serif';
+      s.tracks.forEach(t => {
+        const [x, y, w, h] = t.box;
+        const color = overlayColor(t.label);
+        const px = g.ox + (x + t.velocity[0] * dt) * fx, py = g.oy + (y + t.velocity[1] * dt) * fy;
+        moving = moving || t.velocity[0] !== 0 || t.velocity[1] !== 0;
+        ctx.strokeStyle = color;
+        ctx.fillStyle = color;
+        // confirmed fire gets the heavy box; candidates waiting for confirmation stay thin
+        ctx.lineWidth = t.confirmed && t.label.toLowerCase().includes('fire') ? 4 : 2;
+        ctx.strokeRect(px, py, w * fx, h * fy);
+        ctx.fillText(`#${t.track_id} ${t.label} ${t.confidence.toFixed(2)}`, px, Math.max(12, py - 6));
+      });
+      if (moving && dt < s.max_predict_s) overlay.frame = requestAnimationFrame(drawOverlay);
+    }
+
+    function scheduleOverlay() {
+      if (overlay.frame === null) overlay.frame = requestAnimationFrame(drawOverlay);
+    }
+
+    function connectOverlay() {
+      if (overlay.source) overlay.source.close();
+      // same camera as /video_feed (the default one); EventSource reconnects by itself
+      overlay.source = new EventSource('/api/detections/stream');
+      overlay.source.onmessage = evt => {
+        overlay.state = JSON.parse(evt.data);
+        overlay.received = performance.now();
+        document.getElementById('cameraStream').style.transform = overlay.state.stream_mirrored ? 'scaleX(-1)' : '';
+        scheduleOverlay();
+      };
+    }
+
+    window.addEventListener('load', () => {
+      connectOverlay();
+      document.getElementById('cameraStream').addEventListener('load', scheduleOverlay);
+      window.addEventListener('resize', scheduleOverlay);
+      document.addEventListener('fullscreenchange', scheduleOverlay);
+    });
+
     // NEW: Toggle camera feed
     async function toggleCameraFeed() {
       try {
@@ -1701,6 +2933,7 @@ HTML_TEMPLATE = """
       
       // Update dashboard every 3 seconds
       setInterval(updateDashboard, 3000);
+      setInterval(updatePipelineMetrics, 3000);
     }
 
     // Start the dashboard when page loads
@@ -1937,6 +3170,11 @@ def simulate_temperature_variation():
     if dashboard_state['current_temperature'] > dashboard_state['threshold']:
         dashboard_state['fire_status'] = 'FIRE DETECTED!'
         add_log_entry('🚨 FIRE ALERT: High temperature detected!')
+        # thermal alert: look at every frame until it clears
+        inference_scheduler.boost('thermal')
+    elif model_fire_active():
+        # camera model still sees fire: keep the alert raised by on_detection_result
+        dashboard_state['fire_status'] = 'FIRE DETECTED!'
     else:
         dashboard_state['fire_status'] = 'No fire detected'
 
@@ -1956,18 +3194,20 @@ def background_temperature_monitor():
         simulate_temperature_variation()
         time.sleep(3)  # Update every 3 seconds
 
-# Start background monitoring
-temperature_thread = threading.Thread(target=background_temperature_monitor, daemon=True)
-temperature_thread.start()
+# Background services run only in the serving process (see background_services_allowed)
+if background_services_allowed():
+    # Start background monitoring
+    temperature_thread = threading.Thread(target=background_temperature_monitor, daemon=True)
+    temperature_thread.start()
+
+    # Start the camera capture workers and headless detection (one process owns the devices)
+    start_cameras()
+    atexit.register(stop_background_services)
 
-# --- ADDED: safe startup attempt to load model (after logging and background thread exist) ---
-try:
-    loaded = load_fire_model()
-    if loaded:
-        fire_model_enabled = True
-except Exception:
-    # don't fail startup if model can't be loaded
-    pass
+    # Model discovery + load + warm-up in the background: requests are served while it runs
+    start_fire_model_loader()
+    if FIRE_MODEL_WATCH:
+        start_model_watcher()
 
 def dashboard():
     """Main dashboard page"""
@@ -2007,6 +3247,9 @@ def get_status():
         'threshold': dashboard_state['threshold'],
         'fire_status': dashboard_state['fire_status'],
         'system_status': dashboard_state['system_status'],
+        'detections': detection_summary(),
+        'cameras': {str(ch.device_id): detection_summary(ch) for ch in camera_channels()},
+        'fire_model': fire_model_readiness(),
         'timestamp': datetime.now().isoformat()
     })
 
@@ -2218,7 +3461,7 @@ def history():
 def api_fire_model_info():
     if not session.get('user'):
         return jsonify({'error': 'Authentication required'}), 401
-    files = find_fire_model_files()
+    files = fire_model_files or fire_model_discovered
     return jsonify({
         'found': bool(files),
         'cfg': files.get('cfg') if files else None,
@@ -2226,7 +3469,26 @@ def api_fire_model_info():
         'names': files.get('names') if files else None,
         'classes': len(fire_classes) if fire_classes else 0,
         'model_loaded': fire_model_loaded,
-        'fire_model_enabled': fire_model_enabled
+        'fire_model_enabled': fire_model_enabled,
+        'model_version': fire_model_version,
+        'reload': dict(fire_model_reload),
+        'backend': fire_backend.describe() if fire_backend is not None else None,
+        'backend_setting': FIRE_BACKEND,
+        'precision_setting': FIRE_PRECISION,
+        'backend_benchmark': fire_backend_report,
+        'available_backends': available_backends(),
+        'onnx': fire_model_files.get('onnx'),
+        'onnx_int8': fire_model_files.get('onnx_int8'),
+        'input_size': list(fire_input_size),
+        'detection_threshold': detection_threshold(),
+        'verifier': fire_verifier.stats() if fire_verifier is not None else None,
+        'verifier_setting': VERIFIER_MODEL,
+        'input_profile': {
+            'path': profile_path_for(fire_model_files['weights']),
+            'tuned_at': fire_input_profile.get('tuned_at'),
+            'ground_truth': fire_input_profile.get('ground_truth'),
+            'sweep': fire_input_profile.get('sweep'),
+        } if fire_input_profile else None
     })
     
 if __name__ == '__main__':
@@ -2243,4 +3505,4 @@ if __name__ == '__main__':
     print("=" * 50)
     
     # Run the Flask development server on port 5002
-    app.run(debug=True, host='0.0.0.0', port=5002)
+    app.run(debug=DEBUG_MODE, host='0.0.0.0', port=5002)
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+PyroSense second-stage fire verifier
+Classifies YOLO `fire` boxes with the 128x128 CNN from cnn_model/cnn_training.ipynb (exported to ONNX): every
+box of a detection call is cropped, resized and classified in one batched forward. A YOLO fire box only
+counts when the CNN agrees, which lets the YOLO threshold drop for recall without more false alarms.
+
+Export the trained Keras model (needs tensorflow + tf2onnx):
+    python fire_verifier.py --export cnn_model_fire_detection_v2.keras --output cnn_model/cnn_fire_verifier.onnx
+Classify image files with an exported model:
+    python fire_verifier.py --model cnn_model/cnn_fire_verifier.onnx --classify img1.jpg img2.jpg
+"""
+
+import argparse
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from inference_backends import available_backends, create_backend
+
+# flow_from_directory sorts class folders alphabetically: this is the output order of a 4-way softmax head
+VERIFIER_LABELS = ('fire', 'human', 'no_fire', 'object')
+VERIFIER_INPUT_SIZE = 128
+
+
+class FireVerifier:
+    """Batched crop classifier over an ONNX export of the verification CNN.
+
+    Inputs are RGB crops scaled to [0, 1] (the notebook's ImageDataGenerator(rescale=1/255)), NHWC unless the
+    model's input is channels-first. Outputs are read as:
+      - one probability per label (softmax head): fire probability = the 'fire' column;
+      - a single sigmoid (the notebook's class_mode="binary" head): it predicts the second class in
+        alphabetical order (no_fire), so fire probability = 1 - output.
+    """
+
+    def __init__(self, onnx_path, labels=VERIFIER_LABELS, input_size=VERIFIER_INPUT_SIZE, threshold=0.5, pad=0.15):
+        self.onnx_path = onnx_path
+        self.labels = tuple(labels)
+        self.input_size = int(input_size)
+        self.threshold = threshold
+        self.pad = pad
+        name = 'onnxruntime' if 'onnxruntime' in available_backends() else 'opencv-onnx'
+        self.backend = create_backend({'backend': name, 'onnx': onnx_path})
+        self.channels_first = self._channels_first()
+        self.calls = 0
+        self.crops = 0
+        self.confirmed = 0
+        self.rejected = 0
+        self.total_ms = 0.0
+        self._lock = threading.Lock()
+
+    def _channels_first(self):
+        session = getattr(self.backend, 'session', None)
+        if session is None:
+            return False
+        shape = session.get_inputs()[0].shape
+        return len(shape) == 4 and shape[1] == 3
+
+    def crop(self, frame, box):
+        """Padded, clamped crop of one [x, y, w, h] box, resized to the CNN input (RGB float32 in [0, 1])."""
+        height, width = frame.shape[:2]
+        x, y, w, h = box
+        px, py = int(w * self.pad), int(h * self.pad)
+        x0, y0 = max(0, int(x) - px), max(0, int(y) - py)
+        x1, y1 = min(width, int(x + w) + px), min(height, int(y + h) + py)
+        if x1 <= x0 or y1 <= y0:
+            patch = np.zeros((self.input_size, self.input_size, 3), np.uint8)
+        else:
+            patch = cv2.resize(frame[y0:y1, x0:x1], (self.input_size, self.input_size), interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(patch, cv2.COLOR_BGR2RGB).astype(np.float32) * (1.0 / 255.0)
+
+    def fire_probabilities(self, crops):
+        """One batched forward over preprocessed crops -> (fire probability per crop, label per crop)."""
+        if not crops:
+            return np.zeros(0, np.float32), []
+        batch = np.stack(crops)
+        if self.channels_first:
+            batch = batch.transpose(0, 3, 1, 2)
+        with self._lock:  # one cv2.dnn.Net / session, callable from the detector and API threads
+            out = self.backend.forward(np.ascontiguousarray(batch))
+        out = np.asarray(out[0] if isinstance(out, (list, tuple)) else out, dtype=np.float32).reshape(len(crops), -1)
+        if out.shape[1] == 1:
+            fire = 1.0 - out[:, 0]
+            return fire, ['fire' if p >= self.threshold else 'no_fire' for p in fire]
+        if not np.allclose(out.sum(axis=1), 1.0, atol=1e-3):
+            out = np.exp(out - out.max(axis=1, keepdims=True))
+            out /= out.sum(axis=1, keepdims=True)
+        labels = [self.labels[i] if i < len(self.labels) else str(i) for i in out.argmax(axis=1)]
+        return out[:, self.labels.index('fire')], labels
+
+    def verify(self, items):
+        """items: [(frame, detection dict)] (fire boxes, possibly from several frames). Adds 'verifier' =
+        {'fire_prob', 'label', 'verified'} to every detection, in one batched forward. Returns the items' detections."""
+        if not items:
+            return []
+        t0 = time.perf_counter()
+        probs, labels = self.fire_probabilities([self.crop(frame, det['box']) for frame, det in items])
+        ms = (time.perf_counter() - t0) * 1000.0
+        confirmed = 0
+        for (_, det), prob, label in zip(items, probs, labels):
+            verified = bool(prob >= self.threshold)
+            confirmed += verified
+            det['verifier'] = {'fire_prob': round(float(prob), 3), 'label': label, 'verified': verified}
+        with self._lock:
+            self.calls += 1
+            self.crops += len(items)
+            self.confirmed += confirmed
+            self.rejected += len(items) - confirmed
+            self.total_ms += ms
+        return [det for _, det in items]
+
+    def stats(self):
+        return {
+            'model': self.onnx_path,
+            'backend': self.backend.name,
+            'threshold': self.threshold,
+            'calls': self.calls,
+            'crops': self.crops,
+            'confirmed': self.confirmed,
+            'rejected': self.rejected,
+            'avg_call_ms': round(self.total_ms / self.calls, 2) if self.calls else None,
+            'avg_crops_per_call': round(self.crops / self.calls, 2) if self.calls else None,
+        }
+
+
+def export_keras_to_onnx(keras_path, output_path, input_size=VERIFIER_INPUT_SIZE, opset=13):
+    """Convert the notebook's saved .keras model to ONNX (NHWC float input, rescaling stays in preprocessing)."""
+    import tensorflow as tf
+    import tf2onnx
+
+    model = tf.keras.models.load_model(keras_path)
+    spec = (tf.TensorSpec((None, input_size, input_size, 3), tf.float32, name='input'),)
+    tf2onnx.convert.from_keras(model, input_signature=spec, opset=opset, output_path=output_path)
+    return output_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PyroSense fire verifier CNN: export and classify")
+    parser.add_argument('--export', metavar='KERAS', help="convert a .keras model to ONNX")
+    parser.add_argument('--output', default='cnn_fire_verifier.onnx', help="ONNX output path for --export")
+    parser.add_argument('--model', help="ONNX verifier model (for --classify)")
+    parser.add_argument('--classify', nargs='+', metavar='IMAGE', help="classify whole images")
+    parser.add_argument('--threshold', type=float, default=0.5)
+    args = parser.parse_args()
+
+    if args.export:
+        print(f"✅ Wrote {export_keras_to_onnx(args.export, args.output)}")
+        return
+    if not (args.model and args.classify):
+        parser.print_help()
+        return
+    verifier = FireVerifier(args.model, threshold=args.threshold)
+    frames = [(path, cv2.imread(path)) for path in args.classify]
+    frames = [(path, frame) for path, frame in frames if frame is not None]
+    probs, labels = verifier.fire_probabilities(
+        [verifier.crop(frame, [0, 0, frame.shape[1], frame.shape[0]]) for _, frame in frames])
+    for (path, _), prob, label in zip(frames, probs, labels):
+        print(f"{path}: {label} (fire {prob:.3f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+PyroSense flame-colour pre-filter
+Cascade stage in front of the fire model: a vectorized HSV + YCrCb flame-colour rule on a downscaled frame
+(well under a millisecond) finds candidate flame regions. Frames without candidates skip the forward pass,
+except for a periodic safety inference so the filter can never blind the detector for long.
+"""
+
+import time
+
+import cv2
+import numpy as np
+
+from inference_gate import SourceGate
+
+
+class FlameColorFilter(SourceGate):
+    """Per-source colour cascade: check(source, frame) -> (run_inference, reason, regions), then commit(source)
+    once the frame goes to inference.
+
+    A pixel is a flame candidate when it is red-to-yellow, saturated and bright in HSV *and* satisfies the
+    YCrCb fire rule (Y > Cb, Cr > Cb, Y and Cr above and Cb below the frame means). Candidate pixels are
+    dilated into blobs; blobs of at least `min_region_px` downscaled pixels become regions (x, y, w, h in
+    frame pixels, padded by `region_pad` of their size on each side: smoke and the dark flame base are not
+    flame-coloured but belong in the crop). A frame runs when it has at least one such region (blobs are only
+    looked for once the candidate pixels exceed `min_pixel_ratio` of the frame: a frame above the ratio with
+    only smaller blobs is skipped), when `safety_interval_s` has passed since the last inference of that
+    source, or when forced.
+    """
+
+    skip_reason = 'no_flame_colour'
+    stats_fields = ('last_pixel_ratio', 'last_regions')
+    config_fields = ('safety_interval_s', 'min_pixel_ratio')
+
+    def __init__(self, width=160, hue_max=35, sat_min=80, val_min=150, min_pixel_ratio=0.0005,
+                 min_region_px=4, region_pad=0.5, safety_interval_s=5.0, enabled=True):
+        self.width = width
+        self.hue_max = hue_max
+        self.sat_min = sat_min
+        self.val_min = val_min
+        self.min_pixel_ratio = min_pixel_ratio
+        self.min_region_px = min_region_px
+        self.region_pad = region_pad
+        self.safety_interval_s = safety_interval_s
+        self._kernel = np.ones((3, 3), np.uint8)
+        super().__init__(enabled)
+
+    def flame_mask(self, small):
+        """uint8 0/255 candidate mask of a (downscaled) BGR frame."""
+        hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV)
+        h, s, v = hsv[..., 0], hsv[..., 1], hsv[..., 2]
+        # OpenCV hue is 0..180: red wraps around at 180
+        hsv_rule = ((h <= self.hue_max) | (h >= 175)) & (s >= self.sat_min) & (v >= self.val_min)
+        ycrcb = cv2.cvtColor(small, cv2.COLOR_BGR2YCrCb).astype(np.int16)
+        y, cr, cb = ycrcb[..., 0], ycrcb[..., 1], ycrcb[..., 2]
+        ycrcb_rule = (y > cb) & (cr > cb) & (y > y.mean()) & (cr > cr.mean()) & (cb < cb.mean())
+        return (hsv_rule & ycrcb_rule).astype(np.uint8) * 255
+
+    def candidates(self, frame):
+        """(candidate pixel ratio, [region (x, y, w, h) in frame pixels]) for one frame."""
+        height, width = frame.shape[:2]
+        scale = self.width / float(width)
+        small = cv2.resize(frame, (self.width, max(1, int(height * scale))), interpolation=cv2.INTER_AREA)
+        mask = self.flame_mask(small)
+        ratio = np.count_nonzero(mask) / float(mask.size)
+        if ratio < self.min_pixel_ratio:
+            return ratio, []
+        count, _, stats, _ = cv2.connectedComponentsWithStats(cv2.dilate(mask, self._kernel, iterations=2), connectivity=8)
+        regions = []
+        for x, y, w, h, area in stats[1:count]:
+            if area < self.min_region_px:
+                continue
+            pad = self.region_pad * max(w, h)
+            x0, y0 = max(0.0, x - pad), max(0.0, y - pad)
+            x1, y1 = min(float(mask.shape[1]), x + w + pad), min(float(mask.shape[0]), y + h + pad)
+            regions.append((int(x0 / scale), int(y0 / scale), max(1, int((x1 - x0) / scale)), max(1, int((y1 - y0) / scale))))
+        return ratio, regions
+
+    def _initial_state(self):
+        return {'last_pixel_ratio': 0.0, 'last_regions': 0}
+
+    def check(self, source, frame, now=None, force=False):
+        now = time.time() if now is None else now
+        state = self._begin(source)
+        regions = []
+        if not self.enabled:
+            reason = 'disabled'
+        else:
+            ratio, regions = self.candidates(frame)
+            state['last_pixel_ratio'] = round(ratio, 5)
+            state['last_regions'] = len(regions)
+            if force:
+                reason = 'forced'
+            elif regions:
+                reason = 'flame_colour'
+            elif now - state['last_infer'] >= self.safety_interval_s:
+                reason = 'safety'
+            else:
+                return self._skip(state) + ([],)
+        return self._pass(state, reason) + (regions,)
@@ -0,0 +1,155 @@
+"""
+PyroSense frame sources
+cv2.VideoCapture-compatible replay of a video file or a folder of images (real-time or max speed, optional loop),
+so the capture pipeline, detectors and benchmarks run without a physical camera.
+
+Replay a recording through any camera consumer:
+    PYROSENSE_REPLAY=incident.mp4 python dashboard.py
+    PYROSENSE_REPLAY=frames/ PYROSENSE_REPLAY_SPEED=max PYROSENSE_REPLAY_LOOP=0 python test_yolo_camera.py
+"""
+
+import os
+import time
+from glob import glob
+
+import cv2
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+class ReplaySource:
+    """Replays a video file or image folder through the read()/isOpened()/release()/get()/set() capture API.
+
+    realtime=True paces read() to `fps` (default: the file's FPS, 30 for image folders); False returns frames
+    as fast as they decode. loop=True restarts at the end instead of reporting end-of-stream; without it
+    `finished` is set at the end so a reader can tell end-of-stream from a read failure.
+    """
+
+    def __init__(self, path, realtime=True, loop=True, fps=None):
+        self.path = path
+        self.realtime = realtime
+        self.loop = loop
+        self.frames_read = 0
+        self.loops = 0
+        self.finished = False
+        self._images = None
+        self._cap = None
+        self._index = 0
+        self._next_due = None
+
+        if os.path.isdir(path):
+            self._images = sorted(p for p in glob(os.path.join(path, '*')) if p.lower().endswith(IMAGE_EXTENSIONS))
+            source_fps = 0.0
+        else:
+            self._cap = cv2.VideoCapture(path)
+            source_fps = self._cap.get(cv2.CAP_PROP_FPS) if self._cap.isOpened() else 0.0
+        self.fps = float(fps or source_fps or 30.0)
+
+    def isOpened(self):
+        if self._images is not None:
+            return bool(self._images)
+        return self._cap is not None and self._cap.isOpened()
+
+    def read(self):
+        if not self.isOpened():
+            return False, None
+        ret, frame = self._read_next()
+        if not ret and self.loop:
+            self._rewind()
+            self.loops += 1
+            ret, frame = self._read_next()
+        if not ret:
+            self.finished = True
+            return False, None
+        if self.realtime:
+            self._pace()
+        self.frames_read += 1
+        return True, frame
+
+    def _read_next(self):
+        if self._images is None:
+            return self._cap.read()
+        while self._index < len(self._images):
+            frame = cv2.imread(self._images[self._index])
+            self._index += 1
+            if frame is not None:
+                return True, frame
+        return False, None
+
+    def _rewind(self):
+        if self._images is not None:
+            self._index = 0
+        elif not self._cap.set(cv2.CAP_PROP_POS_FRAMES, 0):
+            self._cap.release()
+            self._cap = cv2.VideoCapture(self.path)
+
+    def _pace(self):
+        """Sleep until this frame's slot on the fps clock; resync instead of bursting after a long stall."""
+        now = time.monotonic()
+        if self._next_due is None or now - self._next_due > 1.0:
+            self._next_due = now
+        elif self._next_due > now:
+            time.sleep(self._next_due - now)
+        self._next_due += 1.0 / self.fps
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        if self._images is None:
+            return self._cap.get(prop) if self._cap is not None else 0.0
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return float(len(self._images))
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return float(self._index)
+        if prop in (cv2.CAP_PROP_FRAME_WIDTH, cv2.CAP_PROP_FRAME_HEIGHT) and self._images:
+            first = cv2.imread(self._images[0])
+            if first is not None:
+                return float(first.shape[1] if prop == cv2.CAP_PROP_FRAME_WIDTH else first.shape[0])
+        return 0.0
+
+    def set(self, prop, value):
+        """Only seeking is supported; camera tuning (buffer size, FPS, resolution) is ignored like on a file capture."""
+        if prop != cv2.CAP_PROP_POS_FRAMES:
+            return False
+        self.finished = False
+        if self._images is not None:
+            self._index = max(0, min(int(value), len(self._images)))
+            return True
+        return self._cap.set(prop, value)
+
+    def release(self):
+        if self._cap is not None:
+            self._cap.release()
+        self._images = [] if self._images is not None else None
+
+
+def replay_settings():
+    """Replay options from the environment: PYROSENSE_REPLAY (path), _SPEED (realtime|max), _LOOP (1|0), _FPS."""
+    return {
+        'path': os.environ.get('PYROSENSE_REPLAY') or None,
+        'realtime': os.environ.get('PYROSENSE_REPLAY_SPEED', 'realtime').lower() != 'max',
+        'loop': os.environ.get('PYROSENSE_REPLAY_LOOP', '1') != '0',
+        'fps': float(os.environ.get('PYROSENSE_REPLAY_FPS', '0')) or None,
+    }
+
+
+def open_replay_from_env():
+    """ReplaySource for PYROSENSE_REPLAY, or None when no replay is configured."""
+    settings = replay_settings()
+    if not settings['path']:
+        return None
+    return ReplaySource(settings['path'], realtime=settings['realtime'], loop=settings['loop'], fps=settings['fps'])
+
+
+def open_frame_source(source, realtime=True, loop=True, fps=None):
+    """Open a camera index, stream URL, video file or image folder.
+
+    Files and folders become a ReplaySource; camera indexes and URLs use cv2.VideoCapture. Returns None if not opened.
+    """
+    if isinstance(source, str) and source.isdigit():
+        source = int(source)
+    if isinstance(source, str) and os.path.exists(source):
+        cap = ReplaySource(source, realtime=realtime, loop=loop, fps=fps)
+    else:
+        cap = cv2.VideoCapture(source)
+    return cap if cap.isOpened() else None
@@ -0,0 +1,471 @@
+#!/usr/bin/env python3
+"""
+PyroSense inference backends
+One forward(blob) -> YOLO head outputs interface over three runtimes:
+    opencv-darknet   cv2.dnn on the darknet cfg/weights (the original path)
+    opencv-onnx      cv2.dnn on an ONNX export of the same network
+    onnxruntime      ONNX Runtime CPU session (optional `onnxruntime` package)
+All of them return the darknet region layout OpenCV produces ([cx, cy, w, h, obj, obj * class...] rows,
+normalised coordinates), so yolo_decode works unchanged. select_fastest_backend() times the available ones.
+
+One-shot darknet -> ONNX conversion (needs the optional `onnx` package):
+    python inference_backends.py --convert yolov4-tiny-custom.cfg yolov4-tiny-custom_best.weights --size 320
+Benchmark the backends on this machine:
+    python inference_backends.py --bench --cfg yolov4-tiny-custom.cfg --weights yolov4-tiny-custom_best.weights
+"""
+
+import argparse
+import os
+import time
+
+import cv2
+import numpy as np
+
+BACKEND_NAMES = ('opencv-darknet', 'opencv-onnx', 'onnxruntime')
+# fp16: OpenCV's CPU FP16 target; int8: a quantized ONNX graph (see model_variants.py)
+PRECISIONS = ('fp32', 'fp16', 'int8')
+
+# OpenCV's darknet importer zeroes class probabilities at or below this (region layer "thresh")
+REGION_THRESHOLD = 0.2
+
+
+class InferenceBackend:
+    """Common interface: `name`, `input_size` (fixed (w, h) or None if any size works) and forward(blob)."""
+
+    name = 'base'
+    input_size = None
+    precision = 'fp32'
+
+    def forward(self, blob):
+        raise NotImplementedError
+
+    def describe(self):
+        return {'backend': self.name, 'precision': self.precision,
+                'input_size': list(self.input_size) if self.input_size else None}
+
+
+class OpenCVBackend(InferenceBackend):
+    """cv2.dnn.Net on the OpenCV CPU backend (darknet cfg/weights or an ONNX file), FP32 or FP16 target."""
+
+    def __init__(self, name, net, input_size=None, precision='fp32'):
+        self.name = name
+        self.net = net
+        self.input_size = input_size
+        self.precision = precision
+        target = cv2.dnn.DNN_TARGET_CPU
+        if precision == 'fp16':
+            if not hasattr(cv2.dnn, 'DNN_TARGET_CPU_FP16'):
+                raise RuntimeError("this OpenCV build has no DNN_TARGET_CPU_FP16")
+            target = cv2.dnn.DNN_TARGET_CPU_FP16
+        try:
+            net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+            net.setPreferableTarget(target)
+        except Exception:
+            if precision == 'fp16':
+                raise
+        self.output_names = list(net.getUnconnectedOutLayersNames() or [])
+
+    def forward(self, blob):
+        self.net.setInput(blob)
+        return self.net.forward(self.output_names) if self.output_names else self.net.forward()
+
+
+class OnnxRuntimeBackend(InferenceBackend):
+    """ONNX Runtime CPU session over an exported model."""
+
+    name = 'onnxruntime'
+
+    def __init__(self, onnx_path, num_threads=None, precision='fp32'):
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = int(num_threads)
+        self.session = ort.InferenceSession(onnx_path, sess_options=options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+        self.input_size = onnx_input_size(onnx_path)
+        self.precision = precision
+
+    def forward(self, blob):
+        return self.session.run(None, {self.input_name: np.ascontiguousarray(blob, dtype=np.float32)})
+
+
+def onnx_input_size(onnx_path):
+    """(w, h) the ONNX export was built for: from its metadata, else from the _<size>.onnx file name."""
+    try:
+        import onnx
+        model = onnx.load(onnx_path, load_external_data=False)
+        for prop in model.metadata_props:
+            if prop.key == 'input_size':
+                w, h = prop.value.split('x')
+                return int(w), int(h)
+    except Exception:
+        pass
+    stem = os.path.splitext(os.path.basename(onnx_path))[0]
+    for part in reversed(stem.split('_')):
+        if part.isdigit():
+            return int(part), int(part)
+    return None
+
+
+def onnx_path_for(weights_path, size):
+    """Where the converter puts the ONNX export of a darknet weights file for one input size."""
+    stem = os.path.splitext(weights_path)[0]
+    return f"{stem}_{int(size)}.onnx"
+
+
+def quantized_path_for(onnx_path):
+    """Where model_variants.py puts the INT8 version of an ONNX export."""
+    return f"{os.path.splitext(onnx_path)[0]}_int8.onnx"
+
+
+def available_backends():
+    names = ['opencv-darknet', 'opencv-onnx']
+    try:
+        import onnxruntime  # noqa: F401
+        names.append('onnxruntime')
+    except ImportError:
+        pass
+    return names
+
+
+def create_backend(spec, num_threads=None):
+    """Build a backend from a spec dict: {'backend': name, 'cfg': ..., 'weights': ...} or {'backend': name, 'onnx': ...},
+    plus an optional 'precision' (fp32/fp16/int8; int8 specs point 'onnx' at the quantized graph)."""
+    name = spec['backend']
+    precision = spec.get('precision', 'fp32')
+    if name == 'opencv-darknet':
+        return OpenCVBackend(name, cv2.dnn.readNet(spec['weights'], spec['cfg']), precision=precision)
+    if name == 'opencv-onnx':
+        return OpenCVBackend(name, cv2.dnn.readNetFromONNX(spec['onnx']), onnx_input_size(spec['onnx']), precision)
+    if name == 'onnxruntime':
+        return OnnxRuntimeBackend(spec['onnx'], num_threads=num_threads, precision=precision)
+    raise ValueError(f"unknown inference backend {name!r}")
+
+
+def backend_candidates(files, input_size, precision='fp32'):
+    """Backend specs that can run the discovered model files (darknet cfg/weights and/or an ONNX export) at a precision.
+
+    fp16 runs the darknet/ONNX nets on OpenCV's FP16 CPU target (ONNX Runtime has no fast FP16 CPU kernels);
+    int8 needs the quantized <export>_int8.onnx next to the FP32 export.
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"unknown precision {precision!r} (expected one of {', '.join(PRECISIONS)})")
+    cfg, weights = files.get('cfg'), files.get('weights')
+    onnx_file = files.get('onnx')
+    if weights and weights.lower().endswith('.onnx'):
+        onnx_file = weights
+    elif weights and not onnx_file:
+        exported = onnx_path_for(weights, input_size[0])
+        if os.path.exists(exported):
+            onnx_file = exported
+
+    darknet = bool(cfg and weights and weights.lower().endswith('.weights'))
+    wrong_size = lambda path: darknet and onnx_input_size(path) not in (None, tuple(input_size))
+    if onnx_file and wrong_size(onnx_file):
+        # export built for another input size: use one of the requested size, else only the darknet net
+        exported = onnx_path_for(weights, input_size[0])
+        onnx_file = exported if os.path.exists(exported) else None
+
+    specs = []
+    if precision == 'int8':
+        quantized = files.get('onnx_int8')
+        if not quantized or wrong_size(quantized):
+            quantized = quantized_path_for(onnx_file) if onnx_file else None
+        if onnx_file and onnx_file.lower().endswith('_int8.onnx'):
+            quantized = onnx_file
+        if quantized and os.path.exists(quantized):
+            for name in ('opencv-onnx', 'onnxruntime'):
+                if name in available_backends():
+                    specs.append({'backend': name, 'onnx': quantized, 'precision': 'int8'})
+        return specs
+
+    if darknet:
+        specs.append({'backend': 'opencv-darknet', 'cfg': cfg, 'weights': weights, 'precision': precision})
+    if onnx_file:
+        names = ('opencv-onnx',) if precision == 'fp16' else ('opencv-onnx', 'onnxruntime')
+        for name in names:
+            if name in available_backends():
+                specs.append({'backend': name, 'onnx': onnx_file, 'precision': precision})
+    return specs
+
+
+def benchmark_backend(backend, input_size, runs=5, batch=1):
+    """Median forward time in ms on a random blob (after one warm-up pass)."""
+    size = backend.input_size or input_size
+    blob = np.random.default_rng(0).random((batch, 3, size[1], size[0]), dtype=np.float32)
+    backend.forward(blob)
+    times = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        backend.forward(blob)
+        times.append((time.perf_counter() - t0) * 1000.0)
+    return float(np.median(times))
+
+
+def select_fastest_backend(specs, input_size, runs=5, num_threads=None):
+    """Load and time every candidate spec. Returns (fastest backend or None, its spec, report rows)."""
+    best, best_spec, best_ms = None, None, None
+    report = []
+    for spec in specs:
+        row = {'backend': spec['backend'], 'precision': spec.get('precision', 'fp32')}
+        try:
+            t0 = time.perf_counter()
+            backend = create_backend(spec, num_threads=num_threads)
+            row['load_ms'] = round((time.perf_counter() - t0) * 1000.0, 1)
+            row['forward_ms'] = round(benchmark_backend(backend, input_size, runs), 2)
+        except Exception as e:
+            row['error'] = str(e)
+            report.append(row)
+            continue
+        report.append(row)
+        if best_ms is None or row['forward_ms'] < best_ms:
+            best, best_spec, best_ms = backend, spec, row['forward_ms']
+    return best, best_spec, report
+
+
+# --- darknet cfg/weights -> ONNX converter ---
+
+def parse_darknet_cfg(cfg_path):
+    """List of {'type': section, key: value} dicts; the first is [net]."""
+    sections = []
+    with open(cfg_path, 'r', encoding='utf-8') as f:
+        for raw in f:
+            line = raw.split('#')[0].split(';')[0].strip()
+            if not line:
+                continue
+            if line.startswith('['):
+                sections.append({'type': line.strip('[]').strip()})
+            elif '=' in line and sections:
+                key, value = line.split('=', 1)
+                sections[-1][key.strip()] = value.strip()
+    return sections
+
+
+def read_darknet_weights(weights_path):
+    with open(weights_path, 'rb') as f:
+        major, minor, _revision = np.fromfile(f, dtype=np.int32, count=3)
+        seen_dtype = np.int64 if (major * 10 + minor) >= 2 and major < 1000 and minor < 1000 else np.int32
+        np.fromfile(f, dtype=seen_dtype, count=1)
+        return np.fromfile(f, dtype=np.float32)
+
+
+def convert_darknet_to_onnx(cfg_path, weights_path, output_path=None, input_size=None, opset=13):
+    """Export a darknet YOLO (conv/maxpool/route/upsample/yolo layers, as in yolov4-tiny) to ONNX.
+
+    Batch norm is folded into the convolutions and the yolo heads are decoded in-graph, so the outputs match
+    OpenCV's darknet region layers. The spatial size is fixed (default: the cfg's width/height); batch is dynamic.
+    Returns the output path.
+    """
+    import onnx
+    from onnx import TensorProto, helper, numpy_helper
+
+    sections = parse_darknet_cfg(cfg_path)
+    net_cfg, layers = sections[0], sections[1:]
+    width = int(input_size or net_cfg.get('width', 416))
+    height = int(input_size or net_cfg.get('height', 416))
+    output_path = output_path or onnx_path_for(weights_path, width)
+    weights = read_darknet_weights(weights_path)
+    pos = 0
+
+    nodes, inits, outputs = [], [], []
+    tensors, channels, sizes = [], [], []
+    current, c, h, w = 'input', int(net_cfg.get('channels', 3)), height, width
+
+    def const(name, array):
+        inits.append(numpy_helper.from_array(np.asarray(array), name))
+        return name
+
+    def take(count):
+        nonlocal pos
+        if pos + count > weights.size:
+            raise ValueError("weights file is shorter than the cfg requires")
+        chunk = weights[pos:pos + count]
+        pos += count
+        return chunk
+
+    for i, layer in enumerate(layers):
+        kind = layer['type']
+        prefix = f"l{i}_{kind}"
+        if kind == 'convolutional':
+            filters, size = int(layer['filters']), int(layer['size'])
+            stride = int(layer.get('stride', 1))
+            pad = size // 2 if int(layer.get('pad', 0)) else 0
+            bias = take(filters)
+            if int(layer.get('batch_normalize', 0)):
+                scales, mean, var = take(filters), take(filters), take(filters)
+                kernel = take(filters * c * size * size).reshape(filters, c, size, size)
+                factor = scales / np.sqrt(var + 1e-5)
+                kernel = kernel * factor[:, None, None, None]
+                bias = bias - mean * factor
+            else:
+                kernel = take(filters * c * size * size).reshape(filters, c, size, size)
+            out = f"{prefix}_out"
+            nodes.append(helper.make_node(
+                'Conv', [current, const(f"{prefix}_w", kernel.astype(np.float32)), const(f"{prefix}_b", bias.astype(np.float32))],
+                [out], kernel_shape=[size, size], strides=[stride, stride], pads=[pad] * 4))
+            activation = layer.get('activation', 'linear')
+            if activation == 'leaky':
+                nodes.append(helper.make_node('LeakyRelu', [out], [f"{out}_act"], alpha=0.1))
+                out = f"{out}_act"
+            elif activation == 'logistic':
+                nodes.append(helper.make_node('Sigmoid', [out], [f"{out}_act"]))
+                out = f"{out}_act"
+            elif activation == 'mish':
+                nodes.append(helper.make_node('Softplus', [out], [f"{out}_sp"]))
+                nodes.append(helper.make_node('Tanh', [f"{out}_sp"], [f"{out}_tanh"]))
+                nodes.append(helper.make_node('Mul', [out, f"{out}_tanh"], [f"{out}_act"]))
+                out = f"{out}_act"
+            elif activation != 'linear':
+                raise ValueError(f"unsupported activation {activation!r} in layer {i}")
+            current, c = out, filters
+            h, w = (h + 2 * pad - size) // stride + 1, (w + 2 * pad - size) // stride + 1
+        elif kind == 'maxpool':
+            size, stride = int(layer['size']), int(layer.get('stride', 1))
+            out = f"{prefix}_out"
+            if stride == 1:
+                # darknet keeps the size with stride 1: pad right/bottom by size - 1
+                nodes.append(helper.make_node('MaxPool', [current], [out], kernel_shape=[size, size], strides=[1, 1],
+                                              pads=[0, 0, size - 1, size - 1]))
+            else:
+                nodes.append(helper.make_node('MaxPool', [current], [out], kernel_shape=[size, size], strides=[stride, stride]))
+                h, w = (h - size) // stride + 1, (w - size) // stride + 1
+            current = out
+        elif kind == 'route':
+            refs = [int(v) for v in layer['layers'].split(',')]
+            refs = [r if r >= 0 else i + r for r in refs]
+            groups, group_id = int(layer.get('groups', 1)), int(layer.get('group_id', 0))
+            out = f"{prefix}_out"
+            if len(refs) == 1 and groups == 1:
+                current, c = tensors[refs[0]], channels[refs[0]]
+            elif len(refs) == 1:
+                part = channels[refs[0]] // groups
+                nodes.append(helper.make_node(
+                    'Slice', [tensors[refs[0]], const(f"{prefix}_starts", np.array([group_id * part], np.int64)),
+                              const(f"{prefix}_ends", np.array([(group_id + 1) * part], np.int64)),
+                              const(f"{prefix}_axes", np.array([1], np.int64))], [out]))
+                current, c = out, part
+            else:
+                nodes.append(helper.make_node('Concat', [tensors[r] for r in refs], [out], axis=1))
+                current, c = out, sum(channels[r] for r in refs)
+            h, w = sizes[refs[0]]
+        elif kind == 'upsample':
+            stride = int(layer.get('stride', 2))
+            out = f"{prefix}_out"
+            nodes.append(helper.make_node(
+                'Resize', [current, '', const(f"{prefix}_scales", np.array([1, 1, stride, stride], np.float32))], [out],
+                mode='nearest'))
+            current, h, w = out, h * stride, w * stride
+        elif kind == 'yolo':
+            out = _yolo_head(nodes, const, helper, layer, current, prefix, h, w, width, height)
+            outputs.append(helper.make_tensor_value_info(out, TensorProto.FLOAT, ['batch', h * w * len(layer['mask'].split(',')), None]))
+            # darknet routes can reference a yolo layer: it passes its input through
+        elif kind == 'shortcut':
+            ref = int(layer['from'])
+            ref = ref if ref >= 0 else i + ref
+            out = f"{prefix}_out"
+            nodes.append(helper.make_node('Add', [current, tensors[ref]], [out]))
+            current = out
+        else:
+            raise ValueError(f"unsupported darknet layer [{kind}] at index {i}")
+        tensors.append(current)
+        channels.append(c)
+        sizes.append((h, w))
+
+    if pos != weights.size:
+        raise ValueError(f"weights/cfg mismatch: {weights.size - pos} unused weights")
+
+    graph = helper.make_graph(
+        nodes, 'pyrosense_yolo',
+        [helper.make_tensor_value_info('input', TensorProto.FLOAT, ['batch', int(net_cfg.get('channels', 3)), height, width])],
+        outputs, initializer=inits)
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid('', opset)], producer_name='pyrosense')
+    model.ir_version = min(model.ir_version, 8)
+    helper.set_model_props(model, {'input_size': f"{width}x{height}", 'source_weights': os.path.basename(weights_path)})
+    onnx.checker.check_model(model)
+    onnx.save(model, output_path)
+    return output_path
+
+
+def _yolo_head(nodes, const, helper, layer, conv_out, prefix, h, w, net_w, net_h):
+    """In-graph decode of one [yolo] layer into (batch, h*w*anchors, 5 + classes) region rows."""
+    mask = [int(v) for v in layer['mask'].split(',')]
+    anchors = np.array([float(v) for v in layer['anchors'].split(',')], np.float32).reshape(-1, 2)[mask]
+    classes = int(layer['classes'])
+    scale_xy = float(layer.get('scale_x_y', 1.0))
+    num, cell = len(mask), 5 + classes
+    rows = h * w * num
+
+    # rows are ordered (y, x, anchor) like OpenCV's region layer
+    gy, gx, _ = np.meshgrid(np.arange(h), np.arange(w), np.arange(num), indexing='ij')
+    grid = np.stack([gx.reshape(-1), gy.reshape(-1)], axis=1).astype(np.float32)
+    anchor_wh = np.tile(anchors, (h * w, 1)) / np.array([net_w, net_h], np.float32)
+
+    n = lambda suffix: f"{prefix}_{suffix}"
+    nodes.append(helper.make_node('Reshape', [conv_out, const(n('shape5'), np.array([-1, num, cell, h, w], np.int64))], [n('r5')]))
+    nodes.append(helper.make_node('Transpose', [n('r5')], [n('t5')], perm=[0, 3, 4, 1, 2]))
+    nodes.append(helper.make_node('Reshape', [n('t5'), const(n('shape3'), np.array([-1, rows, cell], np.int64))], [n('rows')]))
+
+    def part(name, start, end):
+        nodes.append(helper.make_node('Slice', [n('rows'), const(n(f'{name}_s'), np.array([start], np.int64)),
+                                                const(n(f'{name}_e'), np.array([end], np.int64)),
+                                                const(n(f'{name}_a'), np.array([2], np.int64))], [n(name)]))
+        return n(name)
+
+    xy, wh, obj, cls = part('xy', 0, 2), part('wh', 2, 4), part('obj', 4, 5), part('cls', 5, cell)
+    # centre: ((sigmoid * s) - (s - 1) / 2 + grid) / grid size
+    nodes.append(helper.make_node('Sigmoid', [xy], [n('xy_sig')]))
+    nodes.append(helper.make_node('Mul', [n('xy_sig'), const(n('sxy'), np.array(scale_xy, np.float32))], [n('xy_scaled')]))
+    nodes.append(helper.make_node('Add', [n('xy_scaled'), const(n('grid'), grid - 0.5 * (scale_xy - 1.0))], [n('xy_abs')]))
+    nodes.append(helper.make_node('Div', [n('xy_abs'), const(n('gridwh'), np.array([w, h], np.float32))], [n('xy_out')]))
+    # size: exp * anchor / network input size
+    nodes.append(helper.make_node('Exp', [wh], [n('wh_exp')]))
+    nodes.append(helper.make_node('Mul', [n('wh_exp'), const(n('anchors'), anchor_wh)], [n('wh_out')]))
+    # objectness and class probabilities (obj * sigmoid(class), zeroed below the region threshold)
+    nodes.append(helper.make_node('Sigmoid', [obj], [n('obj_out')]))
+    nodes.append(helper.make_node('Sigmoid', [cls], [n('cls_sig')]))
+    nodes.append(helper.make_node('Mul', [n('cls_sig'), n('obj_out')], [n('prob')]))
+    nodes.append(helper.make_node('Greater', [n('prob'), const(n('thresh'), np.array(REGION_THRESHOLD, np.float32))], [n('keep')]))
+    nodes.append(helper.make_node('Cast', [n('keep')], [n('keepf')], to=1))
+    nodes.append(helper.make_node('Mul', [n('prob'), n('keepf')], [n('cls_out')]))
+    out = n('out')
+    nodes.append(helper.make_node('Concat', [n('xy_out'), n('wh_out'), n('obj_out'), n('cls_out')], [out], axis=2))
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PyroSense inference backends: darknet -> ONNX conversion and benchmark")
+    parser.add_argument('--convert', nargs=2, metavar=('CFG', 'WEIGHTS'), help="export darknet cfg/weights to ONNX")
+    parser.add_argument('--bench', action='store_true', help="time every available backend")
+    parser.add_argument('--cfg', help="darknet .cfg (for --bench)")
+    parser.add_argument('--weights', help="darknet .weights (for --bench)")
+    parser.add_argument('--onnx', help="ONNX export (for --bench; default: <weights>_<size>.onnx if present)")
+    parser.add_argument('--size', type=int, default=320, help="network input size")
+    parser.add_argument('--precision', choices=PRECISIONS, default='fp32', help="variant to benchmark (for --bench)")
+    parser.add_argument('--output', help="ONNX output path (default: <weights>_<size>.onnx)")
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    if args.convert:
+        path = convert_darknet_to_onnx(args.convert[0], args.convert[1], args.output, args.size)
+        print(f"✅ Wrote {path} ({args.size}x{args.size}, dynamic batch)")
+        return
+    if not args.bench:
+        parser.print_help()
+        return
+
+    files = {'cfg': args.cfg, 'weights': args.weights, 'onnx': args.onnx}
+    specs = backend_candidates(files, (args.size, args.size), args.precision)
+    _, best_spec, report = select_fastest_backend(specs, (args.size, args.size), runs=args.runs)
+    print("🔬 Inference backend benchmark")
+    print("=" * 60)
+    for row in report:
+        if 'error' in row:
+            print(f"{row['backend']:>15} {row['precision']}: failed ({row['error']})")
+        else:
+            print(f"{row['backend']:>15} {row['precision']}: {row['forward_ms']:8.2f} ms/forward (load {row['load_ms']:.0f} ms)")
+    if best_spec:
+        print(f"Fastest: {best_spec['backend']}")
+
+
+if __name__ == "__main__":
+    main()
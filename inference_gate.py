@@ -0,0 +1,101 @@
+"""
+PyroSense inference gates
+Bookkeeping shared by the cheap per-source stages in front of the fire model (motion gate, flame-colour
+filter): per-source state, skip and run-reason counts, and the check/commit split that lets a cascade record
+a run only once every stage has let the frame through.
+"""
+
+import time
+
+
+class SourceGate:
+    """Base of a per-source gate. Subclasses decide in check() and report the outcome with _skip() or _pass();
+    commit(source) then records that the frame really went to inference (moves `last_infer`, counts the
+    reason and calls _on_commit with the payload given to _pass)."""
+
+    skip_reason = 'skipped'
+    stats_fields = ()  # per-source state keys reported by stats()
+    config_fields = ()  # attributes reported in the all-sources stats
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._state = {}
+
+    def _initial_state(self):
+        """Subclass-specific per-source fields."""
+        return {}
+
+    def _source_state(self, source):
+        state = self._state.get(source)
+        if state is None:
+            state = self._state[source] = {
+                'last_infer': 0.0, 'checked': 0, 'skipped': 0, 'reasons': {}, 'pending': None,
+                **self._initial_state(),
+            }
+        return state
+
+    def _begin(self, source):
+        state = self._source_state(source)
+        state['checked'] += 1
+        state['pending'] = None
+        return state
+
+    def _skip(self, state):
+        state['skipped'] += 1
+        return False, self.skip_reason
+
+    def _pass(self, state, reason, payload=None):
+        state['pending'] = (reason, payload)
+        return True, reason
+
+    def _on_commit(self, state, payload):
+        pass
+
+    def commit(self, source, now=None):
+        """Record that the frame last passed by check() went to inference."""
+        state = self._state.get(source)
+        if state is None or state['pending'] is None:
+            return
+        reason, payload = state['pending']
+        state['pending'] = None
+        self._on_commit(state, payload)
+        state['last_infer'] = time.time() if now is None else now
+        state['reasons'][reason] = state['reasons'].get(reason, 0) + 1
+
+    def reset(self, source=None):
+        if source is None:
+            self._state = {}
+        else:
+            self._state.pop(source, None)
+
+    def stats(self, source=None, per_frame_ms=None):
+        """Skip ratio and run reasons for one source, or all sources plus totals when source is None.
+        With per_frame_ms (current forward cost) the inference time saved is estimated as skipped * per_frame_ms."""
+        if source is not None:
+            state = self._state.get(source)
+            if state is None:
+                return {'checked': 0, 'skipped': 0, 'skip_ratio': 0.0}
+            result = {
+                'checked': state['checked'],
+                'skipped': state['skipped'],
+                'skip_ratio': round(state['skipped'] / state['checked'], 3) if state['checked'] else 0.0,
+                'reasons': dict(state['reasons']),
+            }
+            result.update((key, state[key]) for key in self.stats_fields)
+            if per_frame_ms:
+                result['saved_ms'] = round(state['skipped'] * per_frame_ms, 1)
+            return result
+        per_source = {str(key): self.stats(key, per_frame_ms) for key in list(self._state)}
+        checked = sum(s['checked'] for s in per_source.values())
+        skipped = sum(s['skipped'] for s in per_source.values())
+        result = {'enabled': self.enabled}
+        result.update((key, getattr(self, key)) for key in self.config_fields)
+        result.update({
+            'checked': checked,
+            'skipped': skipped,
+            'skip_ratio': round(skipped / checked, 3) if checked else 0.0,
+            'sources': per_source,
+        })
+        if per_frame_ms:
+            result['saved_ms'] = round(skipped * per_frame_ms, 1)
+        return result
@@ -0,0 +1,153 @@
+"""
+PyroSense adaptive inference scheduler
+Replaces the fixed inference_interval: measures forward latency and frame arrival rate and picks the
+cadence (run inference every N frames per camera) that keeps inference within a CPU budget, optionally
+stepping the network input size down when a latency budget is exceeded. Detections and thermal alerts
+boost the cadence to every frame for a while.
+"""
+
+import math
+import threading
+import time
+
+# darknet input sizes must be multiples of 32
+INPUT_SIZE_STEP = 32
+MIN_INPUT_SIDE = 224
+
+
+def input_size_ladder(base_size, step=INPUT_SIZE_STEP, min_side=MIN_INPUT_SIDE):
+    """Input sizes to adapt through, largest first: the base size, then the shorter side stepped down by `step`
+    to `min_side` with the longer side scaled to keep the aspect ratio (both rounded to multiples of `step`)."""
+    width, height = (int(v) for v in base_size)
+    short = min(width, height)
+    ladder = [(width, height)]
+    side = (short - 1) // step * step
+    while side >= min_side:
+        long_side = max(step, int(round(max(width, height) * side / short / step)) * step)
+        size = (long_side, side) if width >= height else (side, long_side)
+        if size != ladder[-1]:
+            ladder.append(size)
+        side -= step
+    return ladder
+
+
+class AdaptiveInferenceScheduler:
+    """Inference cadence controller.
+
+    `frame_counter()` returns the total frames captured by all cameras; the arrival rate is derived from it.
+    cpu_budget is the share of one core that inference may use (0.5 = half the wall time spent in forward).
+    The target interval is ceil(arrival_fps * per_frame_forward_s / cpu_budget), clamped to
+    [min_interval, max_interval] and recomputed at most every `update_period_s`.
+    """
+
+    def __init__(self, frame_counter, initial_interval=3, min_interval=1, max_interval=30, cpu_budget=0.5,
+                 latency_budget_ms=None, input_size=(320, 320), adapt_input_size=False, boost_s=10.0,
+                 update_period_s=1.0, enabled=True, smoothing=0.3):
+        self.frame_counter = frame_counter
+        self.min_interval = max(1, int(min_interval))
+        self.max_interval = max(self.min_interval, int(max_interval))
+        self.cpu_budget = cpu_budget
+        self.latency_budget_ms = latency_budget_ms
+        self.adapt_input_size = adapt_input_size
+        self.boost_s = boost_s
+        self.update_period_s = update_period_s
+        self.enabled = enabled
+        self.smoothing = smoothing
+        self._interval = max(self.min_interval, int(initial_interval))
+        self._base_size = tuple(input_size)
+        self._size = tuple(input_size)
+        self._call_ms = None
+        self._frame_ms = None
+        self._fps = None
+        self._boost_until = 0.0
+        self._boost_reason = None
+        self._last_update = time.time()
+        self._last_frames = None
+        self._lock = threading.Lock()
+
+    def _ewma(self, current, sample):
+        return sample if current is None else current + self.smoothing * (sample - current)
+
+    def record_inference(self, ms, frames=1):
+        """Report one detect call: wall time in ms covering `frames` frames (batch size)."""
+        with self._lock:
+            self._call_ms = self._ewma(self._call_ms, ms)
+            self._frame_ms = self._ewma(self._frame_ms, ms / max(1, frames))
+
+    def boost(self, reason, seconds=None):
+        """Run inference on every frame for `seconds` (detection or thermal alert active)."""
+        with self._lock:
+            self._boost_until = max(self._boost_until, time.time() + (seconds if seconds is not None else self.boost_s))
+            self._boost_reason = reason
+
+    @property
+    def boosted(self):
+        return time.time() < self._boost_until
+
+    def set_base_input_size(self, size):
+        with self._lock:
+            self._base_size = tuple(size)
+            self._size = tuple(size)
+            self._call_ms = self._frame_ms = None
+
+    def input_size(self):
+        return self._size
+
+    def interval(self):
+        """Current cadence in frames per camera (cheap; called by the detection worker on every wake-up)."""
+        now = time.time()
+        if now - self._last_update >= self.update_period_s:
+            self._update(now)
+        if self.boosted:
+            return self.min_interval
+        return self._interval
+
+    def _update(self, now):
+        with self._lock:
+            frames = self.frame_counter()
+            if self._last_frames is not None and now > self._last_update:
+                self._fps = self._ewma(self._fps, max(0.0, (frames - self._last_frames) / (now - self._last_update)))
+            self._last_frames = frames
+            self._last_update = now
+            if not self.enabled or self._frame_ms is None or not self._fps:
+                return
+
+            allowed_per_s = self.cpu_budget / (self._frame_ms / 1000.0)
+            target = math.ceil(self._fps / allowed_per_s) if allowed_per_s > 0 else self.max_interval
+            self._interval = min(self.max_interval, max(self.min_interval, target))
+
+            if self.adapt_input_size and self.latency_budget_ms and self._call_ms is not None:
+                self._adapt_size()
+
+    def _adapt_size(self):
+        ladder = input_size_ladder(self._base_size)
+        if len(ladder) < 2:
+            return
+        idx = ladder.index(self._size) if self._size in ladder else 0
+        if self._call_ms > self.latency_budget_ms and idx + 1 < len(ladder):
+            idx += 1
+        elif self._call_ms < 0.5 * self.latency_budget_ms and idx > 0:
+            idx -= 1
+        else:
+            return
+        self._size = ladder[idx]
+        # latency at the new size is unknown: measure again before the next step
+        self._call_ms = self._frame_ms = None
+
+    def status(self):
+        return {
+            'adaptive': self.enabled,
+            'interval': self.interval(),
+            'base_interval': self._interval,
+            'min_interval': self.min_interval,
+            'max_interval': self.max_interval,
+            'cpu_budget': self.cpu_budget,
+            'latency_budget_ms': self.latency_budget_ms,
+            'input_size': list(self._size),
+            'forward_ms': round(self._call_ms, 1) if self._call_ms is not None else None,
+            'per_frame_ms': round(self._frame_ms, 1) if self._frame_ms is not None else None,
+            'arrival_fps': round(self._fps, 1) if self._fps is not None else None,
+            'boosted': self.boosted,
+            'boost_reason': self._boost_reason if self.boosted else None,
+            'boost_remaining_s': round(max(0.0, self._boost_until - time.time()), 1),
+        }
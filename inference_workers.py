@@ -0,0 +1,359 @@
+"""
+PyroSense inference worker processes
+Runs the fire model in separate processes so DNN forward passes don't compete with Flask for the GIL.
+Frames are handed over through multiprocessing.shared_memory slots (one memcpy, no pickling);
+only tiny task/result tuples travel over the queues.
+
+InferenceThreadPool is the in-process alternative with the same submit()/Future interface: N independently
+loaded nets, each confined to its own thread (a cv2.dnn.Net must never see setInput/forward from two threads).
+"""
+
+import atexit
+import itertools
+import multiprocessing as mp
+import os
+import queue
+import signal
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+def _detect(backend, preprocessor, frame, input_size, letterbox, conf_threshold, nms_threshold):
+    """Preprocess (reused buffers) + forward + decode one frame -> (boxes, confidences, class_ids)."""
+    from preprocessing import unletterbox_boxes
+    from yolo_decode import decode_yolo_outputs
+
+    blob, transform = preprocessor.blob(frame, input_size, letterbox=letterbox)
+    outs = backend.forward(blob)
+    width, height = (input_size if transform is not None else (frame.shape[1], frame.shape[0]))
+    boxes, confidences, class_ids = decode_yolo_outputs(outs, width, height, conf_threshold, nms_threshold)
+    return unletterbox_boxes(boxes, transform), confidences, class_ids
+
+
+def _worker_main(worker_id, model_files, input_size, num_threads, shm_names, task_queue, result_queue, letterbox=False):
+    """Worker process entry point: load the backend once, then serve (job_id, slot, shape, conf, nms, size) tasks
+    until None. `size` is the parent's current input size (None: the start size); fixed-size models ignore it."""
+    import cv2
+    from inference_backends import create_backend
+    from preprocessing import BlobPreprocessor
+
+    # Ctrl+C goes to the whole process group; let the parent shut workers down cleanly
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    try:
+        cv2.setNumThreads(int(num_threads))
+    except Exception:
+        pass
+
+    blocks = [shared_memory.SharedMemory(name=name) for name in shm_names]
+    try:
+        # same backend the parent picked (opencv-darknet when model_files has no 'backend' key)
+        spec = dict(model_files)
+        spec.setdefault('backend', 'opencv-darknet')
+        backend = create_backend(spec, num_threads=num_threads)
+        preprocessor = BlobPreprocessor()
+    except Exception as e:
+        result_queue.put(('error', worker_id, f"model load failed: {e}"))
+        for block in blocks:
+            block.close()
+        return
+    result_queue.put(('ready', worker_id, None))
+
+    parent = mp.parent_process()
+    while True:
+        try:
+            task = task_queue.get(timeout=1.0)
+        except queue.Empty:
+            # parent killed without a clean shutdown: don't linger as an orphan
+            if parent is not None and not parent.is_alive():
+                break
+            continue
+        if task is None:
+            break
+        job_id, slot, shape, conf_threshold, nms_threshold, size = task
+        size = tuple(backend.input_size or size or input_size)
+        t0 = time.perf_counter()
+        try:
+            # zero-copy view of the parent's frame
+            frame = np.ndarray(shape, dtype=np.uint8, buffer=blocks[slot].buf)
+            boxes, confidences, class_ids = _detect(backend, preprocessor, frame, size, letterbox, conf_threshold, nms_threshold)
+            del frame
+            payload = (boxes.tolist(), confidences.tolist(), class_ids.tolist(), (time.perf_counter() - t0) * 1000.0)
+            result_queue.put(('result', job_id, payload))
+        except Exception as e:
+            result_queue.put(('failed', job_id, str(e)))
+
+    for block in blocks:
+        block.close()
+
+
+class InferenceProcessPool:
+    """N model worker processes fed through a fixed set of shared-memory frame slots.
+
+    infer(frame) blocks until a worker returns (boxes, confidences, class_ids, forward_ms);
+    submit(frame) returns a concurrent.futures.Future for callers that want to overlap work.
+    Both take the input size per call (the adaptive scheduler's current size); input_size is the default.
+    """
+
+    def __init__(self, model_files, input_size=(320, 320), processes=1, num_threads=1,
+                 max_frame_shape=(1080, 1920, 3), slots=None, start_timeout=60.0, letterbox=False):
+        self.model_files = dict(model_files)
+        self.input_size = tuple(input_size)
+        self.processes = max(1, int(processes))
+        self.max_frame_shape = tuple(max_frame_shape)
+        self.slot_bytes = int(np.prod(self.max_frame_shape))
+        self.completed = 0
+        self.failed = 0
+        self._ctx = mp.get_context('spawn')  # safe with the Flask/capture threads already running
+        self._task_queue = self._ctx.Queue()
+        self._result_queue = self._ctx.Queue()
+        self._free_slots = queue.Queue()
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._job_ids = itertools.count(1)
+        self._closed = False
+
+        slot_count = slots if slots is not None else self.processes * 2
+        self._blocks = [shared_memory.SharedMemory(create=True, size=self.slot_bytes) for _ in range(slot_count)]
+        for i in range(slot_count):
+            self._free_slots.put(i)
+
+        self._workers = []
+        for worker_id in range(self.processes):
+            p = self._ctx.Process(
+                target=_worker_main,
+                args=(worker_id, self.model_files, self.input_size, num_threads,
+                      [b.name for b in self._blocks], self._task_queue, self._result_queue, letterbox),
+                name=f"pyrosense-infer-{worker_id}",
+                daemon=True,
+            )
+            p.start()
+            self._workers.append(p)
+        atexit.register(self.close)
+
+        # wait for every worker to load its net before accepting frames
+        ready = 0
+        deadline = time.time() + start_timeout
+        while ready < self.processes:
+            try:
+                kind, worker_id, info = self._result_queue.get(timeout=max(0.1, deadline - time.time()))
+            except queue.Empty:
+                self.close()
+                raise RuntimeError("inference workers did not start in time")
+            if kind == 'error':
+                self.close()
+                raise RuntimeError(f"inference worker {worker_id}: {info}")
+            if kind == 'ready':
+                ready += 1
+
+        self._dispatcher = threading.Thread(target=self._dispatch_results, name="infer-results", daemon=True)
+        self._dispatcher.start()
+
+    @property
+    def alive(self):
+        return not self._closed and all(p.is_alive() for p in self._workers)
+
+    def submit(self, frame, conf_threshold, nms_threshold=0.4, timeout=5.0, input_size=None):
+        """Copy the frame into a free shared slot and queue it. Returns a Future."""
+        if self._closed:
+            raise RuntimeError("inference pool is closed")
+        frame = np.ascontiguousarray(frame, dtype=np.uint8)
+        if frame.nbytes > self.slot_bytes:
+            raise ValueError(f"frame {frame.shape} larger than shared slot {self.max_frame_shape}")
+        slot = self._free_slots.get(timeout=timeout)
+        np.copyto(np.ndarray(frame.shape, dtype=np.uint8, buffer=self._blocks[slot].buf), frame)
+
+        job_id = next(self._job_ids)
+        future = Future()
+        with self._pending_lock:
+            self._pending[job_id] = (future, slot)
+        size = tuple(int(v) for v in input_size) if input_size else None
+        self._task_queue.put((job_id, slot, frame.shape, float(conf_threshold), float(nms_threshold), size))
+        return future
+
+    def infer(self, frame, conf_threshold, nms_threshold=0.4, timeout=5.0, input_size=None):
+        boxes, confidences, class_ids, forward_ms = self.submit(frame, conf_threshold, nms_threshold, timeout, input_size).result(timeout)
+        return boxes, confidences, class_ids
+
+    def _dispatch_results(self):
+        while not self._closed:
+            try:
+                kind, job_id, payload = self._result_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                break
+            with self._pending_lock:
+                entry = self._pending.pop(job_id, None)
+            if entry is None:
+                continue
+            future, slot = entry
+            self._free_slots.put(slot)
+            if kind == 'result':
+                self.completed += 1
+                future.set_result(payload)
+            else:
+                self.failed += 1
+                future.set_exception(RuntimeError(payload))
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        for _ in self._workers:
+            try:
+                self._task_queue.put(None)
+            except Exception:
+                pass
+        for p in self._workers:
+            p.join(timeout=2.0)
+            if p.is_alive():
+                p.terminate()
+        with self._pending_lock:
+            for future, _ in self._pending.values():
+                if not future.done():
+                    future.set_exception(RuntimeError("inference pool closed"))
+            self._pending.clear()
+        for block in self._blocks:
+            try:
+                block.close()
+                block.unlink()
+            except Exception:
+                pass
+
+
+def default_instance_count(num_threads=1):
+    """Instances that fill the machine when each uses num_threads cores."""
+    return max(1, (os.cpu_count() or 1) // max(1, int(num_threads)))
+
+
+def thread_share(instances):
+    """Cores per instance when `instances` nets run side by side."""
+    return max(1, (os.cpu_count() or 1) // max(1, int(instances)))
+
+
+class InferenceThreadPool:
+    """N thread-confined model instances behind one task queue (the first idle instance takes the next frame).
+
+    Every instance loads its own backend on its own thread and is the only thread that ever touches it.
+    Cores are shared out instead of oversubscribed: ONNX Runtime sessions get `num_threads` intra-op threads
+    each; OpenCV's DNN thread pool is per process, so cv2.setNumThreads(num_threads) caps every net's parallel
+    sections (a net whose parallel_for finds the pool busy runs it on its own thread).
+    """
+
+    def __init__(self, model_files, input_size=(320, 320), instances=None, num_threads=None, start_timeout=60.0,
+                 letterbox=False):
+        self.model_files = dict(model_files)
+        self.input_size = tuple(input_size)
+        self.letterbox = letterbox
+        self.instances = max(1, int(instances or default_instance_count(num_threads or 1)))
+        self.num_threads = max(1, int(num_threads or thread_share(self.instances)))
+        self.completed = 0
+        self.failed = 0
+        self._tasks = queue.Queue()
+        self._closed = False
+        self._errors = []
+        self._ready = threading.Semaphore(0)
+        self._busy = [False] * self.instances
+        self._served = [0] * self.instances
+        self._stats_lock = threading.Lock()
+        try:
+            import cv2
+            cv2.setNumThreads(self.num_threads)
+        except Exception:
+            pass
+
+        self._threads = []
+        for instance_id in range(self.instances):
+            t = threading.Thread(target=self._instance_main, args=(instance_id,), name=f"infer-net-{instance_id}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        deadline = time.time() + start_timeout
+        for _ in range(self.instances):
+            if not self._ready.acquire(timeout=max(0.1, deadline - time.time())):
+                self.close()
+                raise RuntimeError("inference instances did not load in time")
+        if self._errors:
+            self.close()
+            raise RuntimeError(f"inference instance: {self._errors[0]}")
+
+    def _instance_main(self, instance_id):
+        from inference_backends import create_backend
+        from preprocessing import BlobPreprocessor
+
+        try:
+            spec = dict(self.model_files)
+            spec.setdefault('backend', 'opencv-darknet')
+            backend = create_backend(spec, num_threads=self.num_threads)
+            size = tuple(backend.input_size or self.input_size)
+            fixed_size = backend.input_size
+            preprocessor = BlobPreprocessor()  # per instance: its buffers are confined to this thread too
+            backend.forward(preprocessor.blob(np.zeros((size[1], size[0], 3), np.uint8), size)[0])
+        except Exception as e:
+            self._errors.append(f"model load failed: {e}")
+            self._ready.release()
+            return
+        self._ready.release()
+
+        while True:
+            task = self._tasks.get()
+            if task is None:
+                break
+            future, frame, conf_threshold, nms_threshold, task_size = task
+            size = tuple(fixed_size or task_size or self.input_size)
+            if not future.set_running_or_notify_cancel():
+                continue
+            self._busy[instance_id] = True
+            t0 = time.perf_counter()
+            try:
+                boxes, confidences, class_ids = _detect(backend, preprocessor, frame, size, self.letterbox, conf_threshold, nms_threshold)
+                with self._stats_lock:
+                    self.completed += 1
+                    self._served[instance_id] += 1
+                future.set_result((boxes.tolist(), confidences.tolist(), class_ids.tolist(), (time.perf_counter() - t0) * 1000.0))
+            except Exception as e:
+                with self._stats_lock:
+                    self.failed += 1
+                future.set_exception(RuntimeError(str(e)))
+            finally:
+                self._busy[instance_id] = False
+
+    @property
+    def alive(self):
+        return not self._closed and all(t.is_alive() for t in self._threads)
+
+    def submit(self, frame, conf_threshold, nms_threshold=0.4, timeout=5.0, input_size=None):
+        """Queue a frame for the next free instance (the frame must not be modified until the Future is done).
+        input_size is the size to run at (default: the pool's start size; fixed-size models ignore it)."""
+        if self._closed:
+            raise RuntimeError("inference pool is closed")
+        future = Future()
+        self._tasks.put((future, frame, float(conf_threshold), float(nms_threshold), tuple(input_size) if input_size else None))
+        return future
+
+    def infer(self, frame, conf_threshold, nms_threshold=0.4, timeout=5.0, input_size=None):
+        boxes, confidences, class_ids, forward_ms = self.submit(frame, conf_threshold, nms_threshold, timeout, input_size).result(timeout)
+        return boxes, confidences, class_ids
+
+    def stats(self):
+        return {'instances': self.instances, 'threads_per_instance': self.num_threads, 'completed': self.completed,
+                'failed': self.failed, 'busy': sum(self._busy), 'queued': self._tasks.qsize(), 'per_instance': list(self._served)}
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        for _ in self._threads:
+            self._tasks.put(None)
+        for t in self._threads:
+            t.join(timeout=2.0)
+        while True:
+            try:
+                task = self._tasks.get_nowait()
+            except queue.Empty:
+                break
+            if task is not None and not task[0].done():
+                task[0].set_exception(RuntimeError("inference pool closed"))
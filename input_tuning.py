@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+PyroSense input-resolution tuning
+Sweeps network input sizes over a replay set (image folder or video), records forward latency and per-class
+recall for `fire` and `person`, and saves the chosen size as a profile next to the weights
+(<weights>.tuning.json). load_fire_model() reads the profile instead of a hard-coded input size.
+
+Recall is measured against YOLO label files (<image>.txt: class cx cy w h, normalised) when the replay set has
+them; otherwise against the detections at the largest swept size.
+
+    python input_tuning.py --replay path/to/frames --cfg yolov4-tiny-custom.cfg \
+        --weights yolov4-tiny-custom_best.weights --names obj.names --save
+"""
+
+import argparse
+import json
+import os
+import time
+from glob import glob
+
+import cv2
+import numpy as np
+
+from frame_sources import IMAGE_EXTENSIONS
+from inference_backends import create_backend
+from model_variants import load_images, make_blob, match_detections
+from yolo_decode import decode_yolo_outputs
+
+DEFAULT_SIZES = (256, 320, 416, 512)
+TRACKED_CLASSES = ('fire', 'person')
+
+
+def profile_path_for(weights_path):
+    return f"{weights_path}.tuning.json"
+
+
+def load_replay_set(path, limit=200):
+    """[(frame, labels or None)] from an image folder (with optional YOLO .txt labels) or a video."""
+    if not os.path.isdir(path):
+        return [(frame, None) for frame in load_images(path, limit)]
+    items = []
+    for image_path in sorted(p for p in glob(os.path.join(path, '*')) if p.lower().endswith(IMAGE_EXTENSIONS))[:limit]:
+        frame = cv2.imread(image_path)
+        if frame is None:
+            continue
+        label_path = os.path.splitext(image_path)[0] + '.txt'
+        items.append((frame, read_yolo_labels(label_path, frame.shape[1], frame.shape[0]) if os.path.exists(label_path) else None))
+    return items
+
+
+def read_yolo_labels(label_path, width, height):
+    """(boxes [N, 4] x/y/w/h pixels, confidences, class_ids) from a darknet label file."""
+    rows = []
+    with open(label_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 5:
+                rows.append([float(v) for v in parts[:5]])
+    if not rows:
+        return np.zeros((0, 4), np.int32), np.zeros(0, np.float32), np.zeros(0, np.int32)
+    arr = np.array(rows, dtype=np.float64)
+    w, h = arr[:, 3] * width, arr[:, 4] * height
+    boxes = np.stack([arr[:, 1] * width - w / 2, arr[:, 2] * height - h / 2, w, h], axis=1).astype(np.int32)
+    return boxes, np.ones(len(arr), np.float32), arr[:, 0].astype(np.int32)
+
+
+def _select_class(result, class_id):
+    boxes, confidences, class_ids = result
+    keep = class_ids == class_id
+    return boxes[keep], confidences[keep], class_ids[keep]
+
+
+def class_recall(truths, results, class_id, iou_threshold=0.5):
+    """Recall of one class over the replay set (None when the class never appears in the ground truth)."""
+    total = matched = 0
+    for truth, result in zip(truths, results):
+        truth_c = _select_class(truth, class_id)
+        total += len(truth_c[0])
+        matched += match_detections(truth_c, _select_class(result, class_id), iou_threshold)[0]
+    return round(matched / total, 3) if total else None
+
+
+def sweep_input_sizes(model_files, classes, items, sizes=DEFAULT_SIZES, conf_threshold=0.2, iou_threshold=0.5):
+    """Run the darknet model at every size. Returns (rows, ground_truth description)."""
+    backend = create_backend({'backend': 'opencv-darknet', 'cfg': model_files['cfg'], 'weights': model_files['weights']})
+    frames = [frame for frame, _ in items]
+    runs = {}
+    for size in sorted(sizes):
+        backend.forward(make_blob(frames[:1], (size, size)))  # warm-up (allocations for this size)
+        results, latencies = [], []
+        for frame in frames:
+            blob = make_blob([frame], (size, size))
+            t0 = time.perf_counter()
+            outs = backend.forward(blob)
+            latencies.append((time.perf_counter() - t0) * 1000.0)
+            results.append(decode_yolo_outputs(outs, frame.shape[1], frame.shape[0], conf_threshold))
+        runs[size] = (results, latencies)
+
+    if all(labels is not None for _, labels in items):
+        truths, ground_truth = [labels for _, labels in items], 'labels'
+    else:
+        reference = max(sizes)
+        truths, ground_truth = runs[reference][0], f"detections@{reference}"
+
+    rows = []
+    for size in sorted(sizes):
+        results, latencies = runs[size]
+        row = {
+            'input_size': size,
+            'latency_p50_ms': round(float(np.percentile(latencies, 50)), 2),
+            'latency_p95_ms': round(float(np.percentile(latencies, 95)), 2),
+            'detections': int(sum(len(r[0]) for r in results)),
+        }
+        for name in TRACKED_CLASSES:
+            if name in classes:
+                row[f'{name}_recall'] = class_recall(truths, results, classes.index(name), iou_threshold)
+        rows.append(row)
+    return rows, ground_truth
+
+
+def choose_input_size(rows, min_fire_recall=0.9, min_person_recall=0.8, latency_budget_ms=None):
+    """Fastest size meeting the recall floors (and latency budget); else the size with the best fire recall."""
+    def meets(row, key, floor):
+        return row.get(key) is None or row[key] >= floor
+
+    ok = [r for r in rows if meets(r, 'fire_recall', min_fire_recall) and meets(r, 'person_recall', min_person_recall)
+          and (latency_budget_ms is None or r['latency_p50_ms'] <= latency_budget_ms)]
+    if ok:
+        return min(ok, key=lambda r: r['latency_p50_ms'])['input_size']
+    return max(rows, key=lambda r: (r.get('fire_recall') or 0.0, -r['latency_p50_ms']))['input_size']
+
+
+def save_profile(weights_path, input_size, rows, ground_truth, replay, criteria):
+    stat = os.stat(weights_path)
+    profile = {
+        'model': os.path.basename(weights_path),
+        'weights_size': stat.st_size,
+        'weights_mtime': int(stat.st_mtime),
+        'input_size': [int(input_size), int(input_size)],
+        'tuned_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'replay': replay,
+        'ground_truth': ground_truth,
+        'criteria': criteria,
+        'sweep': rows,
+    }
+    path = profile_path_for(weights_path)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(profile, f, indent=2)
+    return path
+
+
+def load_profile(weights_path):
+    """The saved tuning profile for these weights, or None (missing, unreadable or tuned on a different file)."""
+    path = profile_path_for(weights_path)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            profile = json.load(f)
+        stat = os.stat(weights_path)
+    except (OSError, ValueError):
+        return None
+    if profile.get('weights_size') != stat.st_size:
+        return None
+    return profile
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PyroSense input-size tuning")
+    parser.add_argument('--replay', required=True, help="image folder (optional YOLO .txt labels) or video")
+    parser.add_argument('--cfg', required=True)
+    parser.add_argument('--weights', required=True)
+    parser.add_argument('--names', required=True)
+    parser.add_argument('--sizes', default=','.join(str(s) for s in DEFAULT_SIZES), help="comma-separated sizes (multiples of 32)")
+    parser.add_argument('--limit', type=int, default=200, help="max frames")
+    parser.add_argument('--conf', type=float, default=0.2, help="confidence threshold")
+    parser.add_argument('--min-fire-recall', type=float, default=0.9)
+    parser.add_argument('--min-person-recall', type=float, default=0.8)
+    parser.add_argument('--latency-budget-ms', type=float, default=None)
+    parser.add_argument('--save', action='store_true', help="write <weights>.tuning.json")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(',') if s.strip()]
+    bad = [s for s in sizes if s % 32]
+    if bad:
+        parser.error(f"input sizes must be multiples of 32: {bad}")
+    with open(args.names, 'r', encoding='utf-8') as f:
+        classes = [line.strip() for line in f if line.strip()]
+    items = load_replay_set(args.replay, args.limit)
+    if not items:
+        print(f"❌ No frames read from {args.replay}")
+        return
+
+    rows, ground_truth = sweep_input_sizes({'cfg': args.cfg, 'weights': args.weights}, classes, items, sizes, args.conf)
+    criteria = {'min_fire_recall': args.min_fire_recall, 'min_person_recall': args.min_person_recall,
+                'latency_budget_ms': args.latency_budget_ms, 'conf_threshold': args.conf}
+    chosen = choose_input_size(rows, args.min_fire_recall, args.min_person_recall, args.latency_budget_ms)
+
+    print(f"🔬 Input size sweep on {len(items)} frames (recall vs {ground_truth})")
+    print("=" * 72)
+    fmt = lambda v: '-' if v is None else f"{v:.3f}"
+    for row in rows:
+        mark = '  <- chosen' if row['input_size'] == chosen else ''
+        print(f"{row['input_size']:>5}px  p50 {row['latency_p50_ms']:7.2f} ms  p95 {row['latency_p95_ms']:7.2f} ms  "
+              f"fire {fmt(row.get('fire_recall'))}  person {fmt(row.get('person_recall'))}{mark}")
+    if args.save:
+        path = save_profile(args.weights, chosen, rows, ground_truth, args.replay, criteria)
+        print(f"✅ Saved {chosen}x{chosen} to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+PyroSense camera-native MJPEG passthrough
+Most USB cameras can send Motion-JPEG. With FOURCC MJPG and CONVERT_RGB off, cv2.VideoCapture.read() returns the
+camera's compressed frame (a one-row uint8 buffer) instead of a decoded BGR image, so the stream can forward
+those bytes untouched and only the frames inference samples are ever decoded.
+"""
+
+import cv2
+import numpy as np
+
+MJPG_FOURCC = cv2.VideoWriter_fourcc(*'MJPG')
+
+_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+_STANDALONE_MARKERS = {0x01, 0xD8} | set(range(0xD0, 0xD8))
+_standard_dht = None
+
+
+def request_mjpeg(cap):
+    """Ask an opened camera for MJPG and undecoded frames. Returns True if the driver accepted both; otherwise
+    the capture keeps decoding (set the frame size again afterwards: changing FOURCC may reset it)."""
+    try:
+        cap.set(cv2.CAP_PROP_FOURCC, MJPG_FOURCC)
+        if int(cap.get(cv2.CAP_PROP_FOURCC)) != MJPG_FOURCC:
+            return False
+        return bool(cap.set(cv2.CAP_PROP_CONVERT_RGB, 0))
+    except cv2.error:
+        return False
+
+
+def compressed_frame(frame):
+    """JPEG bytes of a raw read() buffer, or None if `frame` is a decoded image (the driver ignored the request)."""
+    if frame is None or frame.ndim == 3 or frame.dtype != np.uint8 or frame.size < 4:
+        return None
+    flat = frame.reshape(-1)
+    if flat[0] != 0xFF or flat[1] != 0xD8:
+        return None
+    return flat.tobytes()
+
+
+def _segments(data):
+    """(marker, offset, length) of every header segment up to and including the start of scan."""
+    i = 2
+    while i + 4 <= len(data):
+        if data[i] != 0xFF:
+            return
+        marker = data[i + 1]
+        if marker == 0xFF:  # fill byte
+            i += 1
+            continue
+        if marker in _STANDALONE_MARKERS:
+            i += 2
+            continue
+        length = (data[i + 2] << 8) | data[i + 3]
+        yield marker, i, length + 2
+        if marker == 0xDA:
+            return
+        i += length + 2
+
+
+def jpeg_size(data):
+    """(width, height) from the JPEG's frame header without decoding it, or None."""
+    for marker, offset, _ in _segments(data):
+        if marker in _SOF_MARKERS and offset + 9 <= len(data):
+            return (data[offset + 7] << 8) | data[offset + 8], (data[offset + 5] << 8) | data[offset + 6]
+    return None
+
+
+def standard_huffman_tables():
+    """The DHT segments of the JPEG spec's default tables (what libjpeg writes when not optimising)."""
+    global _standard_dht
+    if _standard_dht is None:
+        ok, encoded = cv2.imencode('.jpg', np.zeros((8, 8, 3), np.uint8), [int(cv2.IMWRITE_JPEG_OPTIMIZE), 0])
+        data = encoded.tobytes()
+        _standard_dht = b''.join(data[o:o + n] for marker, o, n in _segments(data) if marker == 0xC4)
+    return _standard_dht
+
+
+def with_huffman_tables(data):
+    """Many webcams omit the Huffman tables from MJPEG frames (they are implied by the format). Standalone JPEG
+    decoders, browsers included, need them: insert the standard tables before the scan when none are present."""
+    for marker, offset, _ in _segments(data):
+        if marker == 0xC4:
+            return data
+        if marker == 0xDA:
+            return data[:offset] + standard_huffman_tables() + data[offset:]
+    return data
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+PyroSense reduced-precision model variants
+FP16 runs the existing darknet/ONNX nets on OpenCV's DNN_TARGET_CPU_FP16 (nothing to generate); INT8 is a
+statically quantized copy of the ONNX export (Conv layers only, QDQ format, calibrated on real frames) made
+with onnxruntime.quantization. The dashboard picks a variant with PYROSENSE_FIRE_PRECISION=fp32|fp16|int8.
+
+Generate the INT8 graph (needs onnx + onnxruntime):
+    python model_variants.py --quantize yolov4-tiny-custom_best_320.onnx --calibration path/to/frames
+Compare every variant against the FP32 darknet model on a folder of images (or a video):
+    python model_variants.py --compare --images path/to/frames --cfg yolov4-tiny-custom.cfg \
+        --weights yolov4-tiny-custom_best.weights
+"""
+
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from batch_inference import split_batch_outputs
+from frame_sources import ReplaySource
+from inference_backends import (PRECISIONS, backend_candidates, create_backend, onnx_input_size,
+                                quantized_path_for)
+from object_tracker import iou_matrix
+from yolo_decode import decode_yolo_outputs
+
+
+def load_images(path, limit=64):
+    """Frames from an image folder or video file (read once, in order)."""
+    source = ReplaySource(path, realtime=False, loop=False)
+    frames = []
+    while len(frames) < limit:
+        ret, frame = source.read()
+        if not ret:
+            break
+        frames.append(frame)
+    source.release()
+    return frames
+
+
+def make_blob(frames, input_size):
+    return cv2.dnn.blobFromImages(frames, 0.00392, tuple(input_size), (0, 0, 0), True, crop=False)
+
+
+class _CalibrationReader:
+    """onnxruntime CalibrationDataReader over preprocessed frames (same blob as inference)."""
+
+    def __init__(self, input_name, frames, input_size):
+        self._items = iter([{input_name: make_blob([frame], input_size)} for frame in frames])
+
+    def get_next(self):
+        return next(self._items, None)
+
+
+def quantize_onnx_int8(onnx_path, output_path=None, calibration=None, max_images=32):
+    """Write a static INT8 (QDQ) copy of an ONNX export; calibration is an image folder/video (random frames if None).
+
+    Only Conv layers are quantized: the in-graph YOLO decode (sigmoid/exp/anchors) stays FP32 so box
+    coordinates keep their precision. Returns the output path.
+    """
+    import onnx
+    from onnxruntime.quantization import CalibrationMethod, QuantFormat, QuantType, quantize_static
+
+    output_path = output_path or quantized_path_for(onnx_path)
+    input_size = onnx_input_size(onnx_path) or (320, 320)
+    model = onnx.load(onnx_path)
+    input_name = model.graph.input[0].name
+    frames = load_images(calibration, max_images) if calibration else []
+    if not frames:
+        rng = np.random.default_rng(0)
+        frames = [rng.integers(0, 255, (input_size[1], input_size[0], 3), dtype=np.uint8) for _ in range(8)]
+
+    quantize_static(
+        onnx_path, output_path, _CalibrationReader(input_name, frames, input_size),
+        quant_format=QuantFormat.QDQ, op_types_to_quantize=['Conv'], per_channel=True,
+        activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8,
+        calibrate_method=CalibrationMethod.MinMax,
+    )
+    # keep the export's metadata (input size) on the quantized graph
+    quantized = onnx.load(output_path)
+    props = {p.key: p.value for p in model.metadata_props}
+    props['precision'] = 'int8'
+    props['calibration_frames'] = str(len(frames))
+    onnx.helper.set_model_props(quantized, props)
+    onnx.save(quantized, output_path)
+    return output_path
+
+
+def match_detections(reference, candidate, iou_threshold=0.5):
+    """Greedy same-class IoU matching of two (boxes, confidences, class_ids) results. Returns (matches, mean IoU)."""
+    ref_boxes, _, ref_ids = reference
+    cand_boxes, _, cand_ids = candidate
+    if len(ref_boxes) == 0 or len(cand_boxes) == 0:
+        return 0, 0.0
+    ious = iou_matrix(ref_boxes, cand_boxes)
+    ious = np.where(np.asarray(ref_ids)[:, None] == np.asarray(cand_ids)[None, :], ious, 0.0)
+    used_ref, used_cand, matched = set(), set(), []
+    for flat in np.argsort(-ious, axis=None):
+        ri, ci = np.unravel_index(flat, ious.shape)
+        if ious[ri, ci] < iou_threshold:
+            break
+        if ri not in used_ref and ci not in used_cand:
+            used_ref.add(ri)
+            used_cand.add(ci)
+            matched.append(ious[ri, ci])
+    return len(matched), float(np.mean(matched)) if matched else 0.0
+
+
+def run_variant(backend, frames, input_size, conf_threshold, nms_threshold=0.4, batch=4, warmup=2):
+    """Per-frame detections plus latency (single-frame forward) and throughput (batched forward) figures."""
+    size = backend.input_size or input_size
+    for _ in range(warmup):
+        backend.forward(make_blob(frames[:1], size))
+
+    results, latencies = [], []
+    for frame in frames:
+        blob = make_blob([frame], size)
+        t0 = time.perf_counter()
+        outs = backend.forward(blob)
+        latencies.append((time.perf_counter() - t0) * 1000.0)
+        results.append(decode_yolo_outputs(outs, frame.shape[1], frame.shape[0], conf_threshold, nms_threshold))
+
+    processed = 0
+    t0 = time.perf_counter()
+    for start in range(0, len(frames), batch):
+        chunk = frames[start:start + batch]
+        split_batch_outputs(backend.forward(make_blob(chunk, size)), len(chunk))
+        processed += len(chunk)
+    elapsed = time.perf_counter() - t0
+
+    return results, {
+        'latency_p50_ms': round(float(np.percentile(latencies, 50)), 2),
+        'latency_p95_ms': round(float(np.percentile(latencies, 95)), 2),
+        'throughput_fps': round(processed / elapsed, 2) if elapsed > 0 else None,
+    }
+
+
+def compare_variants(files, frames, input_size=(320, 320), precisions=PRECISIONS, conf_threshold=0.25,
+                     iou_threshold=0.5, batch=4):
+    """Latency/throughput and detection agreement of every backend x precision against FP32 opencv-darknet.
+
+    Agreement: recall = matched / reference detections, precision = matched / variant detections, with
+    same-class IoU >= iou_threshold matching per frame.
+    """
+    reference_spec = next((s for s in backend_candidates(files, input_size, 'fp32') if s['backend'] == 'opencv-darknet'), None)
+    if reference_spec is None:
+        raise ValueError("the FP32 reference needs darknet cfg + weights")
+    reference, ref_stats = run_variant(create_backend(reference_spec), frames, input_size, conf_threshold, batch=batch)
+    ref_count = sum(len(r[0]) for r in reference)
+
+    rows = [dict(backend='opencv-darknet', precision='fp32', reference=True, detections=ref_count,
+                 recall=1.0, precision_agreement=1.0, mean_iou=1.0, **ref_stats)]
+    for precision in precisions:
+        for spec in backend_candidates(files, input_size, precision):
+            if spec == reference_spec:
+                continue
+            row = {'backend': spec['backend'], 'precision': precision}
+            try:
+                results, stats = run_variant(create_backend(spec), frames, input_size, conf_threshold, batch=batch)
+            except Exception as e:
+                row['error'] = str(e)
+                rows.append(row)
+                continue
+            matched, ious = 0, []
+            for ref, cand in zip(reference, results):
+                m, mean_iou = match_detections(ref, cand, iou_threshold)
+                matched += m
+                if m:
+                    ious.append(mean_iou)
+            count = sum(len(r[0]) for r in results)
+            row.update(stats)
+            row.update({
+                'detections': count,
+                'recall': round(matched / ref_count, 3) if ref_count else None,
+                'precision_agreement': round(matched / count, 3) if count else None,
+                'mean_iou': round(float(np.mean(ious)), 3) if ious else None,
+                'speedup': round(ref_stats['latency_p50_ms'] / stats['latency_p50_ms'], 2) if stats['latency_p50_ms'] else None,
+            })
+            rows.append(row)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PyroSense FP16/INT8 model variants")
+    parser.add_argument('--quantize', metavar='ONNX', help="write the INT8 version of an ONNX export")
+    parser.add_argument('--calibration', help="image folder or video for INT8 calibration")
+    parser.add_argument('--output', help="INT8 output path (default: <onnx>_int8.onnx)")
+    parser.add_argument('--compare', action='store_true', help="compare every variant against FP32 darknet")
+    parser.add_argument('--images', help="image folder or video for --compare")
+    parser.add_argument('--cfg', help="darknet .cfg")
+    parser.add_argument('--weights', help="darknet .weights")
+    parser.add_argument('--onnx', help="FP32 ONNX export (default: <weights>_<size>.onnx if present)")
+    parser.add_argument('--size', type=int, default=320, help="network input size")
+    parser.add_argument('--limit', type=int, default=64, help="max images to use")
+    parser.add_argument('--conf', type=float, default=0.25, help="confidence threshold")
+    parser.add_argument('--batch', type=int, default=4, help="batch size for the throughput run")
+    args = parser.parse_args()
+
+    if args.quantize:
+        path = quantize_onnx_int8(args.quantize, args.output, args.calibration, args.limit)
+        print(f"✅ Wrote {path}")
+        return
+    if not (args.compare and args.images and args.cfg and args.weights):
+        parser.print_help()
+        return
+
+    frames = load_images(args.images, args.limit)
+    if not frames:
+        print(f"❌ No frames read from {args.images}")
+        return
+    files = {'cfg': args.cfg, 'weights': args.weights, 'onnx': args.onnx}
+    rows = compare_variants(files, frames, (args.size, args.size), conf_threshold=args.conf, batch=args.batch)
+    print(f"🔬 Model variants on {len(frames)} frames (reference: opencv-darknet fp32)")
+    print("=" * 100)
+    print(f"{'backend':>15} {'prec':>5} {'p50 ms':>8} {'p95 ms':>8} {'fps':>8} {'speedup':>8} {'dets':>6} "
+          f"{'recall':>7} {'prec.':>7} {'IoU':>6}")
+    fmt = lambda v: '-' if v is None else v
+    for row in rows:
+        if 'error' in row:
+            print(f"{row['backend']:>15} {row['precision']:>5}  failed: {row['error']}")
+            continue
+        print(f"{row['backend']:>15} {row['precision']:>5} {row['latency_p50_ms']:8.2f} {row['latency_p95_ms']:8.2f} "
+              f"{fmt(row['throughput_fps']):>8} {fmt(row.get('speedup', 1.0)):>8} {row['detections']:>6} "
+              f"{fmt(row['recall']):>7} {fmt(row['precision_agreement']):>7} {fmt(row['mean_iou']):>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+PyroSense model file watcher
+Polls the model folders (no inotify dependency) and calls back once a changed set of model files has settled,
+so a re-run of extract_yolo_zip.py (which empties the folder, then extracts) triggers one hot reload of the
+complete new files instead of several reloads of half-written ones.
+"""
+
+import os
+import threading
+
+MODEL_EXTENSIONS = ('.cfg', '.weights', '.pt', '.onnx', '.names', '.txt')
+
+
+def model_files_signature(directories, extensions=MODEL_EXTENSIONS):
+    """Sorted (path, size, mtime_ns) of every model file under the directories (recursive)."""
+    signature = []
+    for directory in directories:
+        if not directory or not os.path.isdir(directory):
+            continue
+        for root, _, names in os.walk(directory):
+            for name in names:
+                if not name.lower().endswith(extensions):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue  # removed while scanning
+                signature.append((path, stat.st_size, stat.st_mtime_ns))
+    return tuple(sorted(signature))
+
+
+class ModelFileWatcher:
+    """Background poller: on_change() runs once the signature of directories() has changed and then stayed the
+    same for `settle_polls` further polls (each `interval_s` apart). directories is a callable so the watched
+    folders can follow the currently loaded model."""
+
+    def __init__(self, directories, on_change, interval_s=5.0, settle_polls=1, name='model-watcher'):
+        self.directories = directories
+        self.on_change = on_change
+        self.interval_s = interval_s
+        self.settle_polls = max(0, int(settle_polls))
+        self.name = name
+        self.changes = 0
+        self._baseline = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._baseline = model_files_signature(self.directories())
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=2.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def rebase(self):
+        """Accept the files as they are now (e.g. after a reload triggered elsewhere)."""
+        self._baseline = model_files_signature(self.directories())
+
+    def _run(self):
+        pending, stable = None, 0
+        while not self._stop.wait(self.interval_s):
+            current = model_files_signature(self.directories())
+            if current == self._baseline:
+                pending, stable = None, 0
+                continue
+            if current != pending:
+                # still being written: wait until it stops changing
+                pending, stable = current, 0
+            else:
+                stable += 1
+            if stable < self.settle_polls or not current:
+                continue
+            self._baseline, pending, stable = current, None, 0
+            self.changes += 1
+            try:
+                self.on_change()
+            except Exception:
+                pass
+
+    def status(self):
+        return {'running': self.running, 'interval_s': self.interval_s, 'changes': self.changes,
+                'files': len(self._baseline or ())}
@@ -0,0 +1,76 @@
+"""
+PyroSense motion gate
+Cheap scene-change check in front of the fire model: downscaled, blurred greyscale frame differencing against
+the frame that was last sent to inference. Static scenes skip the forward pass, with a guaranteed minimum
+inference rate so a slow-developing or motionless fire is still checked.
+"""
+
+import time
+
+import cv2
+import numpy as np
+
+from inference_gate import SourceGate
+
+
+class MotionGate(SourceGate):
+    """Per-source gate: check(source, frame) -> (run_inference, reason), then commit(source) once the frame
+    really goes to inference (a later cascade stage may still skip it).
+
+    A frame runs when more than `min_changed_ratio` of the downscaled pixels differ by more than
+    `pixel_threshold` grey levels from the last inferred frame, when `max_skip_s` has passed since the last
+    inference (minimum rate), or when the caller forces it. Comparing with the last *inferred* frame (not the
+    previous frame) lets slow changes accumulate until they trigger, so check() only decides: the reference,
+    the minimum-rate clock and the run reasons move on commit().
+    """
+
+    skip_reason = 'static'
+    stats_fields = ('last_changed_ratio',)
+    config_fields = ('max_skip_s', 'min_changed_ratio')
+
+    def __init__(self, width=160, pixel_threshold=25, min_changed_ratio=0.003, max_skip_s=2.0, enabled=True):
+        self.width = width
+        self.pixel_threshold = pixel_threshold
+        self.min_changed_ratio = min_changed_ratio
+        self.max_skip_s = max_skip_s
+        super().__init__(enabled)
+
+    def _prepare(self, frame):
+        height, width = frame.shape[:2]
+        scale = self.width / float(width)
+        small = cv2.resize(frame, (self.width, max(1, int(height * scale))), interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(small, (5, 5), 0)
+
+    def _initial_state(self):
+        return {'reference': None, 'last_changed_ratio': 0.0}
+
+    def check(self, source, frame, now=None, force=False):
+        now = time.time() if now is None else now
+        state = self._begin(source)
+        small = None
+        if not self.enabled:
+            reason = 'disabled'
+        else:
+            small = self._prepare(frame)
+            reference = state['reference']
+            if reference is None or reference.shape != small.shape:
+                reason = 'first'
+            else:
+                changed = np.count_nonzero(cv2.absdiff(small, reference) > self.pixel_threshold) / float(small.size)
+                state['last_changed_ratio'] = round(changed, 4)
+                if force:
+                    reason = 'forced'
+                elif changed >= self.min_changed_ratio:
+                    reason = 'motion'
+                elif now - state['last_infer'] >= self.max_skip_s:
+                    reason = 'min_rate'
+                else:
+                    return self._skip(state)
+        return self._pass(state, reason, small)
+
+    def _on_commit(self, state, small):
+        # the inferred frame becomes the reference
+        if small is not None:
+            state['reference'] = small
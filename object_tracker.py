@@ -0,0 +1,209 @@
+"""
+PyroSense object tracker
+Lightweight IoU/centroid tracker with optional constant-velocity Kalman prediction. Carries detections
+between inference frames (track IDs, predicted boxes for the frames the model skipped) and confirms a
+detection only after it persisted across K inferences.
+"""
+
+import itertools
+import threading
+
+import numpy as np
+
+
+def iou_matrix(boxes_a, boxes_b):
+    """Pairwise IoU of two (N, 4) / (M, 4) arrays of [x, y, w, h] boxes."""
+    a = np.asarray(boxes_a, dtype=np.float64).reshape(-1, 4)
+    b = np.asarray(boxes_b, dtype=np.float64).reshape(-1, 4)
+    ax2, ay2 = a[:, 0] + a[:, 2], a[:, 1] + a[:, 3]
+    bx2, by2 = b[:, 0] + b[:, 2], b[:, 1] + b[:, 3]
+    iw = np.clip(np.minimum(ax2[:, None], bx2[None, :]) - np.maximum(a[:, 0][:, None], b[:, 0][None, :]), 0, None)
+    ih = np.clip(np.minimum(ay2[:, None], by2[None, :]) - np.maximum(a[:, 1][:, None], b[:, 1][None, :]), 0, None)
+    inter = iw * ih
+    union = (a[:, 2] * a[:, 3])[:, None] + (b[:, 2] * b[:, 3])[None, :] - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-9), 0.0)
+
+
+class BoxKalman:
+    """Constant-velocity Kalman filter over box centre and size: state [cx, cy, w, h, vcx, vcy, vw, vh]."""
+
+    def __init__(self, box, measurement_std=3.0, accel_std=None):
+        x, y, w, h = [float(v) for v in box]
+        self.x = np.array([x + w / 2, y + h / 2, w, h, 0, 0, 0, 0], dtype=np.float64)
+        self.P = np.diag([10.0, 10.0, 10.0, 10.0, 1e3, 1e3, 1e3, 1e3])
+        self.R = np.eye(4) * measurement_std ** 2
+        self.accel_std = accel_std
+
+    @staticmethod
+    def _transition(dt):
+        F = np.eye(8)
+        F[0, 4] = F[1, 5] = F[2, 6] = F[3, 7] = dt
+        return F
+
+    def _process_noise(self, dt):
+        # acceleration noise relative to the box size: big boxes may move more pixels per second
+        std = self.accel_std if self.accel_std is not None else 0.5 * max(self.x[2], self.x[3], 1.0)
+        q = np.diag([dt ** 3 / 3] * 4 + [dt] * 4) * std ** 2
+        q[6, 6] *= 0.25
+        q[7, 7] *= 0.25
+        return q
+
+    def predict(self, dt):
+        if dt <= 0:
+            return
+        F = self._transition(dt)
+        self.x = F @ self.x
+        self.P = F @ self.P @ F.T + self._process_noise(dt)
+
+    def update(self, box):
+        x, y, w, h = [float(v) for v in box]
+        z = np.array([x + w / 2, y + h / 2, w, h])
+        H = np.eye(4, 8)
+        S = H @ self.P @ H.T + self.R
+        K = self.P @ H.T @ np.linalg.inv(S)
+        self.x = self.x + K @ (z - H @ self.x)
+        self.P = (np.eye(8) - K @ H) @ self.P
+
+    def box_at(self, dt):
+        """Predicted [x, y, w, h] dt seconds after the last update/predict (state unchanged)."""
+        s = self._transition(max(0.0, dt)) @ self.x
+        w, h = max(1.0, s[2]), max(1.0, s[3])
+        return [s[0] - w / 2, s[1] - h / 2, w, h]
+
+    @property
+    def velocity(self):
+        return [float(self.x[4]), float(self.x[5])]
+
+
+class Track:
+    def __init__(self, track_id, detection, timestamp, use_kalman):
+        self.track_id = track_id
+        self.class_id = detection['class_id']
+        self.label = detection['label']
+        self.confidence = float(detection['confidence'])
+        self.box = [float(v) for v in detection['box']]
+        self.hits = 1
+        self.misses = 0
+        self.last_update = timestamp
+        self.last_seen = timestamp
+        self.kalman = BoxKalman(self.box) if use_kalman else None
+
+    def predicted_box(self, timestamp, max_predict_s):
+        if self.kalman is None:
+            return self.box
+        return self.kalman.box_at(min(max_predict_s, timestamp - self.last_update))
+
+    def step(self, timestamp):
+        """Advance the motion model to `timestamp` (inference time) before matching."""
+        if self.kalman is not None:
+            self.kalman.predict(timestamp - self.last_update)
+            self.box = self.kalman.box_at(0.0)
+            self.last_update = timestamp
+
+    def correct(self, detection, timestamp):
+        self.confidence = float(detection['confidence'])
+        if self.kalman is not None:
+            self.kalman.update(detection['box'])
+            self.box = self.kalman.box_at(0.0)
+        else:
+            self.box = [float(v) for v in detection['box']]
+        self.hits += 1
+        self.misses = 0
+        self.last_update = timestamp
+        self.last_seen = timestamp
+
+
+class ObjectTracker:
+    """Associates per-inference detections into tracks.
+
+    Matching is greedy by IoU within the same class (>= iou_threshold), then by centroid distance
+    (< centroid_factor * track diagonal) for fast movers whose boxes no longer overlap. A track is
+    `confirmed` once it has been matched in `confirm_hits` inferences and is dropped after `max_misses`
+    inferences without a match. update() runs on the detection thread, predict() on the render thread.
+    """
+
+    def __init__(self, iou_threshold=0.3, centroid_factor=0.5, max_misses=3, confirm_hits=2,
+                 use_kalman=True, max_predict_s=1.0):
+        self.iou_threshold = iou_threshold
+        self.centroid_factor = centroid_factor
+        self.max_misses = max_misses
+        self.confirm_hits = max(1, int(confirm_hits))
+        self.use_kalman = use_kalman
+        self.max_predict_s = max_predict_s
+        self._tracks = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _match(self, tracks, detections):
+        matches = []
+        free_tracks = set(range(len(tracks)))
+        free_dets = set(range(len(detections)))
+        if tracks and detections:
+            ious = iou_matrix([t.box for t in tracks], [d['box'] for d in detections])
+            same_class = np.array([[t.class_id == d['class_id'] for d in detections] for t in tracks])
+            ious = np.where(same_class, ious, 0.0)
+            for flat in np.argsort(-ious, axis=None):
+                ti, di = np.unravel_index(flat, ious.shape)
+                if ious[ti, di] < self.iou_threshold:
+                    break
+                if ti in free_tracks and di in free_dets:
+                    matches.append((ti, di))
+                    free_tracks.discard(ti)
+                    free_dets.discard(di)
+            # centroid fallback for boxes that moved past each other between (sparse) inferences
+            for ti in sorted(free_tracks):
+                t = tracks[ti]
+                tc = np.array([t.box[0] + t.box[2] / 2, t.box[1] + t.box[3] / 2])
+                limit = self.centroid_factor * np.hypot(t.box[2], t.box[3])
+                best, best_dist = None, None
+                for di in free_dets:
+                    d = detections[di]
+                    if d['class_id'] != t.class_id:
+                        continue
+                    x, y, w, h = d['box']
+                    dist = np.hypot(x + w / 2 - tc[0], y + h / 2 - tc[1])
+                    if dist < limit and (best_dist is None or dist < best_dist):
+                        best, best_dist = di, dist
+                if best is not None:
+                    matches.append((ti, best))
+                    free_dets.discard(best)
+                    free_tracks.discard(ti)
+        return matches, free_tracks, free_dets
+
+    def update(self, detections, timestamp):
+        """Feed one inference's detections (dicts with box/class_id/label/confidence). Returns the live tracks."""
+        with self._lock:
+            for track in self._tracks:
+                track.step(timestamp)
+            matches, unmatched_tracks, unmatched_dets = self._match(self._tracks, detections)
+            for ti, di in matches:
+                self._tracks[ti].correct(detections[di], timestamp)
+            for ti in unmatched_tracks:
+                self._tracks[ti].misses += 1
+            self._tracks = [t for t in self._tracks if t.misses <= self.max_misses]
+            for di in sorted(unmatched_dets):
+                self._tracks.append(Track(next(self._ids), detections[di], timestamp, self.use_kalman))
+            return [self._describe(t, t.box) for t in self._tracks]
+
+    def predict(self, timestamp, max_age_s=None):
+        """Track boxes extrapolated to a (skipped) frame's timestamp, for drawing between inferences."""
+        with self._lock:
+            tracks = [t for t in self._tracks if max_age_s is None or timestamp - t.last_seen <= max_age_s]
+            return [self._describe(t, t.predicted_box(timestamp, self.max_predict_s)) for t in tracks]
+
+    def clear(self):
+        with self._lock:
+            self._tracks = []
+
+    def _describe(self, track, box):
+        return {
+            'track_id': track.track_id,
+            'box': [int(round(v)) for v in box],
+            'class_id': track.class_id,
+            'label': track.label,
+            'confidence': track.confidence,
+            'hits': track.hits,
+            'misses': track.misses,
+            'confirmed': track.hits >= self.confirm_hits,
+            'velocity': track.kalman.velocity if track.kalman is not None else [0.0, 0.0],
+        }
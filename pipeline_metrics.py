@@ -0,0 +1,105 @@
+"""
+PyroSense pipeline metrics
+Per-stage latency histograms (rolling p50/p95/p99) and per-source frame/drop counters for the video pipeline.
+One PipelineMetrics instance is shared by the capture, detection and stream workers; snapshot() feeds
+/api/pipeline_metrics.
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+
+class LatencyHistogram:
+    """Rolling window of the last `window` samples (ms); percentiles are computed when read, not per sample."""
+
+    def __init__(self, window=512):
+        self._samples = deque(maxlen=window)
+        self.count = 0
+
+    def add(self, ms):
+        self._samples.append(ms)
+        self.count += 1
+
+    def summary(self):
+        samples = np.array(self._samples, dtype=np.float64)
+        if samples.size == 0:
+            return {'count': self.count, 'window': 0}
+        p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+        return {
+            'count': self.count,
+            'window': int(samples.size),
+            'mean_ms': round(float(samples.mean()), 3),
+            'p50_ms': round(float(p50), 3),
+            'p95_ms': round(float(p95), 3),
+            'p99_ms': round(float(p99), 3),
+            'max_ms': round(float(samples.max()), 3),
+        }
+
+
+class PipelineMetrics:
+    """Stage timers and counters, recorded globally and (when a source is given) per source/camera."""
+
+    def __init__(self, window=512):
+        self.window = window
+        self.started = time.time()
+        self._stages = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def _histogram(self, key):
+        hist = self._stages.get(key)
+        if hist is None:
+            with self._lock:
+                hist = self._stages.setdefault(key, LatencyHistogram(self.window))
+        return hist
+
+    def observe(self, stage, ms, source=None):
+        """Record one stage duration in milliseconds."""
+        self._histogram((None, stage)).add(ms)
+        if source is not None:
+            self._histogram((source, stage)).add(ms)
+
+    @contextmanager
+    def timer(self, stage, source=None):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, (time.perf_counter() - t0) * 1000.0, source)
+
+    def incr(self, name, source=None, n=1):
+        with self._lock:
+            self._counters[(None, name)] = self._counters.get((None, name), 0) + n
+            if source is not None:
+                self._counters[(source, name)] = self._counters.get((source, name), 0) + n
+
+    def reset(self):
+        with self._lock:
+            self._stages = {}
+            self._counters = {}
+            self.started = time.time()
+
+    def snapshot(self):
+        """{'uptime_s', 'stages': {stage: summary}, 'counters': {...}, 'sources': {source: {'stages', 'counters'}}}."""
+        with self._lock:
+            stages = list(self._stages.items())
+            counters = list(self._counters.items())
+        uptime = max(1e-6, time.time() - self.started)
+        result = {'uptime_s': round(uptime, 1), 'stages': {}, 'counters': {}, 'sources': {}}
+        for (source, stage), hist in stages:
+            target = result if source is None else result['sources'].setdefault(str(source), {'stages': {}, 'counters': {}})
+            target['stages'][stage] = hist.summary()
+        for (source, name), value in counters:
+            target = result if source is None else result['sources'].setdefault(str(source), {'stages': {}, 'counters': {}})
+            target['counters'][name] = value
+        # per-source frame rates over the metrics window
+        for entry in [result] + list(result['sources'].values()):
+            counts = entry['counters']
+            for name in ('frames_captured', 'frames_encoded', 'frames_inferred'):
+                if name in counts:
+                    entry.setdefault('rates', {})[name.replace('frames_', '') + '_fps'] = round(counts[name] / uptime, 2)
+        return result
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+PyroSense allocation-free preprocessing
+cv2.dnn.blobFromImage allocates a resized copy, a float copy and the blob for every inference. BlobPreprocessor
+keeps those buffers per batch slot and input size instead: the frame is resized into a reused uint8 buffer
+(optionally letterboxed), then one numpy ufunc does the horizontal flip, BGR->RGB swap, 1/255 scaling and
+HWC->NCHW transpose straight into a reused float32 blob. Output matches blobFromImage(frame, 1/255, size,
+swapRB=True, crop=False).
+
+Benchmark allocations and latency against blobFromImage (and cv2.flip copies vs in-place flips):
+    python preprocessing.py --images path/to/frames --size 320 --batch 4
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+DEFAULT_SCALE = 0.00392  # the 1/255 factor used by every blobFromImage call in the repo
+LETTERBOX_FILL = 127
+
+
+class BlobPreprocessor:
+    """Reusable NCHW blob builder. Not thread-safe: give every inference thread/process its own instance.
+
+    The returned blob is a view of an internal buffer that the next call overwrites, so run the forward pass
+    before preprocessing the next frame (every backend copies or consumes its input synchronously).
+    """
+
+    def __init__(self, scale=DEFAULT_SCALE, swap_rb=True):
+        self.scale = np.float32(scale)
+        self.swap_rb = swap_rb
+        self._resized = {}       # (slot, w, h) -> uint8 HWC network-size image
+        self._letterboxed = {}   # (slot, w, h) -> uint8 HWC padded network-size image
+        self._fitted = {}        # (slot, w, h) -> uint8 HWC aspect-preserving resize (letterbox content)
+        self._letterbox_fit = {}
+        self._blobs = {}     # (w, h) -> float32 NCHW buffer, grown to the largest batch seen
+        self.allocations = 0
+
+    def _buffer(self, cache, key, shape, dtype=np.uint8):
+        buf = cache.get(key)
+        if buf is None or buf.shape != shape:
+            buf = cache[key] = np.empty(shape, dtype)
+            self.allocations += 1
+        return buf
+
+    def _blob_buffer(self, batch, width, height):
+        buf = self._blobs.get((width, height))
+        if buf is None or buf.shape[0] < batch:
+            buf = self._blobs[(width, height)] = np.empty((batch, 3, height, width), np.float32)
+            self.allocations += 1
+        return buf[:batch]
+
+    def _resize(self, frame, slot, size, letterbox):
+        """frame -> network-size uint8 image in the slot's buffer; returns (image, transform or None)."""
+        width, height = size
+        if frame.shape[1] == width and frame.shape[0] == height and not letterbox:
+            return frame, None
+        key = (slot, width, height)
+        if not letterbox:
+            resized = self._buffer(self._resized, key, (height, width, 3))
+            cv2.resize(frame, (width, height), dst=resized, interpolation=cv2.INTER_LINEAR)
+            return resized, None
+        ratio = min(width / frame.shape[1], height / frame.shape[0])
+        fit_w, fit_h = max(1, int(round(frame.shape[1] * ratio))), max(1, int(round(frame.shape[0] * ratio)))
+        left, top = (width - fit_w) // 2, (height - fit_h) // 2
+        canvas = self._buffer(self._letterboxed, key, (height, width, 3))
+        fitted = self._buffer(self._fitted, key, (fit_h, fit_w, 3))
+        if self._letterbox_fit.get(key) != (fit_w, fit_h):
+            # the border only needs filling when the content size changes
+            canvas[:] = LETTERBOX_FILL
+            self._letterbox_fit[key] = (fit_w, fit_h)
+        cv2.resize(frame, (fit_w, fit_h), dst=fitted, interpolation=cv2.INTER_LINEAR)
+        np.copyto(canvas[top:top + fit_h, left:left + fit_w], fitted)
+        return canvas, (ratio, left, top)
+
+    def _normalize(self, image, out, flip):
+        """Fused flip + channel swap + scale + HWC->CHW: a single strided ufunc pass into `out` (3, H, W)."""
+        chw = image.transpose(2, 0, 1)
+        if self.swap_rb:
+            chw = chw[::-1]
+        if flip:
+            chw = chw[:, :, ::-1]
+        np.multiply(chw, self.scale, out=out, dtype=np.float32, casting='unsafe')
+
+    def blob(self, frame, size, flip=False, letterbox=False, slot=0):
+        """(1, 3, H, W) float32 blob for one frame, plus the letterbox transform (ratio, left, top) or None."""
+        blob, transforms = self.batch([frame], size, flip, letterbox, first_slot=slot)
+        return blob, transforms[0]
+
+    def batch(self, frames, size, flip=False, letterbox=False, first_slot=0):
+        """(N, 3, H, W) float32 blob for several frames (one reusable resize buffer per batch slot)."""
+        width, height = int(size[0]), int(size[1])
+        blob = self._blob_buffer(len(frames), width, height)
+        transforms = []
+        for i, frame in enumerate(frames):
+            image, transform = self._resize(frame, first_slot + i, (width, height), letterbox)
+            self._normalize(image, blob[i], flip)
+            if transform is not None and flip:
+                ratio, left, top = transform
+                transform = (ratio, width - left - int(round(frame.shape[1] * ratio)), top)
+            transforms.append(transform)
+        return blob, transforms
+
+
+def unletterbox_boxes(boxes, transform):
+    """Map [N, 4] int x/y/w/h boxes decoded in network pixels (letterboxed input) back to frame pixels."""
+    if transform is None or len(boxes) == 0:
+        return boxes
+    ratio, left, top = transform
+    boxes = np.asarray(boxes, dtype=np.float32) - np.array([left, top, 0, 0], np.float32)
+    return np.round(boxes / ratio).astype(np.int32)
+
+
+def _measure(fn, inputs, repeat):
+    """(p50 ms per call, median bytes allocated during one call) after a warm-up call (buffers created on the
+    first call are setup, not per-frame garbage). Results are dropped, so everything a call allocates is garbage."""
+    fn(inputs[0])
+    times = []
+    for i in range(repeat):
+        t0 = time.perf_counter()
+        fn(inputs[i % len(inputs)])
+        times.append((time.perf_counter() - t0) * 1000.0)
+    allocated = []
+    tracemalloc.start()
+    for i in range(min(repeat, 20)):
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        fn(inputs[i % len(inputs)])
+        allocated.append(tracemalloc.get_traced_memory()[1] - baseline)
+    tracemalloc.stop()
+    return float(np.median(times)), int(np.median(allocated))
+
+
+def benchmark(frames, size=(320, 320), batch=1, repeat=100, flip=True):
+    """Per-frame latency and garbage of the old path (cv2.flip copy + blobFromImage[s]) and the new one
+    (in-place flip at capture + BlobPreprocessor), plus the largest difference between their blobs."""
+    pre = BlobPreprocessor()
+    groups = [frames[i:i + batch] for i in range(0, len(frames) - batch + 1, batch)] or [frames[:batch]]
+    captured = [[f.copy() for f in group] for group in groups]  # stand-ins for fresh VideoCapture.read() frames
+
+    def old(group):
+        group = [cv2.flip(f, 1) for f in group] if flip else group
+        return cv2.dnn.blobFromImages(group, DEFAULT_SCALE, tuple(size), (0, 0, 0), True, crop=False)
+
+    def new_capture_flip(group):
+        for f in group:
+            cv2.flip(f, 1, dst=f)  # capture-side mirror without a second frame
+        return pre.batch(group, size)[0]
+
+    def new_fused(group):
+        return pre.batch(group, size, flip=flip)[0]
+
+    reference = old(groups[0])
+    fused_error = float(np.abs(new_fused(groups[0]) - reference).max())
+    rows = []
+    for name, fn, data in (('blobFromImage + cv2.flip copy', old, groups),
+                           ('in-place flip + reused buffers', new_capture_flip, captured),
+                           ('fused flip in preprocessing', new_fused, groups)):
+        p50, allocated = _measure(fn, data, repeat)
+        rows.append({'path': name, 'p50_ms_per_frame': round(p50 / batch, 3), 'bytes_per_frame': int(allocated / batch)})
+    return rows, fused_error
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PyroSense preprocessing allocation/latency benchmark")
+    parser.add_argument('--images', help="image folder or video (random 640x480 frames if omitted)")
+    parser.add_argument('--size', type=int, default=320, help="network input size")
+    parser.add_argument('--batch', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=100)
+    args = parser.parse_args()
+
+    if args.images:
+        from model_variants import load_images
+        frames = load_images(args.images, max(8, args.batch))
+    else:
+        rng = np.random.default_rng(0)
+        frames = [rng.integers(0, 255, (480, 640, 3), dtype=np.uint8) for _ in range(max(8, args.batch))]
+    if not frames:
+        print(f"❌ No frames read from {args.images}")
+        return
+    rows, error = benchmark(frames, (args.size, args.size), args.batch, args.repeat)
+    print(f"🔬 Preprocessing {frames[0].shape[1]}x{frames[0].shape[0]} -> {args.size}x{args.size}, batch {args.batch}")
+    print("=" * 72)
+    for row in rows:
+        print(f"{row['path']:>32}  {row['p50_ms_per_frame']:7.3f} ms/frame  {row['bytes_per_frame']:>10,} B/frame allocated")
+    print(f"max |fused - blobFromImage| = {error:.2e}")
+
+
+if __name__ == "__main__":
+    main()
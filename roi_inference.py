@@ -0,0 +1,159 @@
+"""
+PyroSense region-of-interest inference
+Instead of shrinking the whole frame to the network input, run the detector on operator-drawn zones and/or
+overlapping tiles at (close to) native resolution, so small distant flames keep their pixels while ceilings and
+walls outside the zones cost nothing. Crop detections are mapped back to frame pixels and merged with one
+class-aware NMS across all crops.
+"""
+
+import json
+import os
+import threading
+
+import numpy as np
+
+from yolo_decode import nms_per_class
+
+ROI_MODES = ('off', 'zones', 'tiles')
+
+
+def _axis_starts(length, tile, overlap):
+    """Tile start offsets covering [0, length) with tiles of `tile` px overlapping by `overlap` (fraction)."""
+    if length <= tile:
+        return [0]
+    step = max(1.0, tile * (1.0 - overlap))
+    count = int(np.ceil((length - tile) / step)) + 1
+    # spread evenly so the last tile isn't a near-duplicate of its neighbour
+    return sorted({int(round(i * (length - tile) / (count - 1))) for i in range(count)})
+
+
+def tile_rect(rect, tile, overlap):
+    """Split an (x, y, w, h) pixel rect into overlapping tile rects of at most tile x tile."""
+    x, y, w, h = rect
+    return [(x + dx, y + dy, min(tile, w), min(tile, h))
+            for dy in _axis_starts(h, tile, overlap) for dx in _axis_starts(w, tile, overlap)]
+
+
+class RoiConfig:
+    """One camera's ROI settings.
+
+    mode 'zones' infers only inside `zones` (normalised [x, y, w, h]); zones larger than a tile are tiled,
+    smaller ones are grown to one tile around their centre for context, and detections centred outside every
+    zone are dropped. mode 'tiles' tiles the whole frame. tile_size is in frame pixels (the network input
+    size keeps crops at 1:1 scale). full_frame adds one downscaled whole-frame pass for large fires that span tiles.
+    """
+
+    def __init__(self, mode='off', zones=None, tile_size=320, overlap=0.2, full_frame=False):
+        if mode not in ROI_MODES:
+            raise ValueError(f"unknown ROI mode {mode!r} (expected one of {', '.join(ROI_MODES)})")
+        self.mode = mode
+        self.zones = [self._normalise_zone(z) for z in (zones or [])]
+        self.tile_size = max(32, int(tile_size))
+        self.overlap = min(0.9, max(0.0, float(overlap)))
+        self.full_frame = bool(full_frame)
+
+    @staticmethod
+    def _normalise_zone(zone):
+        x, y, w, h = [float(v) for v in zone]
+        x, y = min(max(x, 0.0), 1.0), min(max(y, 0.0), 1.0)
+        w, h = min(max(w, 0.0), 1.0 - x), min(max(h, 0.0), 1.0 - y)
+        if w <= 0 or h <= 0:
+            raise ValueError(f"empty zone {zone}")
+        return [round(x, 4), round(y, 4), round(w, 4), round(h, 4)]
+
+    @property
+    def active(self):
+        return self.mode == 'tiles' or (self.mode == 'zones' and bool(self.zones))
+
+    def zone_rects(self, width, height):
+        return [(int(x * width), int(y * height), max(1, int(w * width)), max(1, int(h * height))) for x, y, w, h in self.zones]
+
+    def regions(self, width, height):
+        """Crop rects (x, y, w, h) in frame pixels for one frame size; the whole frame when ROI is off."""
+        if not self.active:
+            return [(0, 0, width, height)]
+        tile = min(self.tile_size, width, height)
+        regions = []
+        if self.mode == 'tiles':
+            regions = tile_rect((0, 0, width, height), tile, self.overlap)
+        else:
+            for zx, zy, zw, zh in self.zone_rects(width, height):
+                if zw > tile * (1 + self.overlap) or zh > tile * (1 + self.overlap):
+                    regions.extend(tile_rect((zx, zy, zw, zh), tile, self.overlap))
+                    continue
+                # small zone: one tile-sized crop centred on it (clamped to the frame)
+                cw, ch = max(zw, tile), max(zh, tile)
+                cx = min(max(0, zx + zw // 2 - cw // 2), width - cw)
+                cy = min(max(0, zy + zh // 2 - ch // 2), height - ch)
+                regions.append((cx, cy, cw, ch))
+        if self.full_frame:
+            regions.append((0, 0, width, height))
+        return list(dict.fromkeys(regions))
+
+    def to_dict(self):
+        return {'mode': self.mode, 'zones': self.zones, 'tile_size': self.tile_size,
+                'overlap': self.overlap, 'full_frame': self.full_frame}
+
+    @classmethod
+    def from_dict(cls, data):
+        data = data or {}
+        return cls(mode=data.get('mode', 'off'), zones=data.get('zones'), tile_size=data.get('tile_size', 320),
+                   overlap=data.get('overlap', 0.2), full_frame=data.get('full_frame', False))
+
+
+def crop(frame, region):
+    x, y, w, h = region
+    return frame[y:y + h, x:x + w]
+
+
+def merge_region_detections(region_results, nms_threshold=0.4, zone_rects=None):
+    """Map per-crop detection dicts back to frame pixels and merge them with one class-aware NMS.
+
+    region_results: [((x, y, w, h), [detection dicts with crop-pixel boxes])]. With zone_rects, detections whose
+    centre lies outside every zone are dropped (context pixels around small zones never raise alerts).
+    """
+    detections = []
+    for (rx, ry, _, _), region_detections in region_results:
+        for det in region_detections:
+            x, y, w, h = det['box']
+            box = [int(x) + rx, int(y) + ry, int(w), int(h)]
+            if zone_rects:
+                cx, cy = box[0] + box[2] / 2, box[1] + box[3] / 2
+                if not any(zx <= cx <= zx + zw and zy <= cy <= zy + zh for zx, zy, zw, zh in zone_rects):
+                    continue
+            detections.append(dict(det, box=box))
+    if len(region_results) <= 1 or len(detections) <= 1:
+        return detections
+    boxes = np.array([d['box'] for d in detections], dtype=np.int32)
+    confidences = np.array([d['confidence'] for d in detections], dtype=np.float32)
+    class_ids = np.array([d['class_id'] for d in detections], dtype=np.int32)
+    keep = nms_per_class(boxes, confidences, class_ids, 0.0, nms_threshold)
+    return [detections[i] for i in keep]
+
+
+class RoiStore:
+    """Per-camera RoiConfig, persisted as JSON {device_id: config} so zones survive restarts."""
+
+    def __init__(self, path, defaults=None):
+        self.path = path
+        self._configs = {}
+        self._lock = threading.Lock()
+        for device_id, data in (defaults or {}).items():
+            self._configs[int(device_id)] = RoiConfig.from_dict(data)
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for device_id, data in json.load(f).items():
+                    self._configs[int(device_id)] = RoiConfig.from_dict(data)
+
+    def get(self, device_id):
+        return self._configs.get(device_id) or RoiConfig()
+
+    def set(self, device_id, config):
+        with self._lock:
+            self._configs[device_id] = config
+            if self.path:
+                tmp = self.path + '.tmp'
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    json.dump({str(k): v.to_dict() for k, v in self._configs.items()}, f, indent=2)
+                os.replace(tmp, self.path)
+        return config
@@ -3,6 +3,14 @@ import cv2
 import numpy as np
 import os
 from glob import glob
+from yolo_decode import decode_yolo_candidates, decode_yolo_outputs, nms_per_class
+from frame_sources import open_replay_from_env
+from input_tuning import load_profile
+
+def model_input_size(model_info, default=416):
+    """Network input size from the model's tuning profile (input_tuning.py), else the cfg's 416."""
+    profile = load_profile(model_info['weights']) if model_info.get('weights') else None
+    return tuple(profile['input_size']) if profile else (default, default)
 
 def find_model_files():
     """Find model files in both fire_extracted_files (fire) and yolo_pretrained_files (COCO) directories"""
@@ -329,9 +337,20 @@ def get_output_layers(net):
         return output_layers
 
 def test_camera_access():
-    """Test camera access"""
+    """Test camera access (PYROSENSE_REPLAY replaces the webcam with a video file / image folder)"""
     print("🔍 Testing camera access...")
     
+    replay = open_replay_from_env()
+    if replay is not None:
+        ret, frame = replay.read()
+        replay.release()
+        if ret:
+            height, width = frame.shape[:2]
+            print(f"✅ Replaying {replay.path} ({width}x{height})")
+            return [(replay.path, None, "Replay", width, height)]
+        print(f"❌ Could not read replay source {replay.path}")
+        return []
+    
     camera_indices = [0, 1, 2]
     working_cameras = []
     
@@ -459,6 +478,12 @@ def main():
             except ValueError:
                 print("Please enter a valid number.")
     
+def open_test_camera(camera_idx, backend_id):
+    """Open the camera picked by test_camera_access (backend None = the PYROSENSE_REPLAY source)"""
+    if backend_id is None:
+        return open_replay_from_env()
+    return cv2.VideoCapture(camera_idx, backend_id)
+
 def test_single_model(model_info):
     """Test a single model"""
     print(f"\n🔄 Loading {model_info['name']}...")
@@ -499,8 +524,8 @@ def test_single_model(model_info):
     print(f"📹 Using camera {camera_idx} with {backend_name}")
     
     # Open camera
-    cap = cv2.VideoCapture(camera_idx, backend_id)
-    if not cap.isOpened():
+    cap = open_test_camera(camera_idx, backend_id)
+    if cap is None or not cap.isOpened():
         print("❌ Failed to open camera")
         return
     
@@ -532,12 +557,17 @@ def test_single_model(model_info):
     frame_count = 0
     
     output_layers = get_output_layers(net)
+    input_size = model_input_size(model_info)
+    print(f"📐 Input size: {input_size[0]}x{input_size[1]}")
     
     min_person_area = 5000  # Minimum area for person detection (tune as needed)
     
     while True:
         ret, frame = cap.read()
         if not ret:
+            if backend_id is None:
+                print("📼 End of replay")
+                break
             continue
 
         # --- MIRROR CAMERA ---
@@ -547,7 +577,7 @@ def test_single_model(model_info):
         height, width = frame.shape[:2]
         
         # Detection
-        blob = cv2.dnn.blobFromImage(frame, 0.00392, (416, 416), (0, 0, 0), True, crop=False)
+        blob = cv2.dnn.blobFromImage(frame, 0.00392, input_size, (0, 0, 0), True, crop=False)
         net.setInput(blob)
         
         try:
@@ -556,48 +586,28 @@ def test_single_model(model_info):
             print(f"❌ Inference error: {e}")
             break
         
-        # Process detections
-        boxes = []
-        confidences = []
-        class_ids = []
+        # Process detections (vectorized decode shared with dashboard.py)
+        boxes, confidences, class_ids = decode_yolo_candidates(outputs, width, height, confidence_threshold)
         
-        for output in outputs:
-            for detection in output:
-                scores = detection[5:]
-                class_id = np.argmax(scores)
-                confidence = scores[class_id]
-                
-                if confidence > confidence_threshold:
-                    center_x = int(detection[0] * width)
-                    center_y = int(detection[1] * height)
-                    w = int(detection[2] * width)
-                    h = int(detection[3] * height)
-                    
-                    x = int(center_x - w / 2)
-                    y = int(center_y - h / 2)
-                    
-                    # Filter small person boxes
-                    if class_id < len(classes) and classes[class_id].lower() == "person":
-                        if w * h < min_person_area:
-                            continue  # Skip small person detections
-                    
-                    boxes.append([x, y, w, h])
-                    confidences.append(float(confidence))
-                    class_ids.append(class_id)
+        # Filter small person boxes
+        if len(boxes) > 0 and 'person' in [c.lower() for c in classes]:
+            person_id = [c.lower() for c in classes].index('person')
+            keep = ~((class_ids == person_id) & (boxes[:, 2] * boxes[:, 3] < min_person_area))
+            boxes, confidences, class_ids = boxes[keep], confidences[keep], class_ids[keep]
         
         # Apply NMS and draw
         detections_found = False
         detection_debug = []  # ADDED: Debug detection info
         
         if len(boxes) > 0:
-            indexes = cv2.dnn.NMSBoxes(boxes, confidences, confidence_threshold, nms_threshold)
+            indexes = nms_per_class(boxes, confidences, class_ids, confidence_threshold, nms_threshold)
             
             if len(indexes) > 0:
                 detections_found = True
-                for i in indexes.flatten():
-                    x, y, w, h = boxes[i]
-                    class_id = class_ids[i]
-                    confidence = confidences[i]
+                for i in indexes:
+                    x, y, w, h = boxes[i].tolist()
+                    class_id = int(class_ids[i])
+                    confidence = float(confidences[i])
                     
                     if class_id < len(classes):
                         label = classes[class_id]
@@ -739,7 +749,8 @@ def test_dual_models(models):
                 'net': net,
                 'classes': classes,
                 'info': model_info,
-                'output_layers': get_output_layers(net)
+                'output_layers': get_output_layers(net),
+                'input_size': model_input_size(model_info)
             }
             print(f"✅ {model_info['name']} loaded successfully")
         except Exception as e:
@@ -756,7 +767,8 @@ def test_dual_models(models):
                     'net': net,
                     'classes': classes,
                     'info': model_info,
-                    'output_layers': get_output_layers(net)
+                    'output_layers': get_output_layers(net),
+                    'input_size': model_input_size(model_info)
                 }
                 print(f"✅ {model_info['name']} loaded with fallback backend")
             except Exception as e2:
@@ -770,8 +782,8 @@ def test_dual_models(models):
         return
     
     camera_idx, backend_id, backend_name, cam_width, cam_height = working_cameras[0]
-    cap = cv2.VideoCapture(camera_idx, backend_id)
-    if not cap.isOpened():
+    cap = open_test_camera(camera_idx, backend_id)
+    if cap is None or not cap.isOpened():
         print("❌ Failed to open camera")
         return
     
@@ -800,6 +812,9 @@ def test_dual_models(models):
     while True:
         ret, frame = cap.read()
         if not ret:
+            if backend_id is None:
+                print("📼 End of replay")
+                break
             continue
 
         # --- MIRROR CAMERA ---
@@ -840,96 +855,68 @@ def test_dual_models(models):
             
             try:
                 # Prepare input
-                blob = cv2.dnn.blobFromImage(frame, 0.00392, (416, 416), (0, 0, 0), True, crop=False)
+                blob = cv2.dnn.blobFromImage(frame, 0.00392, model_data['input_size'], (0, 0, 0), True, crop=False)
                 model_data['net'].setInput(blob)
                 outputs = model_data['net'].forward(model_data['output_layers'])
                 
-                # Process detections
-                boxes = []
-                confidences = []
-                class_ids = []
+                # Process detections (vectorized decode + class-aware NMS shared with dashboard.py)
+                boxes, confidences, class_ids = decode_yolo_outputs(outputs, width, height, model_confidence, 0.4)
                 
-                for output in outputs:
-                    for detection in output:
-                        scores = detection[5:]
-                        class_id = np.argmax(scores)
-                        confidence = scores[class_id]
+                for box, confidence, class_id in zip(boxes.tolist(), confidences.tolist(), class_ids.tolist()):
+                    x, y, w, h = box
+                    
+                    if class_id < len(model_data['classes']):
+                        label = model_data['classes'][class_id]
+                    
+                        # Color and prefix by model type
+                        if model_type == 'fire':
+                            # UPDATED: Better handling for enhanced fire model
+                            if label.lower() == 'fire':
+                                color = (0, 0, 255)  # Red for fire
+                                prefix = "🔥 FIRE"
+                                thickness = 6
+                                detection_counts['fire'] += 1
+                                if frame_count % 30 == 0:
+                                    print(f"🔥 FIRE DETECTED: {confidence:.2f}")
+                            elif label.lower() in ['stove', 'oven', 'candle', 'fireplace']:
+                                color = (0, 140, 255)  # Orange for high-risk
+                                prefix = "⚡ HAZARD"
+                                thickness = 5
+                                detection_counts['fire'] += 1
+                            else:
+                                color = (0, 255, 255)  # Yellow for other hazards
+                                prefix = "🏠 HAZARD"
+                                thickness = 3
+                                detection_counts['fire'] += 1
+                        else:
+                            # COCO model colors
+                            if label == 'person':
+                                color = (0, 255, 0)  # Green for person
+                                thickness = 4
+                            elif label in ['car', 'truck', 'bus', 'motorcycle']:
+                                color = (255, 0, 0)  # Blue for vehicles
+                                thickness = 3
+                            elif label in ['cell phone', 'laptop', 'tv', 'remote']:
+                                color = (255, 255, 0)  # Cyan for electronics
+                                thickness = 3
+                            else:
+                                color = (255, 100, 0)  # Orange for other objects
+                                thickness = 2
                         
-                        if confidence > model_confidence:
-                            center_x = int(detection[0] * width)
-                            center_y = int(detection[1] * height)
-                            w = int(detection[2] * width)
-                            h = int(detection[3] * height)
-                            
-                            x = int(center_x - w / 2)
-                            y = int(center_y - h / 2)
-                            
-                            boxes.append([x, y, w, h])
-                            confidences.append(float(confidence))
-                            class_ids.append(class_id)
-                
-                # Apply NMS
-                if len(boxes) > 0:
-                    indexes = cv2.dnn.NMSBoxes(boxes, confidences, model_confidence, 0.4)
+                            # FIXED: Remove ??? prefix
+                            prefix = "COCO"
+                            # FIXED: Update detection count properly
+                            detection_counts['coco'] += 1
                     
-                    if len(indexes) > 0:
-                        for i in indexes.flatten():
-                            x, y, w, h = boxes[i]
-                            class_id = class_ids[i]
-                            confidence = confidences[i]
-                            
-                            if class_id < len(model_data['classes']):
-                                label = model_data['classes'][class_id]
-                                
-                                # Color and prefix by model type
-                                if model_type == 'fire':
-                                    # UPDATED: Better handling for enhanced fire model
-                                    if label.lower() == 'fire':
-                                        color = (0, 0, 255)  # Red for fire
-                                        prefix = "🔥 FIRE"
-                                        thickness = 6
-                                        detection_counts['fire'] += 1
-                                        if frame_count % 30 == 0:
-                                            print(f"🔥 FIRE DETECTED: {confidence:.2f}")
-                                    elif label.lower() in ['stove', 'oven', 'candle', 'fireplace']:
-                                        color = (0, 140, 255)  # Orange for high-risk
-                                        prefix = "⚡ HAZARD"
-                                        thickness = 5
-                                        detection_counts['fire'] += 1
-                                    else:
-                                        color = (0, 255, 255)  # Yellow for other hazards
-                                        prefix = "🏠 HAZARD"
-                                        thickness = 3
-                                        detection_counts['fire'] += 1
-                                else:
-                                    # COCO model colors
-                                    if label == 'person':
-                                        color = (0, 255, 0)  # Green for person
-                                        thickness = 4
-                                    elif label in ['car', 'truck', 'bus', 'motorcycle']:
-                                        color = (255, 0, 0)  # Blue for vehicles
-                                        thickness = 3
-                                    elif label in ['cell phone', 'laptop', 'tv', 'remote']:
-                                        color = (255, 255, 0)  # Cyan for electronics
-                                        thickness = 3
-                                    else:
-                                        color = (255, 100, 0)  # Orange for other objects
-                                        thickness = 2
-                                    
-                                    # FIXED: Remove ??? prefix
-                                    prefix = "COCO"
-                                    # FIXED: Update detection count properly
-                                    detection_counts['coco'] += 1
-                                
-                                # Store detection for drawing
-                                all_detections.append({
-                                    'box': [x, y, w, h],
-                                    'label': f"{prefix} {label}",
-                                    'confidence': confidence,
-                                    'color': color,
-                                    'thickness': thickness,
-                                    'model': model_type
-                                })
+                        # Store detection for drawing
+                        all_detections.append({
+                            'box': [x, y, w, h],
+                            'label': f"{prefix} {label}",
+                            'confidence': confidence,
+                            'color': color,
+                            'thickness': thickness,
+                            'model': model_type
+                        })
         
             except Exception as e:
                 print(f"⚠️  Detection error for {model_type} model: {e}")
@@ -0,0 +1,917 @@
+"""
+PyroSense video pipeline helpers
+Capture workers and frame buffers shared by the dashboard streams and detectors
+"""
+
+import queue
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+import cv2
+import numpy as np
+
+from mjpeg_passthrough import compressed_frame, jpeg_size, with_huffman_tables
+
+
+class FramePacket:
+    """One captured frame: monotonically increasing sequence number, capture time (time.time()) and BGR image.
+
+    Passthrough packets also carry the camera's JPEG bytes (`jpeg`) and decode `image` through `decoder` on first
+    access, so frames no consumer looks at are never decoded. `size` is (width, height) either way.
+    """
+
+    __slots__ = ('seq', 'timestamp', 'jpeg', 'size', '_image', '_decoder', '_lock')
+
+    def __init__(self, seq, timestamp, image=None, jpeg=None, decoder=None, size=None):
+        self.seq = seq
+        self.timestamp = timestamp
+        self.jpeg = jpeg
+        self._image = image
+        self._decoder = decoder
+        self._lock = threading.Lock() if image is None else None
+        self.size = (image.shape[1], image.shape[0]) if image is not None else size
+
+    @property
+    def decoded(self):
+        return self._image is not None
+
+    @property
+    def image(self):
+        if self._image is None:
+            with self._lock:  # the detector and a burn-in hub may ask at the same time: decode once
+                if self._image is None:
+                    self._image = self._decoder(self.jpeg)
+        return self._image
+
+
+class ErrorReporter:
+    """A background worker's exceptions: count, last message (for status APIs) and a log line for the first one,
+    then at most one per `interval_s` carrying the number of errors since the previous line."""
+
+    def __init__(self, name, log=None, interval_s=60.0):
+        self.name = name
+        self.log = log or print
+        self.interval_s = interval_s
+        self.count = 0
+        self.last_error = None
+        self.last_error_at = None
+        self._logged_at = None
+        self._unlogged = 0
+
+    def report(self, exc):
+        self.count += 1
+        self._unlogged += 1
+        self.last_error = f"{type(exc).__name__}: {exc}"
+        self.last_error_at = time.time()
+        if self._logged_at is not None and self.last_error_at - self._logged_at < self.interval_s:
+            return
+        repeats = f" ({self._unlogged} errors since the last report)" if self._logged_at is not None else ""
+        self._logged_at, self._unlogged = self.last_error_at, 0
+        try:
+            self.log(f"⚠️ {self.name} error: {self.last_error}{repeats}")
+        except Exception:
+            pass
+
+    def status(self):
+        return {'errors': self.count, 'last_error': self.last_error,
+                'last_error_age_s': round(time.time() - self.last_error_at, 1) if self.last_error_at else None}
+
+
+class FrameRing:
+    """Fixed-size ring of the most recent frames. Writers never block; readers always get the newest frame.
+
+    Frames stored here are shared by every consumer and must be treated as read-only
+    (copy before drawing on them).
+    """
+
+    def __init__(self, capacity=4):
+        self.capacity = max(1, int(capacity))
+        self._slots = [None] * self.capacity
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._listeners = []
+
+    @property
+    def last_seq(self):
+        return self._seq
+
+    def add_listener(self, fn):
+        """Call fn(seq) after every push (on the capture thread; keep it cheap)."""
+        self._listeners.append(fn)
+
+    def push(self, image, timestamp=None, jpeg=None, decoder=None, size=None):
+        """Store a new frame (overwriting the oldest slot) and wake any waiting readers. Returns its seq.
+        Passthrough frames pass image=None with their JPEG bytes and a decoder (see FramePacket)."""
+        with self._cond:
+            self._seq += 1
+            seq = self._seq
+            ts = timestamp if timestamp is not None else time.time()
+            self._slots[seq % self.capacity] = FramePacket(seq, ts, image, jpeg, decoder, size)
+            self._cond.notify_all()
+        for fn in self._listeners:
+            fn(seq)
+        return seq
+
+    def latest(self):
+        """Newest frame or None if nothing has been captured yet."""
+        with self._cond:
+            return self._slots[self._seq % self.capacity] if self._seq else None
+
+    def get(self, seq):
+        """Frame with the given seq if it is still in the ring, else None."""
+        with self._cond:
+            packet = self._slots[seq % self.capacity]
+            return packet if packet is not None and packet.seq == seq else None
+
+    def wait_newer(self, last_seq, timeout=None):
+        """Block until a frame newer than last_seq exists and return the newest one (None on timeout)."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._seq > last_seq and self._slots[self._seq % self.capacity] is not None, timeout):
+                return None
+            return self._slots[self._seq % self.capacity]
+
+    def clear(self):
+        """Drop buffered frames (sequence numbers keep increasing so readers never see a seq twice)."""
+        with self._cond:
+            self._slots = [None] * self.capacity
+
+
+class CaptureWorker:
+    """Long-lived thread that owns one capture device and publishes its frames into a FrameRing.
+
+    `opener` is a zero-argument callable returning an opened cv2.VideoCapture-like object (or None).
+    Only this thread ever calls read()/release() on the device.
+    With a PipelineMetrics, read/flip times and frame/failure counters are recorded under `source`.
+    With `passthrough`, compressed frames from a camera opened for raw MJPG (mjpeg_passthrough.request_mjpeg) are
+    published as JPEG bytes and only decoded (and mirrored) when a consumer reads their image; decoded frames
+    from devices that ignored the request are published as usual.
+    A source that reports `finished` (a non-looping ReplaySource at its end) is not reopened: the worker
+    releases it, sets `finished` and exits.
+    """
+
+    def __init__(self, opener, ring=None, name='camera', mirror=False, reopen_delay=1.0, max_read_failures=30,
+                 metrics=None, source=None, passthrough=False):
+        self.opener = opener
+        self.ring = ring if ring is not None else FrameRing()
+        self.name = name
+        self.metrics = metrics
+        self.source = source if source is not None else name
+        self.mirror = mirror
+        self.passthrough = passthrough
+        self.reopen_delay = reopen_delay
+        self.max_read_failures = max_read_failures
+        self.frames_captured = 0
+        self.frames_passthrough = 0
+        self.frames_decoded = 0
+        self.read_failures = 0
+        self.finished = False
+        self._cap = None
+        self._enabled = threading.Event()
+        self._enabled.set()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def enabled(self):
+        return self._enabled.is_set()
+
+    def is_open(self):
+        cap = self._cap
+        try:
+            return cap is not None and cap.isOpened()
+        except Exception:
+            return False
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self.finished = False
+        self._thread = threading.Thread(target=self._run, name=f"capture-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=2.0):
+        self._stop.set()
+        self._enabled.set()  # wake the loop if it is parked while disabled
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+
+    def set_enabled(self, enabled):
+        """Enable/disable capture. When disabled the device is released by the worker thread."""
+        if enabled:
+            self._enabled.set()
+        else:
+            self._enabled.clear()
+            self.ring.clear()
+
+    def _release(self):
+        cap, self._cap = self._cap, None
+        if cap is not None:
+            try:
+                cap.release()
+            except Exception:
+                pass
+
+    def _decode(self, jpeg):
+        """Lazy decoder of passthrough packets (runs on whichever consumer thread first needs the image)."""
+        t0 = time.perf_counter()
+        frame = cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR)
+        if frame is None:
+            raise ValueError(f"{self.name}: corrupt MJPEG frame")
+        if self.mirror:
+            cv2.flip(frame, 1, dst=frame)
+        self.frames_decoded += 1
+        if self.metrics is not None:
+            self.metrics.observe('jpeg_decode', (time.perf_counter() - t0) * 1000.0, self.source)
+        return frame
+
+    def _run(self):
+        consecutive_failures = 0
+        while not self._stop.is_set():
+            if not self._enabled.is_set():
+                self._release()
+                self._stop.wait(0.1)
+                continue
+
+            if self._cap is None:
+                try:
+                    cap = self.opener()
+                except Exception:
+                    cap = None
+                if cap is None or not cap.isOpened():
+                    try:
+                        if cap is not None:
+                            cap.release()
+                    except Exception:
+                        pass
+                    self._stop.wait(self.reopen_delay)
+                    continue
+                self._cap = cap
+                consecutive_failures = 0
+
+            t0 = time.perf_counter()
+            try:
+                ret, frame = self._cap.read()
+            except Exception:
+                ret, frame = False, None
+            if not ret or frame is None:
+                if getattr(self._cap, 'finished', False):
+                    # end of a single-pass replay: final state, reopening would start it again
+                    self.finished = True
+                    if self.metrics is not None:
+                        self.metrics.incr('source_finished', self.source)
+                    break
+                self.read_failures += 1
+                if self.metrics is not None:
+                    self.metrics.incr('read_failures', self.source)
+                consecutive_failures += 1
+                if consecutive_failures >= self.max_read_failures:
+                    # device probably unplugged / stalled: reopen it
+                    self._release()
+                    self._stop.wait(self.reopen_delay)
+                else:
+                    time.sleep(0.05)
+                continue
+
+            consecutive_failures = 0
+            t1 = time.perf_counter()
+            jpeg = compressed_frame(frame) if self.passthrough else None
+            if jpeg is not None:
+                # camera-native JPEG: forwarded as is, decoded (and mirrored) only if someone reads the image
+                jpeg = with_huffman_tables(jpeg)
+                self.frames_passthrough += 1
+            elif self.mirror:
+                cv2.flip(frame, 1, dst=frame)  # read() hands us a fresh frame: mirror it in place, no second copy
+            self.frames_captured += 1
+            if self.metrics is not None:
+                self.metrics.observe('capture_read', (t1 - t0) * 1000.0, self.source)
+                if self.mirror and jpeg is None:
+                    self.metrics.observe('flip', (time.perf_counter() - t1) * 1000.0, self.source)
+                self.metrics.incr('frames_captured', self.source)
+            # a disable request may have arrived while read() was blocking; don't publish a stale frame
+            if not self._enabled.is_set():
+                continue
+            if jpeg is not None:
+                self.ring.push(None, jpeg=jpeg, decoder=self._decode, size=jpeg_size(jpeg))
+            else:
+                self.ring.push(frame)
+
+        self._release()
+
+
+def mjpeg_part(jpeg_bytes):
+    """Wrap encoded JPEG bytes as one multipart/x-mixed-replace part (boundary=frame)."""
+    return b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + jpeg_bytes + b'\r\n'
+
+
+# One rung of the adaptive stream ladder: output scale, JPEG quality (None: the hub's full render) and frame cap
+StreamRung = namedtuple('StreamRung', ['name', 'scale', 'quality', 'max_fps'])
+
+
+class ViewerRateController:
+    """Chooses one viewer's ladder rung (0 = best) from what its connection absorbed in the last window.
+
+    The WSGI server writes a yielded part before asking for the next one, so the time spent around `yield` is
+    the viewer's send time: `busy` is that time as a share of the window, throughput is bytes / send time.
+    A viewer whose queue overflows (dropped frames) or that spends most of the window blocked in send steps
+    down a rung; it steps up again after `up_windows` clean windows when its throughput has room for the
+    next rung's bitrate. A `fixed` rung disables adaptation.
+    """
+
+    def __init__(self, rungs, rung=0, fixed=None, window_s=2.0, up_windows=2,
+                 max_drop_ratio=0.2, max_busy=0.7, up_busy=0.25, up_headroom=1.5):
+        self.rungs = rungs
+        self.fixed = fixed
+        self.rung = fixed if fixed is not None else min(rung, rungs - 1)
+        self.window_s = window_s
+        self.up_windows = up_windows
+        self.max_drop_ratio = max_drop_ratio
+        self.max_busy = max_busy
+        self.up_busy = up_busy
+        self.up_headroom = up_headroom
+        self.changes = 0
+        self.throughput = None  # bytes/s while sending (last window)
+        self.busy = 0.0
+        self._clean_windows = 0
+        self._reset(time.monotonic())
+
+    def _reset(self, now):
+        self._window_start = now
+        self._offered = 0
+        self._dropped = 0
+        self._bytes = 0
+        self._send_s = 0.0
+
+    def record_offer(self, dropped):
+        self._offered += 1
+        self._dropped += dropped
+
+    def record_send(self, nbytes, seconds):
+        self._bytes += nbytes
+        self._send_s += seconds
+
+    def update(self, now, bitrate_of=None):
+        """Close the window once it is `window_s` long and move rungs if needed. Returns the current rung."""
+        elapsed = now - self._window_start
+        if elapsed < self.window_s:
+            return self.rung
+        self.busy = min(1.0, self._send_s / elapsed)
+        self.throughput = self._bytes / self._send_s if self._send_s > 0 else None
+        congested = (self._offered and self._dropped / self._offered > self.max_drop_ratio) or self.busy > self.max_busy
+        if self.fixed is None:
+            if congested:
+                self._clean_windows = 0
+                if self.rung < self.rungs - 1:
+                    self.rung += 1
+                    self.changes += 1
+            elif not self._dropped and self.busy < self.up_busy:
+                self._clean_windows += 1
+                needed = bitrate_of(self.rung - 1) if bitrate_of is not None and self.rung > 0 else None
+                room = needed is None or self.throughput is None or self.throughput >= needed * self.up_headroom
+                if self.rung > 0 and self._clean_windows >= self.up_windows and room:
+                    self.rung -= 1
+                    self.changes += 1
+                    self._clean_windows = 0
+            else:
+                self._clean_windows = 0
+        self._reset(now)
+        return self.rung
+
+
+class StreamSubscriber:
+    """One connected viewer: a small bounded queue of ready-to-send MJPEG parts and its rate controller."""
+
+    def __init__(self, queue_size=2, controller=None):
+        self.queue = queue.Queue(maxsize=max(1, int(queue_size)))
+        self.controller = controller
+        self.sent = 0
+        self.dropped = 0
+
+    @property
+    def rung(self):
+        return self.controller.rung if self.controller is not None else 0
+
+    def offer(self, part):
+        """Enqueue without blocking; a slow client loses its oldest pending frame instead of stalling the hub.
+        Returns the number of frames dropped."""
+        dropped = 0
+        while True:
+            try:
+                self.queue.put_nowait(part)
+                break
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                    dropped += 1
+                except queue.Empty:
+                    pass
+        if self.controller is not None:
+            self.controller.record_offer(dropped)
+        return dropped
+
+
+class MjpegBroadcaster:
+    """Encode-once MJPEG hub: renders each new ring frame a single time and fans the bytes out to all viewers.
+
+    `render(packet)` turns a FramePacket into JPEG bytes (or None to skip it).
+    `idle_render()` is called when no new frame arrived within `idle_interval`; it may return placeholder
+    JPEG bytes or None to keep waiting. The render thread only runs while someone is subscribed.
+    With a PipelineMetrics it records render time, capture-to-JPEG age, skipped ring frames and viewer drops.
+
+    With a `ladder` of StreamRungs and `render_variant(packet, rung)`, every viewer gets a ViewerRateController
+    and the hub renders each frame once per rung that has viewers (rung 0 via render(), the others via
+    render_variant, at most max_fps each), so viewers on the same rung share one encode.
+    Render exceptions skip the frame; they are counted and logged (rate-limited) through `on_error(message)`.
+    """
+
+    def __init__(self, ring, render, idle_render=None, idle_interval=0.25, queue_size=2, name='stream',
+                 metrics=None, source=None, ladder=None, render_variant=None, on_error=None):
+        self.ring = ring
+        self.render = render
+        self.idle_render = idle_render
+        self.idle_interval = idle_interval
+        self.queue_size = queue_size
+        self.name = name
+        self.metrics = metrics
+        self.source = source if source is not None else name
+        self.ladder = tuple(ladder) if ladder and render_variant is not None else ()
+        self.render_variant = render_variant
+        self.frames_encoded = 0
+        self.error_reporter = ErrorReporter(f"Stream {name}", on_error)
+        self._rung_stats = [{'frames': 0, 'avg_bytes': None, 'last_sent': 0.0, 'fps': None} for _ in self.ladder]
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def rung_index(self, name):
+        """Ladder position of a rung name (None if unknown or no ladder)."""
+        for i, rung in enumerate(self.ladder):
+            if rung.name == name:
+                return i
+        return None
+
+    def subscribe(self, rung=None):
+        """New viewer. `rung` (index) pins it to one ladder rung; otherwise it adapts from the top rung."""
+        controller = ViewerRateController(len(self.ladder), fixed=rung) if self.ladder else None
+        sub = StreamSubscriber(self.queue_size, controller)
+        with self._lock:
+            self._subscribers.add(sub)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=f"mjpeg-{self.name}", daemon=True)
+                self._thread.start()
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def publish(self, jpeg_bytes, rung=None):
+        """Send to every viewer (rung None) or to the viewers currently on one rung."""
+        part = mjpeg_part(jpeg_bytes)
+        with self._lock:
+            subscribers = [sub for sub in self._subscribers if rung is None or sub.rung == rung]
+        dropped = sum(sub.offer(part) for sub in subscribers)
+        if dropped and self.metrics is not None:
+            self.metrics.incr('viewer_drops', self.source, dropped)
+
+    def rung_bitrate(self, rung):
+        """Recent bytes/s one viewer of `rung` receives (None until the rung has been rendered)."""
+        stats = self._rung_stats[rung]
+        if stats['avg_bytes'] is None or not stats['fps']:
+            return None
+        return stats['avg_bytes'] * stats['fps']
+
+    def stream(self, sub=None):
+        """Generator for a Flask Response: yields shared MJPEG parts until the client disconnects."""
+        sub = sub if sub is not None else self.subscribe()
+        controller = sub.controller
+        try:
+            while True:
+                try:
+                    part = sub.queue.get(timeout=1.0)
+                except queue.Empty:
+                    if controller is not None:
+                        controller.update(time.monotonic(), self.rung_bitrate)
+                    continue
+                sub.sent += 1
+                t0 = time.monotonic()
+                yield part
+                if controller is not None:
+                    # the server has written the part by the time it asks for the next one
+                    now = time.monotonic()
+                    controller.record_send(len(part), now - t0)
+                    controller.update(now, self.rung_bitrate)
+        finally:
+            self.unsubscribe(sub)
+
+    def stats(self):
+        """Viewers per rung and what each rung costs (avg JPEG size, output fps, bytes/s)."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        data = dict(self.error_reporter.status(), viewers=len(subscribers), frames_encoded=self.frames_encoded)
+        if self.ladder:
+            data['rungs'] = [{
+                'name': rung.name,
+                'viewers': sum(1 for sub in subscribers if sub.rung == i),
+                'frames': stats['frames'],
+                'avg_kb': round(stats['avg_bytes'] / 1024.0, 1) if stats['avg_bytes'] is not None else None,
+                'fps': round(stats['fps'], 1) if stats['fps'] else None,
+                'kbps': round(self.rung_bitrate(i) * 8 / 1000.0, 1) if self.rung_bitrate(i) else None,
+            } for i, (rung, stats) in enumerate(zip(self.ladder, self._rung_stats))]
+            data['clients'] = [{
+                'rung': self.ladder[sub.rung].name,
+                'fixed': sub.controller.fixed is not None,
+                'busy': round(sub.controller.busy, 2),
+                'throughput_kbps': round(sub.controller.throughput * 8 / 1000.0, 1) if sub.controller.throughput else None,
+                'sent': sub.sent,
+                'dropped': sub.dropped,
+                'rung_changes': sub.controller.changes,
+            } for sub in subscribers]
+        return data
+
+    def _render_rungs(self, packet):
+        """Render the frame for every rung with viewers that is due under its frame cap. Returns whether any was."""
+        with self._lock:
+            rungs = sorted({sub.rung for sub in self._subscribers})
+        now = time.monotonic()
+        rendered = False
+        for i in rungs:
+            rung, stats = self.ladder[i], self._rung_stats[i]
+            if rung.max_fps and now - stats['last_sent'] < 1.0 / rung.max_fps:
+                continue
+            jpeg = self.render(packet) if i == 0 else self.render_variant(packet, rung)
+            if jpeg is None:
+                continue
+            if stats['last_sent'] and now - stats['last_sent'] < 2.0:  # not across a spell without viewers
+                fps = 1.0 / max(1e-3, now - stats['last_sent'])
+                stats['fps'] = fps if stats['fps'] is None else 0.9 * stats['fps'] + 0.1 * fps
+            stats['avg_bytes'] = len(jpeg) if stats['avg_bytes'] is None else 0.9 * stats['avg_bytes'] + 0.1 * len(jpeg)
+            stats['last_sent'] = now
+            stats['frames'] += 1
+            rendered = True
+            self.publish(jpeg, rung=i)
+        return rendered
+
+    def _run(self):
+        last_seq = 0
+        while True:
+            with self._lock:
+                if not self._subscribers:
+                    self._thread = None
+                    return
+            packet = self.ring.wait_newer(last_seq, timeout=self.idle_interval)
+            try:
+                if packet is None:
+                    jpeg = self.idle_render() if self.idle_render is not None else None
+                    if jpeg is not None:
+                        self.publish(jpeg)
+                        time.sleep(self.idle_interval)
+                    continue
+                if self.metrics is not None and last_seq and packet.seq > last_seq + 1:
+                    # the ring moved on while we were rendering: those frames never reached a viewer
+                    self.metrics.incr('frames_not_streamed', self.source, packet.seq - last_seq - 1)
+                last_seq = packet.seq
+                t0 = time.perf_counter()
+                if self.ladder:
+                    rendered = self._render_rungs(packet)
+                else:
+                    jpeg = self.render(packet)
+                    rendered = jpeg is not None
+                    if rendered:
+                        self.publish(jpeg)
+            except Exception as e:
+                # never let one bad frame kill the stream for everyone
+                self.error_reporter.report(e)
+                if self.metrics is not None:
+                    self.metrics.incr('render_errors', self.source)
+                time.sleep(0.05)
+                continue
+            if rendered:
+                self.frames_encoded += 1
+                if self.metrics is not None:
+                    self.metrics.observe('render_total', (time.perf_counter() - t0) * 1000.0, self.source)
+                    self.metrics.observe('capture_to_stream', (time.time() - packet.timestamp) * 1000.0, self.source)
+                    self.metrics.incr('frames_encoded', self.source)
+
+
+class DetectionStore:
+    """Latest detection result shared by the stream overlay, status API and alerting.
+
+    Results are plain dicts (JSON-friendly) that carry at least 'seq' and 'timestamp'.
+    Listeners are called on the publishing thread after every new result; streaming readers can block in
+    wait_newer() instead.
+    """
+
+    def __init__(self):
+        self._latest = None
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._listeners = []
+        self.version = 0
+
+    def add_listener(self, fn):
+        self._listeners.append(fn)
+
+    def publish(self, result):
+        with self._lock:
+            self._latest = result
+            self.version += 1
+            self._changed.notify_all()
+        for fn in list(self._listeners):
+            try:
+                fn(result)
+            except Exception:
+                pass
+
+    def latest(self, max_age=None):
+        """Newest result, or None if there is none (or it is older than max_age seconds)."""
+        with self._lock:
+            result = self._latest
+        if result is None:
+            return None
+        if max_age is not None and time.time() - result.get('timestamp', 0) > max_age:
+            return None
+        return result
+
+    def wait_newer(self, version, timeout=None):
+        """Block until the store changes past `version` (or timeout). Returns the current version."""
+        with self._lock:
+            if self.version == version:
+                self._changed.wait(timeout)
+            return self.version
+
+    def clear(self):
+        with self._lock:
+            self._latest = None
+            self.version += 1
+            self._changed.notify_all()
+
+
+class DetectionWorker:
+    """Background thread that runs detection on camera frames whether or not anyone is watching.
+
+    One worker (one model) serves every registered source round-robin. A source becomes due after
+    `interval` new frames (int or zero-arg callable); when inference is slower than the cameras each due
+    source gets its newest frame on its turn, so N cameras never cost N forward passes per frame period.
+    `detect(key, packet)` returns a result dict (published to that source's store) or None.
+
+    With `detect_batch(items)` and max_batch > 1 the due sources are collected (waiting at most `max_wait`
+    seconds for more to become due) and handed over as one list of (key, packet); it returns one result
+    (or None) per item, so a single forward pass can serve several cameras.
+    With a PipelineMetrics it records detect time, capture-to-result latency and inferred/skipped frames per source.
+    Exceptions from the detect callbacks are counted and logged (rate-limited) through `on_error(message)`.
+    """
+
+    def __init__(self, detect, interval=3, name='detector', detect_batch=None, max_batch=1, max_wait=0.0, metrics=None,
+                 on_error=None):
+        self.detect = detect
+        self.metrics = metrics
+        self.detect_batch = detect_batch
+        self.interval = interval
+        self.name = name
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.inferences = 0
+        self.error_reporter = ErrorReporter(f"Detector {name}", on_error)
+        self.batches = 0
+        self.frames_processed = 0
+        self.busy_s = 0.0
+        self._sources = []
+        self._next = 0
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def errors(self):
+        return self.error_reporter.count
+
+    def add_source(self, key, ring, store):
+        self._sources.append({'key': key, 'ring': ring, 'store': store, 'last_seq': ring.last_seq, 'pending': 0, 'inferences': 0})
+        ring.add_listener(lambda seq: self._wakeup.set())
+
+    def source_stats(self):
+        return {src['key']: {'inferences': src['inferences'], 'pending_frames': src['pending']} for src in self._sources}
+
+    def stats(self):
+        """Throughput of the detect calls: frames per second of inference time and mean batch size."""
+        return {
+            'inferences': self.inferences,
+            'errors': self.errors,
+            'last_error': self.error_reporter.last_error,
+            'batches': self.batches,
+            'frames': self.frames_processed,
+            'avg_batch': round(self.frames_processed / self.batches, 2) if self.batches else 0.0,
+            'frames_per_s': round(self.frames_processed / self.busy_s, 2) if self.busy_s > 0 else 0.0,
+            'max_batch': self.max_batch,
+            'max_wait_ms': round(self.max_wait * 1000.0, 1),
+        }
+
+    def current_interval(self):
+        value = self.interval() if callable(self.interval) else self.interval
+        return max(1, int(value))
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"detect-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=2.0):
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+
+    def _next_due(self, exclude=()):
+        """Account new frames per source and return the next due source in round-robin order (or None)."""
+        sources = self._sources
+        interval = self.current_interval()
+        for src in sources:
+            seq = src['ring'].last_seq
+            src['pending'] += seq - src['last_seq']
+            src['last_seq'] = seq
+        for i in range(len(sources)):
+            idx = (self._next + i) % len(sources)
+            if sources[idx]['pending'] >= interval and not any(sources[idx] is other for other in exclude):
+                self._next = (idx + 1) % len(sources)
+                return sources[idx]
+        return None
+
+    def _collect_batch(self, first):
+        """Add further due sources to `first` until max_batch is reached or max_wait expires."""
+        batch = [first]
+        deadline = time.monotonic() + max(0.0, self.max_wait)
+        while len(batch) < self.max_batch and len(batch) < len(self._sources) and not self._stop.is_set():
+            src = self._next_due(exclude=batch)
+            if src is not None:
+                batch.append(src)
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            self._wakeup.wait(remaining)
+            self._wakeup.clear()
+        return batch
+
+    def _run(self):
+        while not self._stop.is_set():
+            src = self._next_due()
+            if src is None:
+                self._wakeup.wait(0.5)
+                self._wakeup.clear()
+                continue
+            batched = self.detect_batch is not None and self.max_batch > 1
+            sources = self._collect_batch(src) if batched else [src]
+            items = []
+            for s in sources:
+                skipped, s['pending'] = s['pending'] - 1, 0
+                packet = s['ring'].latest()
+                if packet is not None:
+                    items.append((s, packet))
+                    if self.metrics is not None and skipped > 0:
+                        self.metrics.incr('frames_not_inferred', s['key'], skipped)
+            if not items:
+                continue
+            t0 = time.perf_counter()
+            try:
+                if batched:
+                    results = self.detect_batch([(s['key'], packet) for s, packet in items])
+                else:
+                    results = [self.detect(items[0][0]['key'], items[0][1])]
+            except Exception as e:
+                self.error_reporter.report(e)
+                if self.metrics is not None:
+                    self.metrics.incr('detect_errors')
+                time.sleep(0.1)
+                continue
+            if all(result is None for result in results):
+                continue
+            elapsed = time.perf_counter() - t0
+            self.busy_s += elapsed
+            self.batches += 1
+            self.frames_processed += len(items)
+            if self.metrics is not None:
+                self.metrics.observe('detect_call', elapsed * 1000.0)
+            for (s, packet), result in zip(items, results):
+                if result is not None:
+                    self.inferences += 1
+                    s['inferences'] += 1
+                    s['store'].publish(result)
+                    if self.metrics is not None:
+                        self.metrics.observe('capture_to_detection', (time.time() - packet.timestamp) * 1000.0, s['key'])
+                        self.metrics.incr('frames_inferred', s['key'])
+
+
+class CameraChannel:
+    """Everything one camera needs: capture worker, frame ring, encode-once MJPEG hub and latest detections.
+
+    `render(channel, packet)` / `idle_render(channel)` have the MjpegBroadcaster semantics. With an
+    `annotated_render` the channel gets a second hub (e.g. detections burned in for recordings); like every hub
+    it only renders while someone is subscribed. A `ladder` of StreamRungs with
+    `render_variant(channel, packet, rung, annotated)` makes both hubs adapt each viewer's quality/frame rate.
+    """
+
+    def __init__(self, device_id, opener, render, idle_render=None, info=None, mirror=True, ring_capacity=4, metrics=None,
+                 annotated_render=None, passthrough=False, ladder=None, render_variant=None, on_error=None):
+        self.device_id = device_id
+        self.info = dict(info or {})
+        self.name = self.info.get('Name') or f"Camera {device_id}"
+        self.ring = FrameRing(ring_capacity)
+        self.detections = DetectionStore()
+        self.capture = CaptureWorker(opener, ring=self.ring, name=f"dev{device_id}", mirror=mirror,
+                                     metrics=metrics, source=device_id, passthrough=passthrough)
+        self.broadcaster = MjpegBroadcaster(
+            self.ring,
+            lambda packet: render(self, packet),
+            idle_render=(lambda: idle_render(self)) if idle_render is not None else None,
+            name=f"dev{device_id}",
+            metrics=metrics,
+            source=device_id,
+            ladder=ladder,
+            render_variant=(lambda packet, rung: render_variant(self, packet, rung, False)) if render_variant else None,
+            on_error=on_error,
+        )
+        self.annotated = None
+        if annotated_render is not None:
+            self.annotated = MjpegBroadcaster(
+                self.ring,
+                lambda packet: annotated_render(self, packet),
+                idle_render=(lambda: idle_render(self)) if idle_render is not None else None,
+                name=f"dev{device_id}-annotated",
+                metrics=metrics,
+                source=device_id,
+                ladder=ladder,
+                render_variant=(lambda packet, rung: render_variant(self, packet, rung, True)) if render_variant else None,
+                on_error=on_error,
+            )
+
+    def status(self):
+        latest = self.ring.latest()
+        return {
+            'device_id': self.device_id,
+            'name': self.name,
+            'location': self.info.get('Location'),
+            'enabled': self.capture.enabled,
+            'open': self.capture.is_open(),
+            'frames_captured': self.capture.frames_captured,
+            'frames_passthrough': self.capture.frames_passthrough,
+            'frames_decoded': self.capture.frames_decoded,
+            'read_failures': self.capture.read_failures,
+            'finished': self.capture.finished,
+            'last_frame_age_s': round(time.time() - latest.timestamp, 2) if latest else None,
+            'viewers': self.broadcaster.subscriber_count,
+            'frames_encoded': self.broadcaster.frames_encoded,
+            'stream_errors': self.broadcaster.error_reporter.count,
+            'stream_last_error': self.broadcaster.error_reporter.last_error,
+            'annotated_viewers': self.annotated.subscriber_count if self.annotated is not None else 0,
+        }
+
+
+class CameraManager:
+    """CameraChannels keyed by DeviceID (insertion order; the first one is the default) plus one shared detector."""
+
+    def __init__(self, detector=None):
+        self.detector = detector
+        self._channels = OrderedDict()
+
+    def add(self, channel):
+        self._channels[channel.device_id] = channel
+        if self.detector is not None:
+            self.detector.add_source(channel.device_id, channel.ring, channel.detections)
+        return channel
+
+    def get(self, device_id):
+        return self._channels.get(device_id)
+
+    @property
+    def default(self):
+        return next(iter(self._channels.values()), None)
+
+    def channels(self):
+        return list(self._channels.values())
+
+    def set_enabled(self, enabled):
+        for channel in self._channels.values():
+            channel.capture.set_enabled(enabled)
+
+    def start(self):
+        for channel in self._channels.values():
+            channel.capture.start()
+        if self.detector is not None:
+            self.detector.start()
+
+    def stop(self):
+        if self.detector is not None:
+            self.detector.stop()
+        for channel in self._channels.values():
+            channel.capture.stop()